@@ -1,5 +1,11 @@
-from powershell_utils import run_powershell, ensure_admin
+from powershell_utils import run_powershell, run_powershell_async, run_powershell_jobs, ensure_admin
+from app_inventory import get_inventory, get_inventory_async, invalidate_inventory, ensure_baseline
+from result_protocol import run_record_script, run_record_script_async, render_plan_script, split_plan, is_start_record
+from app_catalog import get_catalog
+from operation_journal import get_journal, RecordJournaler, PACKAGE_STEP
+from job_manager import check_cancelled, JobCancelled
 import logging
+import asyncio
 
 # Setup logging if not already configured
 if not logging.getLogger().handlers:
@@ -9,169 +15,18 @@ if not logging.getLogger().handlers:
         filename='bloatware_remover.log'
     )
 
-# Dictionary of apps with their registry keys
-# Standardized registry paths using Registry:: prefix
-APPS = {
-    # Gaming & Entertainment
-    "Microsoft.XboxApp": {
-        "description": "Xbox Console Companion",
-        "registry_keys": [
-            r"Registry::HKEY_CLASSES_ROOT\Extensions\ContractId\Windows.Launch\PackageId\Microsoft.XboxApp",
-            r"Registry::HKEY_CLASSES_ROOT\Extensions\ContractId\Windows.Protocol\PackageId\Microsoft.XboxApp"
-        ]
-    },
-    "Microsoft.Xbox.TCUI": {
-        "description": "Xbox Live UI",
-        "registry_keys": []
-    },
-    "Microsoft.XboxGameOverlay": {
-        "description": "Xbox Game Overlay",
-        "registry_keys": []
-    },
-    "Microsoft.XboxGamingOverlay": {
-        "description": "Xbox Game Bar",
-        "registry_keys": []
-    },
-    "Microsoft.XboxIdentityProvider": {
-        "description": "Xbox Identity Provider",
-        "registry_keys": []
-    },
-    "Microsoft.XboxSpeechToTextOverlay": {
-        "description": "Xbox Voice Overlay",
-        "registry_keys": []
-    },
-    "Microsoft.MicrosoftSolitaireCollection": {
-        "description": "Microsoft Solitaire Collection",
-        "registry_keys": []
-    },
-    "Microsoft.ZuneMusic": {
-        "description": "Groove Music",
-        "registry_keys": []
-    },
-    "Microsoft.ZuneVideo": {
-        "description": "Movies & TV",
-        "registry_keys": []
-    },
-    "king.com.CandyCrushSaga": {
-        "description": "Candy Crush Saga",
-        "registry_keys": [
-            r"Registry::HKEY_CLASSES_ROOT\Extensions\ContractId\Windows.Launch\PackageId\King.CandyCrushSaga",
-            r"Registry::HKEY_CLASSES_ROOT\Extensions\ContractId\Windows.Protocol\PackageId\King.CandyCrushSaga"
-        ]
-    },
-    
-    # Productivity & Office
-    "Microsoft.Office.OneNote": {
-        "description": "OneNote",
-        "registry_keys": []
-    },
-    "Microsoft.MicrosoftOfficeHub": {
-        "description": "Office Hub",
-        "registry_keys": []
-    },
-    "Microsoft.MicrosoftStickyNotes": {
-        "description": "Sticky Notes",
-        "registry_keys": []
-    },
-    
-    # System Tools & Utilities
-    "Microsoft.WindowsAlarms": {
-        "description": "Alarms & Clock",
-        "registry_keys": []
-    },
-    "Microsoft.WindowsCamera": {
-        "description": "Windows Camera",
-        "registry_keys": []
-    },
-    "Microsoft.WindowsFeedbackHub": {
-        "description": "Feedback Hub",
-        "registry_keys": []
-    },
-    "Microsoft.WindowsMaps": {
-        "description": "Windows Maps",
-        "registry_keys": []
-    },
-    "Microsoft.WindowsSoundRecorder": {
-        "description": "Voice Recorder",
-        "registry_keys": []
-    },
-    "Microsoft.GetHelp": {
-        "description": "Get Help",
-        "registry_keys": []
-    },
-    "Microsoft.Getstarted": {
-        "description": "Tips/Get Started",
-        "registry_keys": []
-    },
-    "Microsoft.Microsoft3DViewer": {
-        "description": "3D Viewer",
-        "registry_keys": []
-    },
-    "Microsoft.Paint3D": {
-        "description": "Paint 3D",
-        "registry_keys": [
-            r"Registry::HKEY_CLASSES_ROOT\Extensions\ContractId\Windows.Launch\PackageId\Microsoft.MSPaint",
-            r"Registry::HKEY_CLASSES_ROOT\Extensions\ContractId\Windows.Protocol\PackageId\Microsoft.MSPaint"
-        ]
-    },
-    "Microsoft.StorePurchaseApp": {
-        "description": "Store Purchase App",
-        "registry_keys": []
-    },
-    
-    # Communication & Social
-    "Microsoft.SkypeApp": {
-        "description": "Skype",
-        "registry_keys": [
-            r"Registry::HKEY_CLASSES_ROOT\Extensions\ContractId\Windows.Launch\PackageId\Microsoft.SkypeApp",
-            r"Registry::HKEY_CLASSES_ROOT\Extensions\ContractId\Windows.Protocol\PackageId\Microsoft.SkypeApp"
-        ]
-    },
-    "Microsoft.YourPhone": {
-        "description": "Your Phone/Phone Link",
-        "registry_keys": []
-    },
-    "microsoft.windowscommunicationsapps": {
-        "description": "Mail and Calendar",
-        "registry_keys": []
-    },
-    "Microsoft.People": {
-        "description": "People",
-        "registry_keys": []
-    },
-    
-    # News & Information
-    "Microsoft.BingWeather": {
-        "description": "Weather",
-        "registry_keys": []
-    },
-    
-    # Optional items
-    "Microsoft.Windows.Photos": {
-        "description": "Windows Photos",
-        "registry_keys": []
-    },
-    
-    # Windows 11 specific apps
-    "Microsoft.WindowsTerminal": {
-        "description": "Windows Terminal",
-        "registry_keys": []
-    },
-    "Microsoft.PowerToys": {
-        "description": "PowerToys",
-        "registry_keys": []
-    },
-    "Microsoft.Copilot": {
-        "description": "Copilot",
-        "registry_keys": []
-    },
-}
+# App catalog compiled from app_catalog.json
+CATALOG = get_catalog()
+
+# Read-only {name: {"description": ..., "registry_keys": [...]}} view of the catalog
+APPS = CATALOG.apps
 
-# Default list of unneeded apps - can be modified separately if needed
-UNNEEDED_APPS = list(APPS.keys())
+# Default list of unneeded apps: every catalog app not marked protected
+UNNEEDED_APPS = CATALOG.unneeded()
 
-# Selectable apps for user selection - same as UNNEEDED_APPS for now
-SELECTABLE_APPS = list(APPS.keys())
+# Selectable apps for user selection; protected apps (the Store, App
+# Installer, Windows Security) are never offered for removal
+SELECTABLE_APPS = CATALOG.unneeded()
 
 def remove_app(app_name):
     """Remove a single app and its registry entries.
@@ -191,28 +46,30 @@ def remove_app(app_name):
             logging.warning("App removal requires administrator privileges")
             return False
         
-        # 1. Remove the AppX package
-        ps_cmd = f"Get-AppxPackage -AllUsers *{app_name}* | Remove-AppxPackage"
-        success, output = run_powershell(ps_cmd)
+        # Remember what was installed before the first removal
+        ensure_baseline()
+        
+        # 1. Remove the AppX package by its exact full names
+        success, output = run_powershell(removal_command(app_name, get_inventory()), command_class="remove")
+        invalidate_inventory()
         
         if success:
             logging.info(f"Successfully removed app {app_name}")
             print(f"Successfully removed {app_name}")
             
             # 2. Remove associated registry keys if defined
-            if app_name in APPS and "registry_keys" in APPS[app_name]:
+            if app_name in APPS:
                 all_keys_removed = True
-                for key in APPS[app_name]["registry_keys"]:
-                    rm_cmd = f"if (Test-Path '{key}') {{ Remove-Item -Path '{key}' -Recurse -Force }}"
-                    key_success, key_output = run_powershell(rm_cmd)
-                    
-                    if not key_success:
+                keys = CATALOG.registry_keys(app_name)
+                
+                # Keys are independent, so clean them up concurrently
+                rm_cmds = [f"if (Test-Path '{key}') {{ Remove-Item -Path '{key}' -Recurse -Force }}" for key in keys]
+                for key, result in zip(keys, run_powershell_jobs(rm_cmds, command_class="registry")):
+                    if not result["success"]:
                         all_keys_removed = False
                         logging.warning(f"Failed to remove registry key {key}")
                 
-                if all_keys_removed and APPS[app_name]["registry_keys"]:
-                    logging.info(f"Successfully removed all registry keys for {app_name}")
-                elif not APPS[app_name]["registry_keys"]:
+                if all_keys_removed:
                     logging.info(f"Successfully removed all registry keys for {app_name}")
                 else:
                     logging.warning(f"Some registry keys for {app_name} could not be removed")
@@ -230,6 +87,245 @@ def remove_app(app_name):
         print(f"Error removing {app_name}: {str(e)}")
         return False
 
+# Number of apps compiled into one removal script
+REMOVAL_CHUNK_SIZE = 50
+
+# Removal script run once per chunk. The plan is a JSON list of
+# {"name": ..., "packages": [...], "registry_keys": [...]} entries, where
+# "packages" holds the exact PackageFullNames (null to look the name up in the
+# script). Each app first writes a start record {"app", "event": "start"},
+# then every step writes one result record: {"app", "step", "ok", "message"},
+# where the step is "package" for the AppX removal or the registry key path.
+REMOVAL_SCRIPT_TEMPLATE = r"""
+$plan = ConvertFrom-Json @'
+__PLAN__
+'@
+foreach ($app in $plan) {
+    Write-Record @{ app = $app.name; event = 'start' }
+    try {
+        $packages = @($app.packages)
+        if ($null -eq $app.packages) { $packages = @(Get-AppxPackage -AllUsers -Name $app.name -ErrorAction Stop | ForEach-Object { $_.PackageFullName }) }
+        foreach ($package in $packages) { Remove-AppxPackage -Package $package -ErrorAction Stop }
+        Write-Record @{ app = $app.name; step = 'package'; ok = $true; message = '' }
+    } catch {
+        Write-Record @{ app = $app.name; step = 'package'; ok = $false; message = $_.Exception.Message }
+        continue
+    }
+    foreach ($key in $app.registry_keys) {
+        try {
+            if (Test-Path -LiteralPath $key) { Remove-Item -LiteralPath $key -Recurse -Force -ErrorAction Stop }
+            Write-Record @{ app = $app.name; step = $key; ok = $true; message = '' }
+        } catch {
+            Write-Record @{ app = $app.name; step = $key; ok = $false; message = $_.Exception.Message }
+        }
+    }
+}
+"""
+
+def removal_command(app_name, inventory=None):
+    """Command that removes the packages installed under exactly app_name.
+    
+    Args:
+        app_name (str): The name of the app to remove
+        inventory (AppInventory): Snapshot used to resolve the PackageFullNames;
+            without it PowerShell looks the exact name up itself
+    
+    Returns:
+        str: PowerShell command
+    """
+    if inventory is None:
+        return f"Get-AppxPackage -AllUsers -Name '{app_name}' | Remove-AppxPackage"
+    full_names = inventory.resolve(app_name)
+    if not full_names:
+        return f"Write-Output '{app_name} is not installed'"
+    return "; ".join(f"Remove-AppxPackage -Package '{full_name}'" for full_name in full_names)
+
+def build_removal_plan(app_list, inventory=None):
+    """Plan entries for REMOVAL_SCRIPT_TEMPLATE, one per app.
+    
+    Args:
+        app_list (list): List of app names to remove
+        inventory (AppInventory): Snapshot used to resolve each app to its
+            PackageFullNames; without it the script looks the exact names up
+    
+    Returns:
+        list: {"name", "packages", "registry_keys"} dicts
+    """
+    plan = []
+    for app_name in app_list:
+        registry_keys = CATALOG.registry_keys(app_name)
+        packages = inventory.resolve(app_name) if inventory is not None else None
+        plan.append({"name": app_name, "packages": packages, "registry_keys": registry_keys})
+    return plan
+
+def build_removal_script(app_list, inventory=None):
+    """Compile a list of apps into a single removal script.
+    
+    Args:
+        app_list (list): List of app names to remove
+        inventory (AppInventory): Snapshot used to resolve each app to its
+            PackageFullNames; without it the script looks the exact names up
+    
+    Returns:
+        str: PowerShell script that removes every app and its registry keys
+    """
+    return render_plan_script(REMOVAL_SCRIPT_TEMPLATE, build_removal_plan(app_list, inventory))
+
+def parse_removal_results(app_list, records, error=None):
+    """Turn the records written by a removal script into per-app results.
+    
+    Apps without a package record (e.g. the script was cut short) count as failed.
+    
+    Args:
+        app_list (list): App names that were in the script
+        records (list): Records parsed from the script output
+        error (str): Script failure message, used for apps without a record
+    
+    Returns:
+        dict: app_name -> {"removed": bool, "registry_keys": {key: bool}, "error": str}
+    """
+    results = {
+        app_name: {"removed": False, "registry_keys": {}, "error": error or "No result reported"}
+        for app_name in app_list
+    }
+    for record in records:
+        result = results.get(record.get("app"))
+        if result is None or is_start_record(record):
+            continue
+        ok = bool(record.get("ok"))
+        if record.get("step") == "package":
+            result["removed"] = ok
+            result["error"] = "" if ok else record.get("message") or "Removal failed"
+        else:
+            result["registry_keys"][record.get("step")] = ok
+    return results
+
+def remove_apps_batch(app_list, chunk_size=REMOVAL_CHUNK_SIZE, journal=None):
+    """Remove apps and their registry keys with one PowerShell script per chunk.
+    
+    Chunks hold up to chunk_size apps, fewer if their plan would pass
+    result_protocol.MAX_PLAN_CHARS.
+    
+    Every app's package and registry key steps are journaled as the script
+    reports them, so an interrupted removal can be resumed (see
+    operation_journal). Run as a job, it stops between chunks once the job
+    is cancelled and the operation ends as "cancelled".
+    
+    Args:
+        app_list (list): List of app names to remove
+        chunk_size (int): Maximum number of apps per script
+        journal (OperationJournal): Journal to record the steps in
+            (defaults to the session's journal)
+    
+    Returns:
+        dict: app_name -> {"removed": bool, "registry_keys": {key: bool}, "error": str}
+    
+    Raises:
+        JobCancelled: If the job running the removal was cancelled
+    """
+    # Remember what was installed before the first removal
+    ensure_baseline()
+    
+    # Resolve every app to its exact full names from one enumeration
+    inventory = get_inventory()
+    
+    journal = journal or get_journal()
+    steps = _removal_steps(app_list)
+    op_id = journal.begin("remove", steps)
+    
+    results = {}
+    try:
+        for chunk_plan in split_plan(build_removal_plan(app_list, inventory), chunk_size):
+            check_cancelled()
+            chunk = [entry["name"] for entry in chunk_plan]
+            logging.info(f"Removing batch of {len(chunk)} apps: {', '.join(chunk)}")
+            
+            recorder = RecordJournaler(journal, op_id, {app_name: steps[app_name] for app_name in chunk})
+            script = render_plan_script(REMOVAL_SCRIPT_TEMPLATE, chunk_plan)
+            success, records, error = run_record_script(script, command_class="remove", units=len(chunk), on_record=recorder)
+            if not success:
+                logging.error(f"Batch removal script failed: {error}")
+            chunk_results = parse_removal_results(chunk, records, error)
+            recorder.finish(_removal_outcomes(chunk_results))
+            results.update(chunk_results)
+    except JobCancelled:
+        logging.warning(f"Removal cancelled after {len(results)} of {len(app_list)} apps")
+        journal.end(op_id, "cancelled")
+        invalidate_inventory()
+        _report_removal_results(results)
+        raise
+    
+    journal.end(op_id)
+    invalidate_inventory()
+    _report_removal_results(results)
+    return results
+
+async def remove_apps_batch_async(app_list, chunk_size=REMOVAL_CHUNK_SIZE, journal=None):
+    """Async counterpart of remove_apps_batch."""
+    await asyncio.to_thread(ensure_baseline)
+    inventory = await get_inventory_async()
+    
+    journal = journal or get_journal()
+    steps = _removal_steps(app_list)
+    op_id = await asyncio.to_thread(journal.begin, "remove", steps)
+    
+    results = {}
+    for chunk_plan in split_plan(build_removal_plan(app_list, inventory), chunk_size):
+        chunk = [entry["name"] for entry in chunk_plan]
+        logging.info(f"Removing batch of {len(chunk)} apps: {', '.join(chunk)}")
+        
+        # Records are journaled from the event loop; each is one small synced append
+        recorder = RecordJournaler(journal, op_id, {app_name: steps[app_name] for app_name in chunk})
+        script = render_plan_script(REMOVAL_SCRIPT_TEMPLATE, chunk_plan)
+        success, records, error = await run_record_script_async(script, command_class="remove", units=len(chunk), on_record=recorder)
+        if not success:
+            logging.error(f"Batch removal script failed: {error}")
+        chunk_results = parse_removal_results(chunk, records, error)
+        await asyncio.to_thread(recorder.finish, _removal_outcomes(chunk_results))
+        results.update(chunk_results)
+    
+    await asyncio.to_thread(journal.end, op_id)
+    invalidate_inventory()
+    _report_removal_results(results)
+    return results
+
+def _removal_steps(app_list):
+    """Journal steps of a removal: each app's package, then its registry keys."""
+    return {app_name: [PACKAGE_STEP] + CATALOG.registry_keys(app_name) for app_name in app_list}
+
+def _removal_outcomes(results):
+    """Journal outcomes of the steps a removal script reported on."""
+    outcomes = []
+    for app_name, result in results.items():
+        outcomes.append((app_name, PACKAGE_STEP, result["removed"], result["error"]))
+        outcomes.extend((app_name, key, ok, "") for key, ok in result["registry_keys"].items())
+    return outcomes
+
+def _report_removal_results(results):
+    """Log and print per-app removal outcomes the same way remove_app does."""
+    for app_name, result in results.items():
+        if result["removed"]:
+            logging.info(f"Successfully removed app {app_name}")
+            print(f"Successfully removed {app_name}")
+            failed_keys = [key for key, ok in result["registry_keys"].items() if not ok]
+            for key in failed_keys:
+                logging.warning(f"Failed to remove registry key {key}")
+            if failed_keys:
+                logging.warning(f"Some registry keys for {app_name} could not be removed")
+            else:
+                logging.info(f"Successfully removed all registry keys for {app_name}")
+        else:
+            logging.error(f"Failed to remove {app_name}")
+            if result["error"]:
+                logging.error(f"Error details: {result['error']}")
+            print(f"Failed to remove {app_name}")
+
+# Registry policy that turns Copilot off
+COPILOT_DISABLE_COMMANDS = [
+    "New-Item -Path 'HKCU:\\Software\\Policies\\Microsoft\\Windows' -Name 'WindowsCopilot' -Force",
+    "New-ItemProperty -Path 'HKCU:\\Software\\Policies\\Microsoft\\Windows\\WindowsCopilot' -Name 'TurnOffWindowsCopilot' -Value 1 -PropertyType DWORD -Force"
+]
+
 def disable_copilot():
     """Disable Copilot via registry settings.
     
@@ -246,13 +342,8 @@ def disable_copilot():
             logging.warning("Disabling Copilot requires administrator privileges")
             return False
         
-        cmds = [
-            "New-Item -Path 'HKCU:\\Software\\Policies\\Microsoft\\Windows' -Name 'WindowsCopilot' -Force",
-            "New-ItemProperty -Path 'HKCU:\\Software\\Policies\\Microsoft\\Windows\\WindowsCopilot' -Name 'TurnOffWindowsCopilot' -Value 1 -PropertyType DWORD -Force"
-        ]
-        
         success = True
-        for cmd in cmds:
+        for cmd in COPILOT_DISABLE_COMMANDS:
             cmd_success, cmd_output = run_powershell(cmd)
             if not cmd_success:
                 success = False
@@ -288,14 +379,9 @@ def remove_unneeded_apps():
             logging.warning("Removing apps requires administrator privileges")
             return False
         
-        successful_removals = 0
-        failed_removals = 0
-        
-        for app in UNNEEDED_APPS:
-            if remove_app(app):
-                successful_removals += 1
-            else:
-                failed_removals += 1
+        results = remove_apps_batch(UNNEEDED_APPS)
+        successful_removals = sum(1 for result in results.values() if result["removed"])
+        failed_removals = len(results) - successful_removals
         
         # Also disable Copilot
         disable_copilot()
@@ -307,6 +393,8 @@ def remove_unneeded_apps():
         print(result_msg)
         logging.info(result_msg)
         return successful_removals > 0
+    except JobCancelled:
+        raise
     except Exception as e:
         logging.error(f"Error removing unneeded apps: {str(e)}")
         print(f"Error removing apps: {str(e)}")
@@ -336,14 +424,9 @@ def remove_selected_apps(app_list):
             logging.warning("Removing apps requires administrator privileges")
             return False
         
-        successful_removals = 0
-        failed_removals = 0
-        
-        for app in app_list:
-            if remove_app(app):
-                successful_removals += 1
-            else:
-                failed_removals += 1
+        results = remove_apps_batch(list(app_list))
+        successful_removals = sum(1 for result in results.values() if result["removed"])
+        failed_removals = len(results) - successful_removals
         
         # Check if Copilot should be disabled
         if "Microsoft.Copilot" in app_list:
@@ -356,7 +439,65 @@ def remove_selected_apps(app_list):
         print(result_msg)
         logging.info(result_msg)
         return successful_removals > 0
+    except JobCancelled:
+        raise
     except Exception as e:
         logging.error(f"Error removing selected apps: {str(e)}")
         print(f"Error removing selected apps: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+async def disable_copilot_async():
+    """Async counterpart of disable_copilot (assumes admin was already checked)."""
+    success = True
+    # The key has to exist before the value is written, so run these in order
+    for cmd in COPILOT_DISABLE_COMMANDS:
+        cmd_success, cmd_output = await run_powershell_async(cmd)
+        if not cmd_success:
+            success = False
+            logging.error(f"Failed to execute command: {cmd}")
+            logging.error(f"Error details: {cmd_output}")
+    
+    if success:
+        logging.info("Copilot disabled successfully")
+    else:
+        logging.error("Failed to fully disable Copilot")
+    return success
+
+async def remove_selected_apps_async(app_list):
+    """Async counterpart of remove_selected_apps.
+    
+    Args:
+        app_list (list): List of app names to remove
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        if not app_list:
+            logging.info("No apps selected for removal")
+            return False
+        
+        logging.info(f"Starting removal of selected apps: {', '.join(app_list)}")
+        
+        # Check for admin privileges
+        if not ensure_admin():
+            logging.warning("Removing apps requires administrator privileges")
+            return False
+        
+        results = await remove_apps_batch_async(list(app_list))
+        successful_removals = sum(1 for result in results.values() if result["removed"])
+        failed_removals = len(results) - successful_removals
+        
+        # Check if Copilot should be disabled
+        if "Microsoft.Copilot" in app_list:
+            await disable_copilot_async()
+        
+        result_msg = f"Removal complete. Successfully removed {successful_removals} apps."
+        if failed_removals > 0:
+            result_msg += f" Failed to remove {failed_removals} apps."
+        
+        logging.info(result_msg)
+        return successful_removals > 0
+    except Exception as e:
+        logging.error(f"Error removing selected apps: {str(e)}")
+        return False
@@ -0,0 +1,179 @@
+import json
+import os
+import threading
+from collections import namedtuple
+from collections.abc import Mapping
+from functools import cached_property
+from types import MappingProxyType
+
+# Catalog shipped next to this module. It is parsed and validated on every
+# start (well under a millisecond), so there is no compiled cache to trust.
+CATALOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_catalog.json")
+
+# One catalog entry; registry_keys is a tuple so entries stay immutable
+AppEntry = namedtuple("AppEntry", ["name", "description", "category", "family_name", "protected", "registry_keys"])
+
+class AppCatalog:
+    """Immutable, indexed view of the app catalog.
+    
+    Lookups by name and family name are case-insensitive, like package names.
+    The family and category indexes are built on first use.
+    """
+    def __init__(self, entries, categories):
+        """
+        Args:
+            entries (tuple): AppEntry records in catalog order
+            categories (dict): Category id -> readable label
+        """
+        self.entries = entries
+        self.names = tuple(entry.name for entry in entries)
+        self._categories = dict(categories)
+        self._by_name = {entry.name.casefold(): entry for entry in entries}
+    
+    @cached_property
+    def _by_family(self):
+        return {entry.family_name.casefold(): entry for entry in self.entries if entry.family_name}
+    
+    @cached_property
+    def _by_category(self):
+        by_category = {}
+        for entry in self.entries:
+            by_category.setdefault(entry.category, []).append(entry.name)
+        return {category: tuple(names) for category, names in by_category.items()}
+    
+    @property
+    def categories(self):
+        """Read-only category id -> readable label mapping."""
+        return MappingProxyType(self._categories)
+    
+    @property
+    def apps(self):
+        """Read-only view in the shape of the former APPS dict."""
+        return _AppsView(self)
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def __iter__(self):
+        return iter(self.names)
+    
+    def __contains__(self, app_name):
+        return app_name.casefold() in self._by_name
+    
+    def get(self, app_name):
+        """Get the entry for an app name, or None."""
+        return self._by_name.get(app_name.casefold())
+    
+    def find_by_family(self, family_name):
+        """Get the entry for a package family name, or None."""
+        return self._by_family.get(family_name.casefold())
+    
+    def in_category(self, category):
+        """Get the app names in a category, in catalog order."""
+        return self._by_category.get(category, ())
+    
+    def description(self, app_name):
+        """Get the readable name of an app, falling back to the app name."""
+        entry = self.get(app_name)
+        return entry.description if entry is not None and entry.description else app_name
+    
+    def registry_keys(self, app_name):
+        """Get the registry keys removed with an app."""
+        entry = self.get(app_name)
+        return list(entry.registry_keys) if entry is not None else []
+    
+    def is_protected(self, app_name):
+        """Check whether an app is marked protected (never removed in bulk)."""
+        entry = self.get(app_name)
+        return entry is not None and entry.protected
+    
+    def unneeded(self):
+        """Get the names of the apps that may be removed in bulk (not protected)."""
+        return [entry.name for entry in self.entries if not entry.protected]
+
+class _AppsView(Mapping):
+    """Read-only {name: {"description": ..., "registry_keys": [...], ...}} view
+    in the shape of the former APPS dict."""
+    def __init__(self, catalog):
+        self._catalog = catalog
+    
+    def __getitem__(self, app_name):
+        entry = self._catalog._by_name.get(app_name.casefold()) if isinstance(app_name, str) else None
+        if entry is None or entry.name != app_name:
+            raise KeyError(app_name)
+        return MappingProxyType(dict(entry._asdict(), registry_keys=list(entry.registry_keys)))
+    
+    def __iter__(self):
+        return iter(self._catalog.names)
+    
+    def __len__(self):
+        return len(self._catalog.names)
+
+def compile_catalog(data):
+    """Validate a parsed catalog file and turn it into AppEntry records.
+    
+    Args:
+        data (dict): Parsed catalog with "categories" and "apps"
+    
+    Returns:
+        tuple: (entries, categories)
+    
+    Raises:
+        ValueError: If the catalog is malformed
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("apps"), list):
+        raise ValueError("The catalog must be an object with an 'apps' list")
+    categories = data.get("categories", {})
+    
+    entries = []
+    seen = set()
+    for position, app in enumerate(data["apps"]):
+        name = app.get("name") if isinstance(app, dict) else None
+        if not isinstance(name, str) or not name:
+            raise ValueError(f"Catalog entry {position} has no name")
+        if name.casefold() in seen:
+            raise ValueError(f"Catalog entry {name} is listed twice")
+        seen.add(name.casefold())
+        
+        category = app.get("category", "")
+        if categories and category not in categories:
+            raise ValueError(f"Catalog entry {name} has unknown category {category!r}")
+        registry_keys = app.get("registry_keys", [])
+        if not isinstance(registry_keys, list):
+            raise ValueError(f"Catalog entry {name} has invalid registry_keys")
+        
+        entries.append(AppEntry(
+            name=name,
+            description=app.get("description") or name,
+            category=category,
+            family_name=app.get("family_name"),
+            protected=bool(app.get("protected", False)),
+            registry_keys=tuple(registry_keys)
+        ))
+    return tuple(entries), dict(categories)
+
+def load_catalog(path=CATALOG_FILE):
+    """Load and validate the catalog file.
+    
+    Args:
+        path (str): Path to the catalog JSON file
+    
+    Returns:
+        AppCatalog: The compiled catalog
+    
+    Raises:
+        ValueError: If the catalog is malformed
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return AppCatalog(*compile_catalog(json.load(f)))
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_catalog():
+    """Get the session's app catalog, loading it on first use."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = load_catalog()
+        return _catalog
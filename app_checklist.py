@@ -0,0 +1,281 @@
+import tkinter as tk
+from tkinter import ttk
+import logging
+
+# Height of one list row in pixels
+ROW_HEIGHT = 24
+
+def install_status_detail(installed):
+    """Row fields showing whether an app is installed (green) or not (red)."""
+    if installed:
+        return {"detail": "Installed", "detail_color": "#008000"}
+    return {"detail": "Not Installed", "detail_color": "#800000"}
+
+class AppChecklist(tk.Frame):
+    """Scrolling checklist that only creates widgets for the rows in view.
+    
+    Rows are plain dicts and the selection is a plain list of booleans, so the
+    number of widgets stays the same whether the list holds 10 apps or 5,000.
+    Scrolling re-binds the visible row widgets to other rows instead of moving
+    a tall frame inside a canvas.
+    """
+    def __init__(self, parent, bg="#d4d4d4", empty_text=""):
+        """
+        Args:
+            parent (tk.Widget): Parent widget
+            bg (str): Background color
+            empty_text (str): Message shown while the list has no rows
+        """
+        super().__init__(parent, bg=bg)
+        self.bg = bg
+        
+        # Row data and selection, index for index
+        self.rows = []
+        self.selected = []
+        self._index = {}
+        
+        # Scroll position in pixels from the top of the list
+        self.offset = 0
+        
+        # Scrollbar
+        self.scrollbar = tk.Scrollbar(self, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # Visible area; row widgets are placed in it at their scrolled position
+        self.viewport = tk.Frame(self, bg=bg)
+        self.viewport.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.viewport.bind("<Configure>", self._on_configure)
+        self._bind_wheel(self.viewport)
+        
+        # Shown instead of the rows when the list is empty
+        self.empty_label = tk.Label(
+            self.viewport,
+            text=empty_text,
+            font=("Arial", 10),
+            bg=bg,
+            fg="#555555"
+        )
+        
+        # Reusable row widgets, enough to fill the viewport
+        self._slots = []
+    
+    # Data
+    
+    def set_rows(self, rows):
+        """Replace the rows and clear the selection.
+        
+        Args:
+            rows (list): One dict per row with "name" (unique key), "text"
+                (checkbox label) and optionally "detail" and "detail_color"
+                (right-hand label and its color)
+        """
+        self.rows = list(rows)
+        self.selected = [False] * len(self.rows)
+        self._index = {row["name"]: i for i, row in enumerate(self.rows)}
+        self.offset = 0
+        self._render()
+    
+    def reconcile_rows(self, rows):
+        """Bring the list up to date with rows, matched by name.
+        
+        Rows that are still present keep their selection, rows whose fields
+        changed are updated in place, and only the added or removed rows
+        change the list. The scroll position is kept, and nothing is redrawn
+        when nothing changed.
+        
+        Args:
+            rows (list): The new rows, in the same form as for set_rows
+        
+        Returns:
+            tuple: (added, removed, changed) row counts
+        """
+        rows = list(rows)
+        names = [row["name"] for row in rows]
+        
+        if names == self.names():
+            # Same rows in the same order: only compare the fields
+            changed = 0
+            for i, row in enumerate(rows):
+                if row != self.rows[i]:
+                    self.rows[i] = row
+                    changed += 1
+            if changed:
+                self._render()
+            return 0, 0, changed
+        
+        old_index = self._index
+        added = sum(1 for name in names if name not in old_index)
+        removed = len(self.rows) - (len(rows) - added)
+        changed = sum(1 for row in rows if row["name"] in old_index and row != self.rows[old_index[row["name"]]])
+        
+        self.selected = [self.selected[old_index[name]] if name in old_index else False for name in names]
+        self.rows = rows
+        self._index = {name: i for i, name in enumerate(names)}
+        self._render()
+        return added, removed, changed
+    
+    def set_empty_text(self, text):
+        """Change the message shown while the list has no rows."""
+        self.empty_label.config(text=text)
+    
+    def update_row(self, name, **changes):
+        """Change the fields of one row, e.g. update_row(name, detail="Installed").
+        
+        Returns:
+            bool: True if the row exists
+        """
+        i = self._index.get(name)
+        if i is None:
+            return False
+        self.rows[i].update(changes)
+        self._render()
+        return True
+    
+    def get_row(self, name):
+        """Get the row dict for name, or None."""
+        i = self._index.get(name)
+        return self.rows[i] if i is not None else None
+    
+    def names(self):
+        """Get the row names in display order."""
+        return [row["name"] for row in self.rows]
+    
+    # Selection
+    
+    def selected_names(self):
+        """Get the names of the checked rows in display order."""
+        return [row["name"] for row, checked in zip(self.rows, self.selected) if checked]
+    
+    def set_selected(self, name, checked):
+        """Check or uncheck one row by name."""
+        i = self._index.get(name)
+        if i is not None:
+            self.selected[i] = bool(checked)
+            self._render()
+    
+    def select_all(self):
+        """Check every row."""
+        self.selected = [True] * len(self.rows)
+        self._render()
+    
+    def clear_selection(self):
+        """Uncheck every row."""
+        self.selected = [False] * len(self.rows)
+        self._render()
+    
+    def select_where(self, predicate):
+        """Check exactly the rows for which predicate(row) is true."""
+        self.selected = [bool(predicate(row)) for row in self.rows]
+        self._render()
+    
+    # Scrolling
+    
+    def yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", n, "units"|"pages")."""
+        try:
+            if args[0] == "moveto":
+                self.offset = float(args[1]) * self._content_height()
+            elif args[0] == "scroll":
+                step = self.viewport.winfo_height() if args[2] == "pages" else ROW_HEIGHT
+                self.offset += int(args[1]) * step
+            self._render()
+        except Exception as e:
+            logging.error(f"Error scrolling app list: {str(e)}")
+    
+    def _on_wheel(self, event):
+        """Scroll three rows per wheel notch"""
+        if getattr(event, "num", None) == 4:
+            notches = 1
+        elif getattr(event, "num", None) == 5:
+            notches = -1
+        else:
+            notches = event.delta // 120 if abs(event.delta) >= 120 else (1 if event.delta > 0 else -1)
+        self.yview("scroll", -3 * notches, "units")
+        return "break"
+    
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel)
+        widget.bind("<Button-4>", self._on_wheel)
+        widget.bind("<Button-5>", self._on_wheel)
+    
+    def _content_height(self):
+        return len(self.rows) * ROW_HEIGHT
+    
+    # Rendering
+    
+    def _on_configure(self, event):
+        """Grow the row pool to fill the new height and redraw"""
+        try:
+            needed = event.height // ROW_HEIGHT + 2
+            while len(self._slots) < needed:
+                self._slots.append(self._make_slot())
+            self._render()
+        except Exception as e:
+            logging.error(f"Error resizing app list: {str(e)}")
+    
+    def _make_slot(self):
+        """Create one reusable row: a checkbox and a right-hand detail label"""
+        frame = tk.Frame(self.viewport, bg=self.bg)
+        var = tk.BooleanVar(value=False)
+        slot = {"frame": frame, "var": var, "index": None}
+        
+        checkbox = ttk.Checkbutton(
+            frame,
+            variable=var,
+            style="TCheckbutton",
+            command=lambda: self._on_toggle(slot)
+        )
+        checkbox.pack(side=tk.LEFT, padx=5)
+        
+        detail = tk.Label(
+            frame,
+            font=("Arial", 8),
+            bg=self.bg
+        )
+        detail.pack(side=tk.RIGHT, padx=5)
+        
+        slot["checkbox"] = checkbox
+        slot["detail"] = detail
+        for widget in (frame, checkbox, detail):
+            self._bind_wheel(widget)
+        return slot
+    
+    def _on_toggle(self, slot):
+        """Copy a click on a row widget into the selection list"""
+        if slot["index"] is not None:
+            self.selected[slot["index"]] = slot["var"].get()
+    
+    def _render(self):
+        """Bind the row widgets to the rows currently in view"""
+        height = self.viewport.winfo_height()
+        
+        # Keep the scroll position inside the list
+        self.offset = max(0, min(self.offset, self._content_height() - height))
+        
+        if self.rows:
+            self.empty_label.place_forget()
+        else:
+            self.empty_label.place(relx=0.5, y=20, anchor="n")
+        
+        first = int(self.offset // ROW_HEIGHT)
+        shift = int(self.offset - first * ROW_HEIGHT)
+        for k, slot in enumerate(self._slots):
+            i = first + k
+            if i >= len(self.rows):
+                slot["index"] = None
+                slot["frame"].place_forget()
+                continue
+            
+            row = self.rows[i]
+            slot["index"] = i
+            slot["var"].set(self.selected[i])
+            slot["checkbox"].config(text=row["text"])
+            slot["detail"].config(text=row.get("detail", ""), fg=row.get("detail_color", "#555555"))
+            slot["frame"].place(x=0, y=k * ROW_HEIGHT - shift, relwidth=1, height=ROW_HEIGHT)
+        
+        # Tell the scrollbar which share of the list is in view
+        total = self._content_height()
+        if total <= height or total == 0:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + height) / total)
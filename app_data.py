@@ -0,0 +1,38 @@
+import logging
+import os
+
+# Folder of the state files under the user's local application data
+DATA_DIR_NAME = "GamingDebloater"
+
+# Environment variable that moves the state files elsewhere (tests, portable use)
+DATA_DIR_ENV = "GAMING_DEBLOATER_DATA"
+
+def data_dir():
+    """Get the per-user directory for state files, creating it if needed.
+    
+    %LOCALAPPDATA%\\GamingDebloater on Windows and
+    $XDG_STATE_HOME/GamingDebloater (~/.local/state) elsewhere, unless
+    DATA_DIR_ENV names another directory. The location doesn't depend on the
+    directory the program was started from, so every entry point finds the
+    same journal, baseline and latency history.
+    
+    Returns:
+        str: The directory
+    """
+    path = os.environ.get(DATA_DIR_ENV)
+    if not path:
+        if os.name == 'nt':
+            base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+        else:
+            base = os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state")
+        path = os.path.join(base, DATA_DIR_NAME)
+    try:
+        os.makedirs(path, exist_ok=True)
+    except OSError as e:
+        # Reading and writing the files will fail and be logged by their owners
+        logging.error(f"Could not create data directory {path}: {str(e)}")
+    return path
+
+def data_path(file_name):
+    """Get the path of a state file in the data directory."""
+    return os.path.join(data_dir(), file_name)
@@ -0,0 +1,446 @@
+from powershell_utils import run_powershell
+from result_protocol import run_record_script, run_record_script_async
+from app_data import data_path
+import bisect
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+# Setup logging if not already configured
+if not logging.getLogger().handlers:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        filename='bloatware_remover.log'
+    )
+
+# Seconds a snapshot is reused before the next lookup enumerates again
+INVENTORY_TTL = 10
+
+# One enumeration of every package, one result record per package
+INVENTORY_SCRIPT = r"""
+Get-AppxPackage -AllUsers | ForEach-Object {
+    Write-Record @{
+        Name = $_.Name
+        PackageFullName = $_.PackageFullName
+        PackageFamilyName = $_.PackageFamilyName
+        InstallLocation = $_.InstallLocation
+        Version = [string]$_.Version
+        Status = [string]$_.Status
+        IsFramework = [bool]$_.IsFramework
+        NonRemovable = [bool]$_.NonRemovable
+        SignatureKind = [string]$_.SignatureKind
+        Users = @($_.PackageUserInformation | ForEach-Object { $_.UserSecurityId.Username })
+    }
+}
+"""
+
+class AppInventory:
+    """Snapshot of the installed AppX packages taken from a single enumeration.
+    
+    Names are matched case-insensitively, like PowerShell's -eq and -like.
+    """
+    def __init__(self, packages, taken_at=None):
+        self.packages = packages
+        self.taken_at = time.monotonic() if taken_at is None else taken_at
+        
+        # Indexes for O(1) exact lookups
+        self.by_name = {}
+        self.by_full_name = {}
+        self.by_family = {}
+        for package in packages:
+            name = (package.get("Name") or "").casefold()
+            if name:
+                self.by_name.setdefault(name, []).append(package)
+            full_name = (package.get("PackageFullName") or "").casefold()
+            if full_name:
+                self.by_full_name[full_name] = package
+            family = (package.get("PackageFamilyName") or "").casefold()
+            if family:
+                self.by_family.setdefault(family, []).append(package)
+        
+        # Sorted names for prefix lookups
+        self._sorted_names = sorted(self.by_name)
+        
+        # App name -> PackageFullNames, filled in by resolve
+        self._resolved = {}
+    
+    @classmethod
+    def from_records(cls, records):
+        """Build a snapshot from the records written by INVENTORY_SCRIPT."""
+        packages = []
+        for package in records:
+            users = package.get("Users")
+            if users is None:
+                package["Users"] = []
+            elif not isinstance(users, list):
+                package["Users"] = [users]
+            packages.append(package)
+        return cls(packages)
+    
+    def age(self):
+        """Seconds since the snapshot was taken."""
+        return time.monotonic() - self.taken_at
+    
+    def is_stale(self, max_age=INVENTORY_TTL):
+        """Check whether the snapshot is older than max_age seconds."""
+        return self.age() > max_age
+    
+    def find(self, app_name):
+        """Get packages whose Name or PackageFullName equals app_name."""
+        key = app_name.casefold()
+        packages = self.by_name.get(key)
+        if packages:
+            return list(packages)
+        package = self.by_full_name.get(key)
+        return [package] if package else []
+    
+    def find_by_family(self, family_name):
+        """Get packages belonging to a package family."""
+        return list(self.by_family.get(family_name.casefold(), []))
+    
+    def find_by_prefix(self, prefix):
+        """Get packages whose Name starts with prefix."""
+        return _find_by_prefix(self._sorted_names, self.by_name, prefix)
+    
+    def match(self, pattern):
+        """Get packages whose Name matches a PowerShell-style wildcard pattern.
+        
+        Plain names and trailing-* prefixes use the indexes; other patterns
+        fall back to a scan of the package names.
+        """
+        return _match(self._sorted_names, self.by_name, pattern, self.find)
+    
+    def is_installed(self, app_name):
+        """Check if an app is installed, matching the exact name."""
+        return bool(self.find(app_name))
+    
+    def is_system(self, app_name):
+        """Check if any package of an app is a framework, non-removable or signed as part of Windows."""
+        return any(package.get("IsFramework") or package.get("NonRemovable") or package.get("SignatureKind") == "System"
+                   for package in self.find(app_name))
+    
+    def resolve(self, app_name):
+        """Get the PackageFullNames installed under exactly this app name.
+        
+        Unlike a *name* wildcard this never picks up other packages whose
+        names contain app_name. Each name is resolved once per snapshot.
+        """
+        key = app_name.casefold()
+        full_names = self._resolved.get(key)
+        if full_names is None:
+            full_names = [package["PackageFullName"] for package in self.by_name.get(key, []) if package.get("PackageFullName")]
+            self._resolved[key] = full_names
+        return list(full_names)
+    
+    def is_broken(self, app_name):
+        """Check if an installed app has a package whose status is not Ok."""
+        return any(_is_broken(package) for package in self.find(app_name))
+
+def _is_broken(package):
+    """Check the Status of a package record (e.g. NeedsRemediation, Tampered)."""
+    status = package.get("Status")
+    return bool(status) and status != "Ok"
+
+def _find_by_prefix(sorted_names, index, prefix):
+    """Get the entries of a name index whose casefolded name starts with prefix."""
+    prefix = prefix.casefold()
+    start = bisect.bisect_left(sorted_names, prefix)
+    entries = []
+    for name in sorted_names[start:]:
+        if not name.startswith(prefix):
+            break
+        entries.extend(index[name])
+    return entries
+
+def _match(sorted_names, index, pattern, find):
+    """Get the entries of a name index matching a PowerShell-style wildcard pattern."""
+    if not any(c in pattern for c in "*?["):
+        return find(pattern)
+    head = pattern[:-1]
+    if pattern.endswith("*") and not any(c in head for c in "*?["):
+        return _find_by_prefix(sorted_names, index, head)
+    
+    pattern = pattern.casefold()
+    entries = []
+    for name in sorted_names:
+        if fnmatch.fnmatchcase(name, pattern):
+            entries.extend(index[name])
+    return entries
+
+# One enumeration of the provisioned packages, one result record per package
+PROVISIONED_SCRIPT = r"""
+Get-AppxProvisionedPackage -Online | ForEach-Object {
+    Write-Record @{
+        DisplayName = $_.DisplayName
+        PackageName = $_.PackageName
+        PackagePath = $_.PackagePath
+        Version = [string]$_.Version
+    }
+}
+"""
+
+class ProvisionedIndex:
+    """Snapshot of the provisioned (reinstallable) packages from one enumeration.
+    
+    Provisioned packages only change when Windows itself is updated, so one
+    snapshot serves the whole session. Names are matched case-insensitively.
+    """
+    def __init__(self, packages):
+        self.packages = packages
+        
+        # Indexes for exact lookups by DisplayName and PackageName
+        self.by_display_name = {}
+        self.by_package_name = {}
+        for package in packages:
+            display_name = (package.get("DisplayName") or "").casefold()
+            if display_name:
+                self.by_display_name.setdefault(display_name, []).append(package)
+            package_name = (package.get("PackageName") or "").casefold()
+            if package_name:
+                self.by_package_name[package_name] = package
+        
+        # Sorted display names for prefix lookups
+        self._sorted_names = sorted(self.by_display_name)
+    
+    def find(self, name):
+        """Get packages whose DisplayName or PackageName equals name."""
+        key = name.casefold()
+        packages = self.by_display_name.get(key)
+        if packages:
+            return list(packages)
+        package = self.by_package_name.get(key)
+        return [package] if package else []
+    
+    def find_by_prefix(self, prefix):
+        """Get packages whose DisplayName starts with prefix."""
+        return _find_by_prefix(self._sorted_names, self.by_display_name, prefix)
+    
+    def match(self, pattern):
+        """Get packages whose DisplayName matches a PowerShell-style wildcard pattern."""
+        return _match(self._sorted_names, self.by_display_name, pattern, self.find)
+    
+    def package_paths(self, pattern):
+        """Get the PackagePath of every package matching pattern."""
+        return [package["PackagePath"] for package in self.match(pattern) if package.get("PackagePath")]
+
+# Cheap enumeration for change detection: full names only, no user information
+FINGERPRINT_COMMAND = "Get-AppxPackage -AllUsers | ForEach-Object { $_.PackageFullName }"
+
+def load_fingerprint(timeout=None, retries=None):
+    """Take a cheap fingerprint of the installed packages.
+    
+    Args:
+        timeout (int): Timeout in seconds, or None for the adaptive timeout
+        retries (int): Retries after a transient failure, or None for the
+            class default
+    
+    Returns:
+        tuple: (fingerprint, installed_names) where fingerprint changes whenever
+               a package is added, removed or updated and installed_names is the
+               set of casefolded package names, or None if the query failed
+    """
+    success, output = run_powershell(FINGERPRINT_COMMAND, timeout=timeout, command_class="fingerprint", retries=retries)
+    if not success:
+        logging.error(f"Failed to fingerprint installed packages: {output}")
+        return None
+    full_names = sorted(line.strip().casefold() for line in output.splitlines() if line.strip())
+    fingerprint = hashlib.sha1("\n".join(full_names).encode("utf-8")).hexdigest()
+    
+    # Package names cannot contain "_", so the name is everything before the first one
+    installed_names = {full_name.split("_", 1)[0] for full_name in full_names}
+    return fingerprint, installed_names
+
+# Installed packages recorded before the first removal, for incremental
+# restores; kept in the data directory. It is never updated on its own, so
+# apps a feature update adds later don't count as defaults until
+# refresh_baseline() records the current packages instead.
+BASELINE_FILE = "package_baseline.json"
+
+def save_baseline(inventory, path=None):
+    """Record the installed packages as the baseline to restore to.
+    
+    Args:
+        inventory (AppInventory): Snapshot to record
+        path (str): Baseline file, or None for BASELINE_FILE in the data directory
+    
+    Returns:
+        bool: True if the baseline was written
+    """
+    try:
+        packages = {}
+        for package in inventory.packages:
+            if package.get("Name"):
+                packages[package["Name"]] = {
+                    "Name": package["Name"],
+                    "PackageFamilyName": package.get("PackageFamilyName"),
+                    "Version": package.get("Version")
+                }
+        baseline = {"taken": time.strftime("%Y-%m-%d %H:%M:%S"), "packages": sorted(packages.values(), key=lambda p: p["Name"])}
+        with open(path or data_path(BASELINE_FILE), "w") as f:
+            json.dump(baseline, f, indent=2)
+        logging.info(f"Package baseline recorded ({len(packages)} packages)")
+        return True
+    except Exception as e:
+        logging.error(f"Failed to record package baseline: {str(e)}")
+        return False
+
+def load_baseline(path=None):
+    """Read the recorded baseline.
+    
+    Args:
+        path (str): Baseline file, or None for BASELINE_FILE in the data directory
+    
+    Returns:
+        list: Package names in the baseline, or None if none is recorded
+    """
+    path = path or data_path(BASELINE_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            baseline = json.load(f)
+        return [package["Name"] for package in baseline.get("packages", [])]
+    except Exception as e:
+        logging.error(f"Failed to read package baseline: {str(e)}")
+        return None
+
+def ensure_baseline(path=None):
+    """Record a baseline from the current inventory unless one exists already.
+    
+    Call before removing apps, so incremental restores know what was there.
+    """
+    path = path or data_path(BASELINE_FILE)
+    if os.path.exists(path):
+        return
+    inventory = get_inventory()
+    if inventory is not None:
+        save_baseline(inventory, path)
+
+def refresh_baseline(path=None):
+    """Replace the baseline with the packages installed now.
+    
+    Use once the machine is in the state restores should return to, e.g.
+    after a feature update or after imaging.
+    
+    Args:
+        path (str): Baseline file, or None for BASELINE_FILE in the data directory
+    
+    Returns:
+        bool: True if the new baseline was written
+    """
+    invalidate_inventory()
+    inventory = get_inventory()
+    if inventory is None:
+        logging.error("Cannot refresh package baseline: package inventory unavailable")
+        return False
+    return save_baseline(inventory, path)
+
+# Shared snapshot and the lock that keeps concurrent refreshes to one enumeration
+_inventory = None
+_inventory_lock = threading.Lock()
+
+def load_inventory(timeout=None):
+    """Enumerate installed packages once and build a new snapshot.
+    
+    Returns:
+        AppInventory: The snapshot, or None if the enumeration failed
+    """
+    return _build_inventory(*run_record_script(INVENTORY_SCRIPT, timeout=timeout, command_class="inventory"))
+
+async def load_inventory_async(timeout=None):
+    """Async counterpart of load_inventory."""
+    return _build_inventory(*await run_record_script_async(INVENTORY_SCRIPT, timeout=timeout, command_class="inventory"))
+
+def _build_inventory(success, records, error):
+    """Build a snapshot from the enumeration records, or None if it failed.
+    
+    A partial enumeration is discarded: a missing package would read as
+    not installed.
+    """
+    if not success:
+        logging.error(f"Failed to enumerate installed packages: {error}")
+        return None
+    inventory = AppInventory.from_records(records)
+    logging.info(f"Package inventory refreshed ({len(inventory.packages)} packages)")
+    return inventory
+
+def get_inventory(max_age=INVENTORY_TTL, timeout=None):
+    """Get the shared inventory snapshot, refreshing it if it is too old.
+    
+    Args:
+        max_age (float): Maximum age in seconds of a reusable snapshot
+        timeout (int): Timeout in seconds for a refresh enumeration, or None
+            for the adaptive timeout
+    
+    Returns:
+        AppInventory: The snapshot, or None if it could not be built
+    """
+    global _inventory
+    with _inventory_lock:
+        if _inventory is None or _inventory.is_stale(max_age):
+            inventory = load_inventory(timeout)
+            if inventory is None:
+                return None
+            _inventory = inventory
+        return _inventory
+
+async def get_inventory_async(max_age=INVENTORY_TTL, timeout=None):
+    """Async counterpart of get_inventory.
+    
+    The enumeration is awaited without holding the lock, so two coroutines
+    refreshing at once may both enumerate; the newer snapshot wins.
+    """
+    global _inventory
+    inventory = _inventory
+    if inventory is not None and not inventory.is_stale(max_age):
+        return inventory
+    inventory = await load_inventory_async(timeout)
+    if inventory is not None:
+        with _inventory_lock:
+            _inventory = inventory
+    return inventory
+
+# Session-wide provisioned package index and the lock that keeps it to one enumeration
+_provisioned_index = None
+_provisioned_lock = threading.Lock()
+
+def get_provisioned_index(timeout=None):
+    """Get the provisioned package index, enumerating only on first use.
+    
+    Args:
+        timeout (int): Timeout in seconds for the enumeration, or None
+            for the adaptive timeout
+    
+    Returns:
+        ProvisionedIndex: The index, or None if it could not be built
+    """
+    global _provisioned_index
+    with _provisioned_lock:
+        if _provisioned_index is None:
+            success, records, error = run_record_script(PROVISIONED_SCRIPT, timeout=timeout, command_class="provisioned")
+            if not success:
+                logging.error(f"Failed to enumerate provisioned packages: {error}")
+                return None
+            _provisioned_index = ProvisionedIndex(records)
+            logging.info(f"Provisioned package index built ({len(records)} packages)")
+        return _provisioned_index
+
+def invalidate_provisioned_index():
+    """Drop the provisioned package index so the next lookup enumerates again."""
+    global _provisioned_index
+    with _provisioned_lock:
+        _provisioned_index = None
+
+def invalidate_inventory():
+    """Drop the shared snapshot so the next lookup enumerates again.
+    
+    Call after anything that adds or removes packages.
+    """
+    global _inventory
+    with _inventory_lock:
+        _inventory = None
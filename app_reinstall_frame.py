@@ -1,8 +1,9 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import messagebox
 import logging
-import threading
 from restore import get_available_apps_for_reinstall, reinstall_selected_apps
+from app_checklist import AppChecklist, install_status_detail
+from job_manager import get_job_manager, on_main_thread, PACKAGES_RESOURCE
 
 class AppReinstallFrame(tk.Frame):
     """Frame for selecting apps to reinstall"""
@@ -18,28 +19,43 @@ class AppReinstallFrame(tk.Frame):
         )
         self.title_label.pack(pady=10)
         
-        # Create a frame for the app list with scrollbar
-        self.list_frame = tk.Frame(self, bg="#d4d4d4")
-        self.list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        # App list; only the rows in view have widgets
+        self.app_list = AppChecklist(self)
+        self.app_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
-        # Scrollbar
-        self.scrollbar = tk.Scrollbar(self.list_frame)
-        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Add 'Select All' and 'Select Missing' buttons
+        buttons_frame = tk.Frame(self, bg="#d4d4d4", pady=5)
+        buttons_frame.pack(fill=tk.X, padx=15)
         
-        # Listbox-like container with checkboxes (using a Frame and Canvas for scrolling)
-        self.canvas = tk.Canvas(
-            self.list_frame, 
+        select_all_btn = tk.Button(
+            buttons_frame,
+            text="Select All",
+            command=self.select_all_apps,
+            relief=tk.GROOVE,
             bg="#d4d4d4",
-            highlightthickness=0,
-            yscrollcommand=self.scrollbar.set
+            font=("Arial", 9)
         )
-        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        select_all_btn.pack(side=tk.LEFT, padx=5)
         
-        self.scrollbar.config(command=self.canvas.yview)
+        select_missing_btn = tk.Button(
+            buttons_frame,
+            text="Select Missing",
+            command=self.select_missing_apps,
+            relief=tk.GROOVE,
+            bg="#d4d4d4",
+            font=("Arial", 9)
+        )
+        select_missing_btn.pack(side=tk.LEFT, padx=5)
         
-        # Frame inside canvas for checkboxes
-        self.checkbox_frame = tk.Frame(self.canvas, bg="#d4d4d4")
-        self.canvas_window = self.canvas.create_window((0, 0), window=self.checkbox_frame, anchor="nw")
+        clear_btn = tk.Button(
+            buttons_frame,
+            text="Clear All",
+            command=self.clear_selection,
+            relief=tk.GROOVE,
+            bg="#d4d4d4",
+            font=("Arial", 9)
+        )
+        clear_btn.pack(side=tk.LEFT, padx=5)
         
         # Status label
         self.status_label = tk.Label(
@@ -73,135 +89,51 @@ class AppReinstallFrame(tk.Frame):
         )
         self.reinstall_button.pack(pady=10)
         
-        # App checkboxes and variables
-        self.app_vars = {}
+        # App data by name
         self.available_apps = {}
         
-        # Bind canvas resize event
-        self.canvas.bind("<Configure>", self.on_canvas_configure)
-        
         # Schedule loading after the window is initialized
         self.after(100, self._start_load_thread)
     
-    def on_canvas_configure(self, event):
-        """Update scrollregion when canvas is resized"""
-        self.canvas.itemconfig(self.canvas_window, width=event.width)
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-    
     def _start_load_thread(self):
         """Start a thread to load app data"""
         # Disable reload button
         self.reload_button.config(state=tk.DISABLED)
         self.status_label.config(text="Loading available apps...")
         
-        # Start thread for loading data
-        threading.Thread(target=self._load_app_data).start()
+        # Load in the background; a reload while one is running joins it
+        get_job_manager().submit(
+            "reinstall_list",
+            get_available_apps_for_reinstall,
+            on_done=on_main_thread(self, self._load_app_data_complete)
+        )
     
-    def _load_app_data(self):
-        """Load app data in a background thread"""
-        try:
-            # Get available apps without touching the UI
-            apps = get_available_apps_for_reinstall()
-            
-            # Schedule UI update on main thread
-            self.after(0, lambda: self._update_ui_with_apps(apps))
-        except Exception as e:
-            logging.error(f"Error loading available apps: {str(e)}")
-            self.after(0, lambda e=e: self.status_label.config(
-                text=f"Error loading apps: {str(e)}")
-            )
-            self.after(0, lambda: self.reload_button.config(state=tk.NORMAL))
+    def _load_app_data_complete(self, job):
+        """Show the loaded apps or the load error (called on main thread)"""
+        if job.error is not None or job.cancelled:
+            error = job.error if job.error is not None else "cancelled"
+            logging.error(f"Error loading available apps: {str(error)}")
+            self.status_label.config(text=f"Error loading apps: {str(error)}")
+            self.reload_button.config(state=tk.NORMAL)
+            return
+        self._update_ui_with_apps(job.result)
     
     def _update_ui_with_apps(self, apps):
         """Update UI with loaded app data (called on main thread)"""
         try:
             self.available_apps = apps
             
-            # Clear existing checkboxes
-            for widget in self.checkbox_frame.winfo_children():
-                widget.destroy()
-            
-            # Re-create all app variables (on the main thread)
-            self.app_vars = {}
-            
-            # Create checkboxes for all apps
-            for app_name, app_info in self.available_apps.items():
-                var = tk.BooleanVar(value=False)
-                self.app_vars[app_name] = var
-                
-                # Get description
-                description = app_info["description"]
-                installed = app_info["installed"]
-                
-                # Create a frame for each app
-                app_frame = tk.Frame(self.checkbox_frame, bg="#d4d4d4", pady=2)
-                app_frame.pack(fill=tk.X, padx=5)
-                
-                # Create checkbox
-                checkbox = ttk.Checkbutton(
-                    app_frame,
-                    text=description,
-                    variable=var,
-                    style="TCheckbutton"
-                )
-                checkbox.pack(side=tk.LEFT)
-                
-                # Status label (installed or not)
-                status_color = "#008000" if installed else "#800000"  # Green if installed, red if not
-                status_text = "Installed" if installed else "Not Installed"
-                
-                status_label = tk.Label(
-                    app_frame,
-                    text=status_text,
-                    font=("Arial", 8),
-                    bg="#d4d4d4",
-                    fg=status_color
-                )
-                status_label.pack(side=tk.RIGHT, padx=5)
+            # Update the rows by name, keeping the user's selection
+            self.app_list.reconcile_rows([
+                dict(install_status_detail(app_info["installed"]), name=app_name, text=app_info["description"])
+                for app_name, app_info in self.available_apps.items()
+            ])
             
             # Update status
             app_count = len(self.available_apps)
             installed_count = sum(1 for app_info in self.available_apps.values() if app_info["installed"])
             
             self.status_label.config(text=f"Found {app_count} apps ({installed_count} installed)")
-            
-            # Add 'Select All' and 'Select Missing' buttons
-            buttons_frame = tk.Frame(self.checkbox_frame, bg="#d4d4d4", pady=5)
-            buttons_frame.pack(fill=tk.X, padx=5)
-            
-            select_all_btn = tk.Button(
-                buttons_frame,
-                text="Select All",
-                command=self.select_all_apps,
-                relief=tk.GROOVE,
-                bg="#d4d4d4",
-                font=("Arial", 9)
-            )
-            select_all_btn.pack(side=tk.LEFT, padx=5)
-            
-            select_missing_btn = tk.Button(
-                buttons_frame,
-                text="Select Missing",
-                command=self.select_missing_apps,
-                relief=tk.GROOVE,
-                bg="#d4d4d4",
-                font=("Arial", 9)
-            )
-            select_missing_btn.pack(side=tk.LEFT, padx=5)
-            
-            clear_btn = tk.Button(
-                buttons_frame,
-                text="Clear All",
-                command=self.clear_selection,
-                relief=tk.GROOVE,
-                bg="#d4d4d4",
-                font=("Arial", 9)
-            )
-            clear_btn.pack(side=tk.LEFT, padx=5)
-            
-            # Update scrollregion after all checkboxes are added
-            self.checkbox_frame.update_idletasks()
-            self.canvas.config(scrollregion=self.canvas.bbox("all"))
         except Exception as e:
             logging.error(f"Error updating UI with apps: {str(e)}")
             self.status_label.config(text=f"Error: {str(e)}")
@@ -211,24 +143,21 @@ class AppReinstallFrame(tk.Frame):
     
     def select_all_apps(self):
         """Select all apps"""
-        for var in self.app_vars.values():
-            var.set(True)
+        self.app_list.select_all()
     
     def select_missing_apps(self):
         """Select only missing apps"""
-        for app_name, var in self.app_vars.items():
-            # Select if app is not installed
-            var.set(not self.available_apps[app_name]["installed"])
+        # Select if app is not installed
+        self.app_list.select_where(lambda row: not self.available_apps[row["name"]]["installed"])
     
     def clear_selection(self):
         """Clear all selections"""
-        for var in self.app_vars.values():
-            var.set(False)
+        self.app_list.clear_selection()
     
     def reinstall_selected(self):
         """Reinstall selected apps"""
         # Get list of selected apps
-        selected_apps = [app for app, var in self.app_vars.items() if var.get()]
+        selected_apps = self.app_list.selected_names()
         
         if not selected_apps:
             messagebox.showinfo("No Selection", "No apps were selected for reinstallation.")
@@ -247,41 +176,47 @@ class AppReinstallFrame(tk.Frame):
             self.reinstall_button.config(state=tk.DISABLED)
             self.reload_button.config(state=tk.DISABLED)
             
-            # Start reinstallation in a separate thread
-            threading.Thread(target=lambda: self._perform_reinstall(selected_apps)).start()
+            # Reinstall in the background; the same selection submitted again joins this run
+            # and other package changes wait for it. Keyed apart from the main window's
+            # reinstall, which also makes a restore point
+            get_job_manager().submit(
+                f"reinstall_only:{','.join(sorted(selected_apps))}",
+                reinstall_selected_apps,
+                selected_apps,
+                on_done=on_main_thread(self, self._reinstall_complete),
+                resource=PACKAGES_RESOURCE
+            )
     
-    def _perform_reinstall(self, selected_apps):
-        """Perform the actual reinstall in a separate thread"""
-        try:
-            # Call the reinstall function
-            success_count, failed_count = reinstall_selected_apps(selected_apps)
-            
-            # Show success message (needs to be run on the main thread)
-            self.after(0, lambda: messagebox.showinfo(
-                "Reinstall Complete",
-                f"Successfully reinstalled {success_count} app(s).\n"
-                f"Failed to reinstall {failed_count} app(s)."
-            ))
-            
-            # Reload app list to show updated status
-            self.after(0, self._start_load_thread)
-                    
-        except Exception as e:
+    def _reinstall_complete(self, job):
+        """Handle completion of the reinstall (called on main thread)"""
+        if job.error is not None or job.cancelled:
+            error = job.error if job.error is not None else "cancelled"
             # Log the error
-            logging.error(f"Error reinstalling apps: {str(e)}")
+            logging.error(f"Error reinstalling apps: {str(error)}")
             
             # Show error message
-            self.after(0, lambda: messagebox.showerror(
+            messagebox.showerror(
                 "Error",
-                f"An error occurred while reinstalling apps:\n{str(e)}"
-            ))
+                f"An error occurred while reinstalling apps:\n{str(error)}"
+            )
             
             # Re-enable buttons
-            self.after(0, lambda: self.status_label.config(text="Reinstall failed. Try again."))
-            self.after(0, lambda: self.reinstall_button.config(state=tk.NORMAL))
-            self.after(0, lambda: self.reload_button.config(state=tk.NORMAL))
-        else:
-            # Re-enable buttons
-            self.after(0, lambda: self.status_label.config(text="Reinstall complete. Refresh list to see updates."))
-            self.after(0, lambda: self.reinstall_button.config(state=tk.NORMAL))
-            self.after(0, lambda: self.reload_button.config(state=tk.NORMAL))
\ No newline at end of file
+            self.status_label.config(text="Reinstall failed. Try again.")
+            self.reinstall_button.config(state=tk.NORMAL)
+            self.reload_button.config(state=tk.NORMAL)
+            return
+        
+        success_count, failed_count = job.result
+        messagebox.showinfo(
+            "Reinstall Complete",
+            f"Successfully reinstalled {success_count} app(s).\n"
+            f"Failed to reinstall {failed_count} app(s)."
+        )
+        
+        # Reload app list to show updated status
+        self._start_load_thread()
+        
+        # Re-enable buttons
+        self.status_label.config(text="Reinstall complete. Refresh list to see updates.")
+        self.reinstall_button.config(state=tk.NORMAL)
+        self.reload_button.config(state=tk.NORMAL)
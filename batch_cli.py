@@ -0,0 +1,367 @@
+"""Unattended debloating for imaging pipelines and lab machines.
+
+Runs a selection profile without prompting and writes a JSON result:
+
+    python batch_cli.py --profile lab.json --output result.json
+    python batch_cli.py --remove Microsoft.BingNews Microsoft.ZuneMusic --no-restore-point
+    python batch_cli.py --unused-days 180 --dry-run
+    python batch_cli.py --profile lab.json --metrics-prom debloat.prom
+
+A profile file is a JSON object with any of these keys; command line options
+override it:
+
+    {
+        "remove": ["Microsoft.BingNews"],
+        "remove_unneeded": false,
+        "unused_days": 180,
+        "unused_include_unknown": false,
+        "restore_point": true,
+        "reinstall": ["Microsoft.WindowsCalculator"],
+        "resume": false,
+        "refresh_baseline": false,
+        "dry_run": false
+    }
+
+Apps picked by "unused_days" never include protected catalog apps (the
+Store, App Installer, Windows Security) or framework, non-removable and
+system-signed packages, and apps with no recorded use at all
+are left alone unless "unused_include_unknown" (or --include-unknown-usage) is
+set; the apps left out are listed under steps.unused_scan.skipped.
+
+With "resume" (or --resume), removals and reinstalls that an earlier run left
+unfinished are completed first, running only their pending steps.
+
+Restores compare against a baseline of the packages recorded before the first
+removal, which is never updated on its own. "refresh_baseline" (or
+--refresh-baseline) records the packages installed now as the new baseline
+before any other step, e.g. right after imaging or a feature update.
+
+The exit code is 0 when every step succeeded, 1 when some app failed and 2
+when the profile is invalid or the process lacks administrator privileges.
+"""
+import argparse
+import atexit
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from powershell_utils import is_admin, enable_session_pool, disable_session_pool, export_metrics
+from app_actions import CATALOG, UNNEEDED_APPS, remove_apps_batch, disable_copilot
+from app_inventory import get_inventory, refresh_baseline
+from restore import create_restore_point, reinstall_apps_batch
+from unused_apps import get_unused_apps
+from operation_journal import get_journal, resume_interrupted
+
+# Profile keys and their defaults
+DEFAULT_PROFILE = {
+    "remove": [],
+    "remove_unneeded": False,
+    "unused_days": None,
+    "unused_include_unknown": False,
+    "restore_point": True,
+    "reinstall": [],
+    "resume": False,
+    "refresh_baseline": False,
+    "dry_run": False
+}
+
+def read_profile(path):
+    """Read a profile file.
+    
+    Args:
+        path (str): Path to a JSON profile
+    
+    Returns:
+        dict: The keys set in the file
+    
+    Raises:
+        ValueError: If the file is not a JSON object
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path} is not valid JSON: {e}")
+    if not isinstance(data, dict):
+        raise ValueError("A profile must be a JSON object")
+    return data
+
+def validate_profile(data):
+    """Check a profile's keys and types and fill in the defaults.
+    
+    Raises:
+        ValueError: If a key is unknown or has the wrong type
+    """
+    if not isinstance(data, dict):
+        raise ValueError("A profile must be a JSON object")
+    unknown = sorted(set(data) - set(DEFAULT_PROFILE))
+    if unknown:
+        raise ValueError(f"Unknown profile keys: {', '.join(unknown)}")
+    
+    profile = dict(DEFAULT_PROFILE, **data)
+    for key in ("remove", "reinstall"):
+        if not isinstance(profile[key], list) or not all(isinstance(name, str) for name in profile[key]):
+            raise ValueError(f"'{key}' must be a list of app names")
+    for key in ("remove_unneeded", "unused_include_unknown", "restore_point", "resume", "refresh_baseline", "dry_run"):
+        if not isinstance(profile[key], bool):
+            raise ValueError(f"'{key}' must be true or false")
+    days = profile["unused_days"]
+    if days is not None and (isinstance(days, bool) or not isinstance(days, int) or days < 1):
+        raise ValueError("'unused_days' must be a positive whole number of days or null")
+    return profile
+
+def run_profile(profile):
+    """Run a profile's steps in order: baseline, resume, restore point, removal, reinstall.
+    
+    Args:
+        profile (dict): A validated profile
+    
+    Returns:
+        dict: Machine-readable result with "ok", per-step "seconds" and
+              per-app "status" entries
+    """
+    started = time.perf_counter()
+    result = {
+        "profile": profile,
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "admin": is_admin(),
+        "steps": {},
+        "apps": {}
+    }
+    
+    if not result["admin"] and not profile["dry_run"]:
+        result["ok"] = False
+        result["error"] = "Administrator privileges are required"
+        result["seconds"] = time.perf_counter() - started
+        return result
+    
+    # Work out the apps to remove: listed, predefined and unused ones
+    to_remove = list(profile["remove"])
+    if profile["remove_unneeded"]:
+        to_remove += UNNEEDED_APPS
+    if profile["unused_days"] is not None and not result["admin"]:
+        # Usage data needs admin rights; don't prompt for elevation unattended
+        result["steps"]["unused_scan"] = {"seconds": 0.0, "error": "Administrator privileges are required"}
+    elif profile["unused_days"] is not None:
+        step = _timed(result, "unused_scan", lambda: get_unused_apps(profile["unused_days"], max_age=0))
+        unused = step.pop("value")
+        if isinstance(unused, dict):
+            step["error"] = unused.get("error", "Scan failed")
+        else:
+            step["found"], step["skipped"] = select_unused(unused, get_inventory(), profile["unused_include_unknown"])
+            to_remove += step["found"]
+    to_remove = list(dict.fromkeys(to_remove))
+    reinstall = [app_name for app_name in dict.fromkeys(profile["reinstall"]) if app_name not in to_remove]
+    
+    if profile["dry_run"]:
+        _plan_dry_run(result, to_remove, reinstall)
+    else:
+        _apply(result, profile, to_remove, reinstall)
+    
+    result["ok"] = (all(app["status"] != "failed" for app in result["apps"].values())
+                    and not any("error" in step for step in result["steps"].values()))
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+def select_unused(unused, inventory, include_unknown=False):
+    """Pick the unused apps that may be removed without anyone reviewing the list.
+    
+    Apps the catalog protects are skipped, and so are framework,
+    non-removable and system-signed packages, which other apps depend on
+    whatever their own usage. Without an inventory to check that against
+    nothing is picked.
+    
+    Args:
+        unused (list): Records from get_unused_apps
+        inventory (AppInventory): Installed packages, or None if they could
+            not be listed
+        include_unknown (bool): Also take apps no source recorded any use of
+    
+    Returns:
+        tuple: (names to remove, skipped) where skipped is a list of
+               {"name", "reason"} with reason "protected", "system",
+               "unverified" or "unknown_usage"
+    """
+    found = []
+    skipped = []
+    for app in unused:
+        if CATALOG.is_protected(app["name"]):
+            skipped.append({"name": app["name"], "reason": "protected"})
+        elif inventory is None:
+            skipped.append({"name": app["name"], "reason": "unverified"})
+        elif inventory.is_system(app["name"]):
+            skipped.append({"name": app["name"], "reason": "system"})
+        elif not app.get("usage_known", True) and not include_unknown:
+            skipped.append({"name": app["name"], "reason": "unknown_usage"})
+        else:
+            found.append(app["name"])
+    return found, skipped
+
+def _apply(result, profile, to_remove, reinstall):
+    """Refresh the baseline, resume interrupted work, create the restore point, then run the batch removal and reinstall"""
+    if profile["refresh_baseline"]:
+        step = _timed(result, "refresh_baseline", refresh_baseline)
+        if not step.pop("value"):
+            step["error"] = "Could not record the package baseline"
+    
+    if profile["resume"]:
+        step = _timed(result, "resume", resume_interrupted)
+        for kind, outcomes in step.pop("value").items():
+            for app_name, outcome in outcomes.items():
+                if kind == "remove":
+                    status = "removed" if outcome["removed"] else "failed"
+                else:
+                    status = "reinstalled" if outcome["installed"] else "failed"
+                result["apps"][app_name] = {"action": f"resume_{kind}", "status": status, "error": outcome["error"]}
+    
+    if profile["restore_point"] and (to_remove or reinstall):
+        step = _timed(result, "restore_point", create_restore_point)
+        if not step.pop("value"):
+            step["error"] = "Could not create a restore point"
+    
+    if to_remove:
+        step = _timed(result, "remove", lambda: remove_apps_batch(to_remove))
+        for app_name, outcome in step.pop("value").items():
+            result["apps"][app_name] = {
+                "action": "remove",
+                "status": "removed" if outcome["removed"] else "failed",
+                "error": outcome["error"],
+                "registry_keys": outcome["registry_keys"]
+            }
+        if profile["remove_unneeded"] or "Microsoft.Copilot" in to_remove:
+            step = _timed(result, "disable_copilot", disable_copilot)
+            if not step.pop("value"):
+                step["error"] = "Could not disable Copilot"
+    
+    if reinstall:
+        step = _timed(result, "reinstall", lambda: reinstall_apps_batch(reinstall))
+        for app_name, outcome in step.pop("value").items():
+            if outcome["installed"]:
+                status = "already_installed" if outcome["was_installed"] and not outcome["method"] else "reinstalled"
+            else:
+                status = "failed"
+            result["apps"][app_name] = {
+                "action": "reinstall",
+                "status": status,
+                "method": outcome["method"],
+                "error": outcome["error"]
+            }
+
+def _plan_dry_run(result, to_remove, reinstall):
+    """Record what the profile would change, from one package enumeration"""
+    if result["profile"]["resume"]:
+        result["interrupted"] = [
+            {"kind": op["kind"], "pending": list(op["pending"])} for op in get_journal().interrupted()
+        ]
+    step = _timed(result, "inventory", get_inventory)
+    inventory = step.pop("value")
+    if inventory is None:
+        step["error"] = "Could not enumerate installed packages"
+        return
+    for app_name in to_remove:
+        installed = inventory.is_installed(app_name)
+        result["apps"][app_name] = {"action": "remove", "status": "would_remove" if installed else "not_installed"}
+    for app_name in reinstall:
+        installed = inventory.is_installed(app_name)
+        result["apps"][app_name] = {"action": "reinstall", "status": "already_installed" if installed else "would_reinstall"}
+
+def _timed(result, name, func):
+    """Run one step and record its wall time; the return value is under "value"."""
+    started = time.perf_counter()
+    value = func()
+    step = {"seconds": time.perf_counter() - started, "value": value}
+    result["steps"][name] = step
+    return step
+
+def build_profile(args):
+    """Combine the profile file (if any) with the command line options."""
+    data = read_profile(args.profile) if args.profile else {}
+    if args.remove is not None:
+        data["remove"] = args.remove
+    if args.remove_unneeded:
+        data["remove_unneeded"] = True
+    if args.unused_days is not None:
+        data["unused_days"] = args.unused_days
+    if args.include_unknown_usage:
+        data["unused_include_unknown"] = True
+    if args.no_restore_point:
+        data["restore_point"] = False
+    if args.reinstall is not None:
+        data["reinstall"] = args.reinstall
+    if args.resume:
+        data["resume"] = True
+    if args.refresh_baseline:
+        data["refresh_baseline"] = True
+    if args.dry_run:
+        data["dry_run"] = True
+    return validate_profile(data)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove or reinstall apps without prompting and report the result as JSON")
+    parser.add_argument("--profile", metavar="PATH", help="JSON selection profile")
+    parser.add_argument("--remove", nargs="*", metavar="APP", help="App package names to remove")
+    parser.add_argument("--remove-unneeded", action="store_true", help="Also remove every predefined unneeded app")
+    parser.add_argument("--unused-days", type=int, metavar="DAYS", help="Also remove apps unused for this many days")
+    parser.add_argument("--include-unknown-usage", action="store_true",
+                        help="With --unused-days, also remove apps that have no recorded use")
+    parser.add_argument("--no-restore-point", action="store_true", help="Skip creating a restore point")
+    parser.add_argument("--reinstall", nargs="*", metavar="APP", help="App package names to reinstall")
+    parser.add_argument("--resume", action="store_true", help="First finish work an interrupted run left pending")
+    parser.add_argument("--refresh-baseline", action="store_true", help="Record the installed packages as the baseline restores return to")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    parser.add_argument("--output", metavar="PATH", help="Write the JSON result here instead of to stdout")
+    parser.add_argument("--metrics", metavar="PATH", help="Write PowerShell call metrics here as JSON")
+    parser.add_argument("--metrics-prom", metavar="PATH", help="Write PowerShell call metrics here in the Prometheus text format")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        filename='bloatware_remover.log',
+        filemode='a'
+    )
+    
+    try:
+        profile = build_profile(args)
+    except (OSError, ValueError) as e:
+        result = {"ok": False, "error": f"Invalid profile: {str(e)}"}
+        exit_code = 2
+    else:
+        # Keep PowerShell hosts warm instead of starting one per command
+        if os.name == 'nt':
+            enable_session_pool()
+            atexit.register(disable_session_pool)
+        
+        # The app functions print progress for the interactive CLI; keep stdout for the JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            try:
+                result = run_profile(profile)
+            except Exception as e:
+                logging.error(f"Error running batch profile: {str(e)}")
+                result = {"profile": profile, "ok": False, "error": str(e)}
+        if result["ok"]:
+            exit_code = 0
+        elif "error" in result:
+            exit_code = 2
+        else:
+            exit_code = 1
+    
+    if args.metrics or args.metrics_prom:
+        try:
+            export_metrics(args.metrics, args.metrics_prom)
+        except OSError as e:
+            logging.error(f"Could not write metrics: {str(e)}")
+    
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
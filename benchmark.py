@@ -0,0 +1,166 @@
+"""Benchmark the app's PowerShell pipelines against the simulated backend.
+
+Runs each scenario on simulated machines of several sizes and reports the wall
+time and the number of PowerShell commands issued:
+
+    python benchmark.py
+    python benchmark.py --sizes 30 300 --repeat 5 --json results.json
+
+Simulated latencies are scaled by --time-scale, so the wall times compare runs
+of this script with each other, not with a real Windows machine.
+"""
+from powershell_utils import set_command_runner
+from app_data import DATA_DIR_ENV
+from command_policy import get_latency_history
+from fake_powershell import FakePowerShell
+from app_inventory import invalidate_inventory
+from app_actions import APPS, remove_selected_apps
+from restore import reinstall_selected_apps, get_available_apps_for_reinstall
+from unused_apps import get_unused_apps, invalidate_app_usage
+from status_poller import StatusPoller
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+DEFAULT_SIZES = (30, 300, 3000)
+
+# Number of apps removed and then reinstalled in each run
+SELECTION_SIZE = 20
+
+class _HeadlessRoot:
+    """Just enough of a Tk root for StatusPoller: callbacks run when flushed."""
+    def __init__(self):
+        self.pending = []
+    
+    def after(self, delay, callback):
+        self.pending.append(callback)
+        return len(self.pending)
+    
+    def after_cancel(self, after_id):
+        pass
+    
+    def state(self):
+        return "normal"
+    
+    def flush(self):
+        while self.pending:
+            self.pending.pop(0)()
+
+def _poll_statuses():
+    """One status poll over the reinstall list, as the GUI would run it."""
+    root = _HeadlessRoot()
+    statuses = {app_name: True for app_name in APPS}
+    changed = []
+    poller = StatusPoller(root, lambda: statuses, lambda app_name, installed: changed.append(app_name))
+    poller._check(statuses)
+    root.flush()
+    return changed
+
+def _scenarios(selection):
+    """Scenarios in the order they run; removal comes before reinstall."""
+    return [
+        ("get_available_apps_for_reinstall", get_available_apps_for_reinstall),
+        ("get_unused_apps", lambda: get_unused_apps(90, max_age=0)),
+        ("status_poll", _poll_statuses),
+        ("remove_selected_apps", lambda: remove_selected_apps(selection)),
+        ("reinstall_selected_apps", lambda: reinstall_selected_apps(selection)),
+    ]
+
+def run_benchmark(sizes=DEFAULT_SIZES, repeat=3, time_scale=0.001):
+    """Time every scenario on simulated machines of the given sizes.
+    
+    Args:
+        sizes (iterable): Package counts to simulate
+        repeat (int): Runs per size; the median wall time is reported
+        time_scale (float): Real seconds slept per simulated second
+    
+    Returns:
+        list: One dict per size and scenario with "packages", "scenario",
+              "wall_seconds" (median), "commands" and "command_kinds"
+    """
+    results = []
+    for size in sizes:
+        timings = {}
+        for _ in range(repeat):
+            fake = FakePowerShell(package_count=size, time_scale=time_scale)
+            previous = set_command_runner(fake)
+            try:
+                invalidate_inventory()
+                invalidate_app_usage()
+                selection = [name for name in APPS if name.casefold() in fake.installed][:SELECTION_SIZE]
+                for name, scenario in _scenarios(selection):
+                    fake.reset_calls()
+                    started = time.perf_counter()
+                    # The app functions print progress for the CLI
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        scenario()
+                    elapsed = time.perf_counter() - started
+                    timings.setdefault(name, []).append((elapsed, fake.call_counts()))
+            finally:
+                set_command_runner(previous)
+        
+        for name, runs in timings.items():
+            counts = runs[-1][1]
+            results.append({
+                "packages": size,
+                "scenario": name,
+                "wall_seconds": statistics.median(elapsed for elapsed, _ in runs),
+                "commands": sum(counts.values()),
+                "command_kinds": counts
+            })
+    return results
+
+def print_results(results):
+    """Print the results as a table."""
+    print(f"{'packages':>8}  {'scenario':<34}{'wall (s)':>10}{'commands':>10}")
+    for result in results:
+        print(f"{result['packages']:>8}  {result['scenario']:<34}{result['wall_seconds']:>10.3f}{result['commands']:>10}")
+
+@contextlib.contextmanager
+def _temporary_data_dir():
+    """Point the state files (baseline, journal, latency history) at a temporary directory.
+    
+    The simulated machines would otherwise record their fake packages as the
+    baseline, leave interrupted operations to resume and feed millisecond
+    latencies into the real adaptive timeouts.
+    """
+    previous = os.environ.get(DATA_DIR_ENV)
+    with tempfile.TemporaryDirectory(prefix="debloater-benchmark-") as path:
+        os.environ[DATA_DIR_ENV] = path
+        try:
+            yield path
+        finally:
+            # Write the pending samples now, so the save at exit has nothing
+            # left to write into the removed directory
+            get_latency_history().save()
+            if previous is None:
+                del os.environ[DATA_DIR_ENV]
+            else:
+                os.environ[DATA_DIR_ENV] = previous
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PowerShell pipelines against a simulated backend")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Package counts to simulate")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size")
+    parser.add_argument("--time-scale", type=float, default=0.001, help="Real seconds slept per simulated second")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results to a JSON file")
+    args = parser.parse_args()
+    
+    # Keep the app's own logging out of the timings
+    logging.disable(logging.CRITICAL)
+    
+    with _temporary_data_dir():
+        results = run_benchmark(args.sizes, args.repeat, args.time_scale)
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
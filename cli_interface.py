@@ -1,12 +1,13 @@
 import sys
 import logging
 import os
+import atexit
 from app_actions import remove_unneeded_apps, remove_selected_apps
 from selection import choose_selected_apps, choose_apps_to_reinstall
-from restore import create_restore_point, restore_defaults
-from powershell_utils import ensure_admin, run_powershell
-import json
-from datetime import datetime, timedelta
+from restore import create_restore_point, restore_defaults, plan_restore_defaults
+from powershell_utils import ensure_admin, enable_session_pool, disable_session_pool
+from unused_apps import get_unused_apps, invalidate_app_usage
+from operation_journal import get_journal, describe_interrupted, resume_interrupted
 
 # Setup logging
 try:
@@ -23,205 +24,10 @@ except Exception as e:
     print(f"Error setting up logging: {e}")
     # Continue anyway - the app can work without logging
 
-def get_unused_apps(days_threshold=90):
-    """
-    Get list of installed apps that haven't been used for a specified number of days.
-    
-    Args:
-        days_threshold (int): Number of days to consider an app as "unused"
-        
-    Returns:
-        list: List of dictionaries containing app info for unused apps
-    """
-    try:
-        logging.info(f"Scanning for apps unused for {days_threshold} days")
-        
-        # Check for admin privileges (needed to access usage data)
-        if not ensure_admin():
-            logging.warning("Admin privileges required to scan app usage data")
-            return {"error": "Admin privileges required"}
-        
-        # PowerShell command to get installed apps with their package info
-        # We'll get installed modern apps and then check usage data for them
-        ps_cmd = """
-        # Get installed apps
-        $installedApps = Get-AppxPackage -AllUsers | Select-Object Name, PackageFamilyName, DisplayName
-        
-        # Convert to JSON
-        $installedApps | ConvertTo-Json
-        """
-        
-        success, output = run_powershell(ps_cmd)
-        if not success or not output:
-            logging.error("Failed to get installed apps")
-            return {"error": "Failed to get installed apps"}
-        
-        # Parse the installed apps
-        installed_apps = json.loads(output)
-        
-        # If we just got one app, make sure we have a list
-        if isinstance(installed_apps, dict):
-            installed_apps = [installed_apps]
-        
-        # Now get app usage data from the registry
-        ps_cmd_usage = """
-        # Get app usage data from registry
-        $usageData = Get-ItemProperty -Path "HKCU:\\Software\\Microsoft\\Windows\\CurrentVersion\\Search\\RecentApps\\*" | 
-            Select-Object PSChildName, LastAccessedTime, AppId, LaunchCount
-                
-        # Convert to JSON
-        $usageData | ConvertTo-Json
-        """
-        
-        success, usage_output = run_powershell(ps_cmd_usage)
-        
-        # Create a dictionary to hold usage data, keyed by app ID
-        usage_data = {}
-        current_date = datetime.now()
-        
-        if success and usage_output:
-            try:
-                usage_items = json.loads(usage_output)
-                
-                # Handle case of single item
-                if isinstance(usage_items, dict):
-                    usage_items = [usage_items]
-                
-                # Process usage data
-                for item in usage_items:
-                    if item and "AppId" in item and "LastAccessedTime" in item:
-                        app_id = item["AppId"]
-                        last_accessed = item["LastAccessedTime"]
-                        
-                        # Parse the filetime format if it exists
-                        if last_accessed:
-                            # Convert filetime to datetime
-                            try:
-                                # Parse 18-digit filetime if that's the format
-                                if isinstance(last_accessed, int) or (isinstance(last_accessed, str) and last_accessed.isdigit() and len(last_accessed) >= 18):
-                                    filetime = int(last_accessed)
-                                    # Convert Windows filetime to Python datetime (minus 11644473600 seconds for Unix epoch difference)
-                                    seconds_since_epoch = filetime / 10000000 - 11644473600
-                                    last_date = datetime.fromtimestamp(seconds_since_epoch)
-                                else:
-                                    # Try to parse as a date string
-                                    last_date = datetime.fromisoformat(last_accessed.replace('Z', '+00:00'))
-                                
-                                days_since_used = (current_date - last_date).days
-                                usage_data[app_id] = {
-                                    "last_used": last_date.strftime("%Y-%m-%d %H:%M:%S"),
-                                    "days_since_used": days_since_used,
-                                    "launch_count": item.get("LaunchCount", 0)
-                                }
-                            except Exception as e:
-                                logging.warning(f"Couldn't parse date for {app_id}: {e}")
-            except Exception as e:
-                logging.error(f"Error processing usage data: {str(e)}")
-                # Continue with what we have
-        
-        # Get additional app usage data from Timeline (Activity History)
-        ps_cmd_timeline = """
-        # Get app usage data from Activity History
-        try {
-            $activities = Get-WinEvent -LogName "Microsoft-Windows-Application-Experience/Program-Inventory" -MaxEvents 1000 -ErrorAction SilentlyContinue |
-                Where-Object { $_.Id -eq 500 -or $_.Id -eq 501 } |
-                Select-Object TimeCreated, Message
-                
-            $activities | ConvertTo-Json
-        } catch {
-            Write-Output "[]"
-        }
-        """
-        
-        success, timeline_output = run_powershell(ps_cmd_timeline)
-        
-        if success and timeline_output and timeline_output != "[]":
-            try:
-                timeline_items = json.loads(timeline_output)
-                
-                # Handle case of single item
-                if isinstance(timeline_items, dict):
-                    timeline_items = [timeline_items]
-                
-                # Process timeline data
-                for item in timeline_items:
-                    if item and "Message" in item and "TimeCreated" in item:
-                        # Extract app info from message
-                        message = item["Message"]
-                        if "Application Id=" in message:
-                            app_id = message.split("Application Id=")[1].split(",")[0].strip()
-                            time_created = item["TimeCreated"]
-                            
-                            # Parse the date if it exists
-                            if time_created:
-                                try:
-                                    last_date = datetime.fromisoformat(time_created.replace('Z', '+00:00'))
-                                    days_since_used = (current_date - last_date).days
-                                    
-                                    # Only update if this is more recent than existing data
-                                    if app_id not in usage_data or days_since_used < usage_data[app_id]["days_since_used"]:
-                                        usage_data[app_id] = {
-                                            "last_used": last_date.strftime("%Y-%m-%d %H:%M:%S"),
-                                            "days_since_used": days_since_used,
-                                            "launch_count": 1  # We don't have this info from timeline
-                                        }
-                                except Exception as e:
-                                    logging.warning(f"Couldn't parse timeline date for {app_id}: {e}")
-            except Exception as e:
-                logging.error(f"Error processing timeline data: {str(e)}")
-                # Continue with what we have
-        
-        # Match usage data with installed apps
-        unused_apps = []
-        
-        for app in installed_apps:
-            # Skip system apps and framework packages
-            if not app.get("Name") or "framework" in app.get("Name", "").lower():
-                continue
-                
-            app_name = app.get("Name", "")
-            display_name = app.get("DisplayName", app_name)
-            
-            # Check if we have usage data for this app
-            app_id_to_check = f"App\\{app.get('PackageFamilyName', '')}"
-            
-            if app_id_to_check in usage_data:
-                days_since_used = usage_data[app_id_to_check]["days_since_used"]
-                
-                # If app hasn't been used in threshold days, add to unused_apps
-                if days_since_used >= days_threshold:
-                    unused_apps.append({
-                        "name": app_name,
-                        "display_name": display_name,
-                        "days_since_used": days_since_used,
-                        "last_used": usage_data[app_id_to_check]["last_used"],
-                        "launch_count": usage_data[app_id_to_check].get("launch_count", 0)
-                    })
-            else:
-                # No usage data found, likely never used or usage not tracked
-                # We'll consider it unused for our purposes
-                unused_apps.append({
-                    "name": app_name,
-                    "display_name": display_name,
-                    "days_since_used": days_threshold,  # Set to threshold as minimum
-                    "last_used": "Never or unknown",
-                    "launch_count": 0
-                })
-        
-        # Sort by days since used (most unused first)
-        unused_apps.sort(key=lambda x: x["days_since_used"], reverse=True)
-        
-        logging.info(f"Found {len(unused_apps)} apps unused for {days_threshold}+ days")
-        return unused_apps
-        
-    except Exception as e:
-        logging.error(f"Error in get_unused_apps: {str(e)}")
-        return {"error": f"Error scanning for unused apps: {str(e)}"}
-
-def show_unused_apps():
-    """Display and manage apps that haven't been used in the last 90 days."""
+def show_unused_apps(days_threshold=90):
+    """Display and manage apps that haven't been used in the last days_threshold days."""
     try:
-        print("\nScanning for apps that haven't been used in the last 90 days...")
+        print(f"\nScanning for apps that haven't been used in the last {days_threshold} days...")
         
         # Check for admin privileges
         if not ensure_admin():
@@ -229,28 +35,39 @@ def show_unused_apps():
             logging.warning("Scanning for unused apps requires administrator privileges")
             return
         
-        # Get unused apps
-        unused_apps = get_unused_apps(days_threshold=90)
-        
-        # Check for error
-        if isinstance(unused_apps, dict) and "error" in unused_apps:
-            print(f"Error: {unused_apps['error']}")
-            return
+        while True:
+            # Get unused apps (a different threshold re-filters the last scan)
+            unused_apps = get_unused_apps(days_threshold=days_threshold)
+            
+            # Check for error
+            if isinstance(unused_apps, dict) and "error" in unused_apps:
+                print(f"Error: {unused_apps['error']}")
+                return
+            
+            # Display the results
+            if not unused_apps:
+                print(f"No apps found that haven't been used in the last {days_threshold} days.")
+            else:
+                print(f"\nFound {len(unused_apps)} apps that haven't been used in the last {days_threshold} days:\n")
+                
+                # Display app list with indices
+                for i, app in enumerate(unused_apps, start=1):
+                    display_name = app.get("display_name", app["name"])
+                    days = app.get("days_since_used", "Unknown")
+                    last_used = app.get("last_used", "Unknown")
+                    print(f"{i}. {display_name} ({app['name']}) - Last used: {last_used} ({days} days ago)")
+            
+            days = input("\nPress Enter to continue or enter a different number of days: ").strip()
+            if not days:
+                break
+            if not days.isdigit():
+                print("Please enter a whole number of days.")
+                continue
+            days_threshold = int(days)
         
-        # Display the results
         if not unused_apps:
-            print("No apps found that haven't been used in the last 90 days.")
             return
         
-        print(f"\nFound {len(unused_apps)} apps that haven't been used in the last 90 days:\n")
-        
-        # Display app list with indices
-        for i, app in enumerate(unused_apps, start=1):
-            display_name = app.get("display_name", app["name"])
-            days = app.get("days_since_used", "Unknown")
-            last_used = app.get("last_used", "Unknown")
-            print(f"{i}. {display_name} ({app['name']}) - Last used: {last_used} ({days} days ago)")
-        
         # Add option to remove selected apps
         print("\n0. Cancel and return to menu")
         print("A. Remove all unused apps")
@@ -322,6 +139,7 @@ def show_unused_apps():
         # Perform the removal
         print("\nRemoving selected apps...")
         success = remove_selected_apps(selected_apps)
+        invalidate_app_usage()
         
         if success:
             print(f"Successfully removed {len(selected_apps)} unused app(s).")
@@ -331,6 +149,32 @@ def show_unused_apps():
         logging.error(f"Error in show_unused_apps: {str(e)}")
         print(f"Error: {str(e)}")
 
+def offer_resume():
+    """Offer to finish removals and reinstalls an earlier run left unfinished."""
+    try:
+        interrupted = get_journal().interrupted()
+        if not interrupted:
+            return
+        
+        print("\nAn earlier run stopped before it finished:")
+        for line in describe_interrupted(interrupted):
+            print(f"- {line}")
+        
+        confirm = input("\nFinish the remaining apps now? (y/n): ").strip().lower()
+        if confirm != 'y':
+            print("Left for later. You will be asked again next time.")
+            return
+        if not ensure_admin():
+            print("Resuming requires administrator privileges. Please run as administrator.")
+            logging.warning("Resuming interrupted work requires administrator privileges")
+            return
+        
+        results = resume_interrupted()
+        print(f"Resumed interrupted work for {len(results['remove']) + len(results['reinstall'])} apps.")
+    except Exception as e:
+        logging.error(f"Error resuming interrupted work: {str(e)}")
+        print(f"Error resuming interrupted work: {str(e)}")
+
 def show_menu():
     """Show the main menu and handle user input."""
     try:
@@ -372,18 +216,20 @@ def show_menu():
             choose_apps_to_reinstall()
             
         elif choice == '4':
-            confirm = input("\nThis will attempt to restore ALL system apps to their default state. Continue? (y/n): ").strip().lower()
-            if confirm == 'y':
-                # Check for admin privileges
-                if not ensure_admin():
+            # Show what would be restored before changing anything or asking for elevation
+            print("\nChecking which system apps need restoring...")
+            plan = plan_restore_defaults()
+            if plan and (plan["missing"] or plan["broken"]):
+                confirm = input("\nRestore these apps to their default state? (y/n): ").strip().lower()
+                if confirm != 'y':
+                    logging.info("Restore defaults cancelled by user")
+                    print("Operation cancelled.")
+                elif not ensure_admin():
                     print("Restoring defaults requires administrator privileges. Please run as administrator.")
                     logging.warning("Restoring defaults requires administrator privileges")
                 else:
                     logging.info("User selected to restore defaults")
                     restore_defaults()
-            else:
-                logging.info("Restore defaults cancelled by user")
-                print("Operation cancelled.")
                 
         elif choice == '5':
             logging.info("User selected to create system restore point")
@@ -426,6 +272,11 @@ if __name__ == "__main__":
         print("\nWelcome to Gaming Bloatware Remover!")
         print("This tool will help you remove unwanted apps from your system.")
         
+        # Keep PowerShell hosts warm instead of starting one per command
+        if os.name == 'nt':
+            enable_session_pool()
+            atexit.register(disable_session_pool)
+        
         # Create a system restore point when the app starts
         print("\nAttempting to create an initial system restore point...")
         try:
@@ -442,6 +293,9 @@ if __name__ == "__main__":
         except Exception as e:
             logging.error(f"Error creating initial restore point: {str(e)}")
             print(f"Warning: Could not create initial restore point: {str(e)}")
+        
+        # Finish anything a crash left half done
+        offer_resume()
 
         # Show the main menu
         show_menu()
@@ -0,0 +1,247 @@
+import contextlib
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, float("inf"))
+
+# Individual calls kept for the JSON snapshot
+RECENT_CALLS = 200
+
+# Characters of each command kept with a recent call
+COMMAND_PREVIEW = 500
+
+# Modules that only carry a call through to PowerShell; the caller is the
+# first frame outside them
+PLUMBING_MODULES = (
+    "powershell_utils", "result_protocol", "command_policy", "command_metrics", "app_inventory",
+    "threading", "concurrent.", "asyncio.", "contextlib", "runpy"
+)
+
+# Caller named explicitly for calls made on worker threads, where the stack
+# no longer shows who asked for them
+_caller = contextvars.ContextVar("powershell_caller", default=None)
+
+@contextlib.contextmanager
+def caller_scope(name):
+    """Attribute the PowerShell calls made inside the block to name."""
+    token = _caller.set(name)
+    try:
+        yield
+    finally:
+        _caller.reset(token)
+
+def infer_caller():
+    """Name the function that asked for the current PowerShell call.
+    
+    Returns:
+        str: The caller named by caller_scope, otherwise the qualified name of
+             the nearest function outside PLUMBING_MODULES, or "unknown"
+    """
+    name = _caller.get()
+    if name:
+        return name
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith(PLUMBING_MODULES):
+            code = frame.f_code
+            return getattr(code, "co_qualname", code.co_name)
+        frame = frame.f_back
+    return "unknown"
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout."""
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+    
+    def cumulative(self):
+        """Get (upper bound, observations <= bound) pairs."""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+    
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {_format_bound(bound): total for bound, total in self.cumulative()}
+        }
+
+class CommandMetrics:
+    """Counters and latency histograms for every PowerShell call, per caller and class.
+    
+    Thread-safe; recording a call costs a dictionary update under a lock.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._recent = deque(maxlen=RECENT_CALLS)
+        self.started = time.time()
+    
+    def record(self, caller, command_class, command, wall, spawn, output_bytes, exit_code, outcome):
+        """Record one finished call.
+        
+        Args:
+            caller (str): Function that asked for the call (see infer_caller)
+            command_class (str): Class of the command (see command_policy)
+            command (str): The command that ran
+            wall (float): Seconds from start to finish
+            spawn (float): Seconds spent starting the PowerShell process, or
+                None if no process was started (session pool, substitute runner)
+            output_bytes (int): Bytes of stdout and stderr
+            exit_code (int): Process exit code, or None after a timeout or exception
+            outcome (str): "ok", "error", "timeout", "cancelled" or "exception"
+        """
+        with self._lock:
+            series = self._series.get((caller, command_class))
+            if series is None:
+                series = self._series[(caller, command_class)] = {
+                    "outcomes": {},
+                    "exit_codes": {},
+                    "wall": Histogram(),
+                    "spawn": Histogram(),
+                    "output_bytes": 0
+                }
+            series["outcomes"][outcome] = series["outcomes"].get(outcome, 0) + 1
+            if exit_code is not None:
+                series["exit_codes"][exit_code] = series["exit_codes"].get(exit_code, 0) + 1
+            series["wall"].observe(wall)
+            if spawn is not None:
+                series["spawn"].observe(spawn)
+            series["output_bytes"] += output_bytes
+            self._recent.append({
+                "time": time.time(),
+                "caller": caller,
+                "class": command_class,
+                "wall": wall,
+                "spawn": spawn,
+                "output_bytes": output_bytes,
+                "exit_code": exit_code,
+                "outcome": outcome,
+                "command": command[:COMMAND_PREVIEW]
+            })
+    
+    def reset(self):
+        """Forget everything recorded so far."""
+        with self._lock:
+            self._series.clear()
+            self._recent.clear()
+            self.started = time.time()
+    
+    def snapshot(self):
+        """Get the metrics as plain data.
+        
+        Returns:
+            dict: "started", "taken", "series" (one entry per caller and
+                  class with counters and histograms) and "recent" (the last
+                  RECENT_CALLS calls, oldest first)
+        """
+        with self._lock:
+            series = [
+                {
+                    "caller": caller,
+                    "class": command_class,
+                    "calls": sum(data["outcomes"].values()),
+                    "outcomes": dict(data["outcomes"]),
+                    "exit_codes": {str(code): count for code, count in data["exit_codes"].items()},
+                    "output_bytes": data["output_bytes"],
+                    "wall_seconds": data["wall"].to_dict(),
+                    "spawn_seconds": data["spawn"].to_dict()
+                }
+                for (caller, command_class), data in sorted(self._series.items())
+            ]
+            return {"started": self.started, "taken": time.time(), "series": series, "recent": list(self._recent)}
+    
+    def to_prometheus(self):
+        """Render the counters and histograms in the Prometheus text format."""
+        lines = [
+            "# HELP powershell_calls_total PowerShell calls by caller, command class and outcome.",
+            "# TYPE powershell_calls_total counter"
+        ]
+        snapshot = self.snapshot()
+        for entry in snapshot["series"]:
+            for outcome, count in sorted(entry["outcomes"].items()):
+                lines.append(f"powershell_calls_total{_labels(entry, outcome=outcome)} {count}")
+        
+        lines += [
+            "# HELP powershell_exit_codes_total PowerShell process exit codes by caller and command class.",
+            "# TYPE powershell_exit_codes_total counter"
+        ]
+        for entry in snapshot["series"]:
+            for code, count in sorted(entry["exit_codes"].items()):
+                lines.append(f"powershell_exit_codes_total{_labels(entry, code=code)} {count}")
+        
+        lines += [
+            "# HELP powershell_output_bytes_total Bytes of output read from PowerShell.",
+            "# TYPE powershell_output_bytes_total counter"
+        ]
+        for entry in snapshot["series"]:
+            lines.append(f"powershell_output_bytes_total{_labels(entry)} {entry['output_bytes']}")
+        
+        for name, key, help_text in (
+            ("powershell_call_seconds", "wall_seconds", "Wall time of PowerShell calls."),
+            ("powershell_spawn_seconds", "spawn_seconds", "Time spent starting PowerShell processes.")
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for entry in snapshot["series"]:
+                histogram = entry[key]
+                if not histogram["count"]:
+                    continue
+                for bound, total in histogram["buckets"].items():
+                    lines.append(f"{name}_bucket{_labels(entry, le=bound)} {total}")
+                lines.append(f"{name}_sum{_labels(entry)} {histogram['sum']:.6f}")
+                lines.append(f"{name}_count{_labels(entry)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+    
+    def export_json(self, path):
+        """Write the snapshot to a JSON file."""
+        _write_atomic(path, json.dumps(self.snapshot(), indent=2) + "\n")
+    
+    def export_prometheus(self, path):
+        """Write the Prometheus text to a file (e.g. for the node exporter's textfile collector)."""
+        _write_atomic(path, self.to_prometheus())
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else f"{bound:g}"
+
+def _labels(entry, **extra):
+    """Prometheus label set for a series"""
+    labels = {"caller": entry["caller"], "class": entry["class"], **extra}
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+def _escape(value):
+    """Escape a label value: backslash, double quote and newline"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _write_atomic(path, text):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+# Metrics of this process
+_metrics = CommandMetrics()
+
+def get_metrics():
+    """Get the process-wide PowerShell call metrics."""
+    return _metrics
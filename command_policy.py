@@ -0,0 +1,264 @@
+import atexit
+import json
+import logging
+import os
+import random
+import re
+import threading
+from app_data import data_path
+
+# Observed command latencies, kept between runs in the data directory
+LATENCY_FILE = "command_latency.json"
+
+# Samples kept per command class
+HISTORY_LIMIT = 200
+
+# Samples a class needs before its timeout comes from the history
+MIN_SAMPLES = 5
+
+# Timeout = STARTUP_ALLOWANCE + TIMEOUT_MARGIN x the TIMEOUT_PERCENTILE latency
+TIMEOUT_PERCENTILE = 95
+TIMEOUT_MARGIN = 2.0
+STARTUP_ALLOWANCE = 10.0
+
+# Bounds for any computed timeout, in seconds
+MIN_TIMEOUT = 10
+MAX_TIMEOUT = 1800
+
+# New samples between writes of the latency file
+SAVE_EVERY = 20
+
+# Retry backoff: the delay doubles per attempt up to the cap, and a random
+# part of it spreads out retries that failed together
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+
+# Per command class: "base" and "per_unit" give the timeout used until the
+# class has history (base + per_unit x units), "retries" the attempts made
+# after a transient failure. Classes that change the system without being
+# safe to repeat get no retries; the operation journal covers those instead.
+# Timeouts are never retried: a command that hung usually hangs again, and
+# the caller would wait out the whole timeout once more per attempt.
+COMMAND_CLASSES = {
+    "query": {"base": 120, "per_unit": 0, "retries": 2},
+    "inventory": {"base": 120, "per_unit": 0, "retries": 2},
+    "provisioned": {"base": 180, "per_unit": 0, "retries": 2},
+    "fingerprint": {"base": 60, "per_unit": 0, "retries": 2},
+    "registry": {"base": 120, "per_unit": 0, "retries": 2},
+    "remove": {"base": 60, "per_unit": 30, "retries": 0},
+    "reinstall": {"base": 120, "per_unit": 60, "retries": 0},
+    "register_all": {"base": 900, "per_unit": 0, "retries": 0},
+    "command": {"base": 120, "per_unit": 0, "retries": 0}
+}
+
+# Cmdlet verbs that only read, so a command made of them is safe to retry
+READ_ONLY_VERBS = {"Get", "Test", "Measure", "Select", "Find", "Resolve"}
+
+# Cmdlet verbs that change the system; a command with one of them anywhere
+# in its pipeline is classed by that cmdlet, never by a query feeding it
+MUTATING_VERBS = {
+    "Add", "Remove", "Set", "Enable", "Disable", "Checkpoint", "New", "Install",
+    "Uninstall", "Register", "Unregister", "Reset", "Restart", "Start", "Stop",
+    "Clear", "Copy", "Move", "Rename", "Update", "Import", "Repair", "Mount", "Dismount"
+}
+
+# Failures worth retrying: a crashed session host, and deployment or file
+# errors that clear once the other operation finishes
+TRANSIENT_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r"session host exited unexpectedly",
+        r"0x80073D02",    # resources the package modifies are in use
+        r"0x80070020",    # file in use by another process
+        r"0x800706BA",    # RPC server unavailable
+        r"0x800706BE",    # remote procedure call failed
+        r"another (deployment )?operation is in progress",
+        r"being used by another process"
+    )
+]
+
+# Error message of a command that ran past its timeout
+TIMEOUT_PATTERN = re.compile(r"timed out after", re.IGNORECASE)
+
+_CMDLET = re.compile(r"\b([A-Z][a-z]+)-([A-Z][A-Za-z]+)\b")
+
+def infer_command_class(cmd):
+    """Name the class of a command that was given none.
+    
+    The class is the first cmdlet that changes the system, or the first
+    cmdlet if none does, so "Get-AppxPackage | ForEach-Object {Add-AppxPackage ...}"
+    is classed "Add-AppxPackage" and gets no retries.
+    
+    Args:
+        cmd (str): PowerShell command
+    
+    Returns:
+        str: e.g. "Get-Service", or "command" if no cmdlet is found
+    """
+    cmdlets = list(_CMDLET.finditer(cmd))
+    for match in cmdlets:
+        if match.group(1) in MUTATING_VERBS:
+            return match.group(0)
+    return cmdlets[0].group(0) if cmdlets else "command"
+
+def class_policy(command_class):
+    """Get the timeout fallback and retry count of a command class.
+    
+    Inferred cmdlet classes are retried only if the cmdlet only reads.
+    
+    Returns:
+        dict: "base", "per_unit" and "retries"
+    """
+    policy = COMMAND_CLASSES.get(command_class)
+    if policy is not None:
+        return policy
+    verb = command_class.split("-", 1)[0]
+    return COMMAND_CLASSES["query"] if verb in READ_ONLY_VERBS else COMMAND_CLASSES["command"]
+
+def classify_failure(output, timed_out=False):
+    """Tell a timeout, a transient failure and a hard one apart by the error output.
+    
+    Args:
+        output (str): Error message of a failed command
+        timed_out (bool): The command is known to have run past its timeout
+    
+    Returns:
+        str: "timeout" if the command ran out of time, "transient" if
+             retrying may succeed, otherwise "hard"
+    """
+    text = output or ""
+    if timed_out or TIMEOUT_PATTERN.search(text):
+        return "timeout"
+    return "transient" if any(pattern.search(text) for pattern in TRANSIENT_PATTERNS) else "hard"
+
+def backoff_delay(attempt):
+    """Seconds to wait before retry number attempt (0 for the first retry).
+    
+    Exponential with equal jitter: half the delay is fixed, half random.
+    """
+    delay = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def _percentile(values, percent):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, int(round(percent / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+class LatencyHistory:
+    """Per-class command latencies, used to size timeouts.
+    
+    Samples are stored per unit of work (seconds / units), so a class's
+    history fits batches of any size, and are written to disk every few
+    samples and at exit.
+    """
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): File the history is read from and saved to, or None
+                for LATENCY_FILE in the data directory
+        """
+        self.path = path or data_path(LATENCY_FILE)
+        self._samples = {}
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self.load()
+    
+    def load(self):
+        """Read the saved history, starting empty if there is none."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            samples = {
+                command_class: [float(value) for value in values][-HISTORY_LIMIT:]
+                for command_class, values in data.get("classes", {}).items()
+            }
+        except FileNotFoundError:
+            samples = {}
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable latency history {self.path}: {str(e)}")
+            samples = {}
+        with self._lock:
+            self._samples = samples
+    
+    def save(self):
+        """Write the history if it has unsaved samples."""
+        with self._lock:
+            if not self._unsaved:
+                return
+            data = {"classes": self._samples}
+            try:
+                temp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(temp_path, self.path)
+                self._unsaved = 0
+            except OSError as e:
+                logging.warning(f"Could not save latency history {self.path}: {str(e)}")
+    
+    def record(self, command_class, elapsed, units=1):
+        """Add one observed run.
+        
+        Args:
+            command_class (str): Class of the command
+            elapsed (float): Seconds the command took (the timeout if it timed out)
+            units (int): Items of work the command handled, e.g. apps in a batch
+        """
+        with self._lock:
+            values = self._samples.setdefault(command_class, [])
+            values.append(elapsed / max(1, units))
+            del values[:-HISTORY_LIMIT]
+            self._unsaved += 1
+            due = self._unsaved >= SAVE_EVERY
+        if due:
+            self.save()
+    
+    def percentile(self, command_class, percent=TIMEOUT_PERCENTILE):
+        """Get a latency percentile per unit of work, or None without enough samples."""
+        with self._lock:
+            values = list(self._samples.get(command_class, ()))
+        if len(values) < MIN_SAMPLES:
+            return None
+        return _percentile(values, percent)
+    
+    def timeout_for(self, command_class, units=1):
+        """Timeout for a command of this class handling units items of work.
+        
+        Until the class has MIN_SAMPLES samples the fixed fallback from
+        COMMAND_CLASSES is used. A command that timed out is recorded at its
+        timeout, so a class that keeps timing out gets longer timeouts.
+        
+        Returns:
+            float: Seconds
+        """
+        units = max(1, units)
+        per_unit = self.percentile(command_class)
+        if per_unit is None:
+            policy = class_policy(command_class)
+            return policy["base"] + policy["per_unit"] * units
+        timeout = STARTUP_ALLOWANCE + TIMEOUT_MARGIN * per_unit * units
+        return max(MIN_TIMEOUT, min(MAX_TIMEOUT, timeout))
+    
+    def snapshot(self):
+        """Get {class: {"samples", "p50", "p95"}} in seconds per unit, for diagnostics."""
+        with self._lock:
+            samples = {command_class: list(values) for command_class, values in self._samples.items()}
+        return {
+            command_class: {
+                "samples": len(values),
+                "p50": _percentile(values, 50),
+                "p95": _percentile(values, 95)
+            }
+            for command_class, values in samples.items() if values
+        }
+
+_latency_history = None
+_latency_lock = threading.Lock()
+
+def get_latency_history():
+    """Get the session's latency history, loading it on first use."""
+    global _latency_history
+    with _latency_lock:
+        if _latency_history is None:
+            _latency_history = LatencyHistory()
+            atexit.register(_latency_history.save)
+        return _latency_history
@@ -0,0 +1,445 @@
+"""Scripted stand-in for PowerShell, for running and timing the app off Windows.
+
+FakePowerShell simulates a machine with a configurable number of AppX packages
+and answers the commands this app sends (package enumeration, the batch
+removal script, reinstall methods, usage queries, restore points) against that
+simulated state. Every command costs simulated time; failures and timeouts can
+be scripted per command pattern.
+
+    fake = FakePowerShell(package_count=300, time_scale=0.01)
+    set_command_runner(fake)
+    fake.fail("Remove-AppxPackage", "Access is denied")
+    fake.hang("Get-WinEvent")
+
+Unrecognised commands succeed with no output.
+"""
+from result_protocol import RECORD_PREFIX, START_EVENT
+from datetime import datetime, timedelta
+import json
+import random
+import re
+import subprocess
+import threading
+import time
+
+# Publisher hash used in the simulated package names
+PUBLISHER_ID = "8wekyb3d8bbwe"
+
+class FakePowerShell:
+    """Simulated PowerShell backend for set_command_runner."""
+    def __init__(self, package_count=300, app_names=None, seed=0, admin=True,
+                 spawn_latency=0.3, per_package_latency=0.002, per_app_latency=0.05,
+                 time_scale=1.0, usage_ratio=0.6):
+        """
+        Args:
+            package_count (int): Number of installed packages to simulate
+            app_names (list): Names to include first (defaults to app_actions.APPS);
+                the rest are filler packages
+            seed (int): Seed for the simulated usage history and reinstall sources
+            admin (bool): Whether the simulated session is elevated
+            spawn_latency (float): Simulated seconds to start a PowerShell process
+            per_package_latency (float): Simulated seconds per package for commands
+                that enumerate every package
+            per_app_latency (float): Simulated seconds per app removed or registered
+            time_scale (float): Real seconds slept per simulated second
+            usage_ratio (float): Share of packages with a RecentApps usage entry
+        """
+        if app_names is None:
+            from app_actions import APPS
+            app_names = list(APPS)
+        
+        self.admin = admin
+        self.spawn_latency = spawn_latency
+        self.per_package_latency = per_package_latency
+        self.per_app_latency = per_app_latency
+        self.time_scale = time_scale
+        
+        self.calls = []
+        self._rules = []
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        
+        # Every package the machine knows about, and the installed subset
+        names = list(app_names[:package_count])
+        names += [f"Fabrikam.Filler{i:04d}" for i in range(package_count - len(names))]
+        self.catalog = {}
+        for index, name in enumerate(names):
+            self.catalog[name.casefold()] = self._make_package(index, name)
+        self.installed = set(self.catalog)
+        self.usage = self._make_usage(usage_ratio)
+        
+        # Commands recognised, most specific first
+        self._handlers = [
+            ("inventory", lambda cmd: "PackageUserInformation" in cmd, self._inventory),
+            ("reinstall_batch", lambda cmd: "-RegisterByFamilyName -MainPackage $app.family" in cmd, self._reinstall_batch),
+            ("remove_batch", lambda cmd: "$plan = ConvertFrom-Json" in cmd, self._remove_batch),
+            ("fingerprint", lambda cmd: "ForEach-Object { $_.PackageFullName }" in cmd, self._fingerprint),
+            ("installed_apps", lambda cmd: "Select-Object Name, PackageFamilyName, DisplayName" in cmd, self._installed_apps),
+            ("usage", lambda cmd: "RecentApps" in cmd, self._recent_apps),
+            ("timeline", lambda cmd: "Program-Inventory" in cmd, self._timeline),
+            ("remove", lambda cmd: "Remove-AppxPackage" in cmd, self._remove),
+            ("register_all", lambda cmd: re.search(r"Get-AppxPackage -AllUsers \|", cmd) is not None, self._register_all),
+            ("register_existing", lambda cmd: "-DisableDevelopmentMode -Register" in cmd, self._register_existing),
+            ("provisioned_index", lambda cmd: "Get-AppxProvisionedPackage -Online | ForEach-Object" in cmd, self._provisioned_index),
+            ("provisioned", lambda cmd: "Get-AppxProvisionedPackage" in cmd, self._provisioned),
+            ("provisioned_install", lambda cmd: "Add-AppxProvisionedPackage -Online -PackagePath '" in cmd, self._provisioned_install),
+            ("register_family", lambda cmd: "-RegisterByFamilyName" in cmd, self._register_family),
+            ("restore_service", lambda cmd: "Get-Service -Name SRSERVICE" in cmd, lambda cmd: (0, "Running", "", 0)),
+        ]
+    
+    def _make_package(self, index, name):
+        """Simulated package record, plus where it can be reinstalled from."""
+        version = f"1.0.{index}.0"
+        return {
+            "Name": name,
+            "PackageFullName": f"{name}_{version}_x64__{PUBLISHER_ID}",
+            "PackageFamilyName": f"{name}_{PUBLISHER_ID}",
+            "InstallLocation": f"C:\\Program Files\\WindowsApps\\{name}_{version}_x64__{PUBLISHER_ID}",
+            "Version": version,
+            "Status": "Ok",
+            "IsFramework": False,
+            "NonRemovable": False,
+            "SignatureKind": "Store",
+            "Users": ["DESKTOP\\user"],
+            "package_path": f"C:\\ProgramData\\Microsoft\\Windows\\AppRepository\\{name}_{version}_neutral_~_{PUBLISHER_ID}.appxbundle",
+            # Half the packages have a provisioned source, two thirds can be
+            # registered from their family; the rest cannot be reinstalled
+            "provisioned": index % 2 == 0,
+            "registrable": index % 3 != 2
+        }
+    
+    def _make_usage(self, usage_ratio):
+        """Simulated RecentApps entries: family name -> last use."""
+        usage = {}
+        now = datetime.now()
+        for key, package in self.catalog.items():
+            if self._random.random() < usage_ratio:
+                last_used = now - timedelta(days=self._random.randint(0, 400))
+                usage[key] = {"LastAccessedTime": last_used.isoformat(), "LaunchCount": self._random.randint(1, 200)}
+        return usage
+    
+    # Scripting
+    
+    def fail(self, pattern, message="Simulated failure", times=None):
+        """Make commands matching a regex fail.
+        
+        Args:
+            pattern (str): Regex searched for in the command
+            message (str): Error output of the failed command
+            times (int): Number of commands to fail (None fails all of them)
+        """
+        self._add_rule("fail", pattern, times, message=message)
+    
+    def hang(self, pattern, times=None):
+        """Make commands matching a regex run until they time out."""
+        self._add_rule("hang", pattern, times)
+    
+    def set_latency(self, pattern, seconds):
+        """Give commands matching a regex a fixed simulated duration."""
+        self._add_rule("latency", pattern, None, seconds=seconds)
+    
+    def break_package(self, name, status="NeedsRemediation"):
+        """Give an installed package a bad registration status."""
+        with self._lock:
+            self.catalog[name.casefold()]["Status"] = status
+    
+    def clear_rules(self):
+        """Drop every scripted failure, hang and latency."""
+        with self._lock:
+            self._rules = []
+    
+    def _add_rule(self, action, pattern, times, **options):
+        with self._lock:
+            self._rules.append(dict(options, action=action, pattern=re.compile(pattern), remaining=times))
+    
+    def _matching_rule(self, cmd, action):
+        """Take the first rule of a kind that matches cmd, counting down its uses."""
+        with self._lock:
+            for rule in self._rules:
+                if rule["action"] != action or not rule["pattern"].search(cmd):
+                    continue
+                if rule["remaining"] is not None:
+                    if rule["remaining"] <= 0:
+                        continue
+                    rule["remaining"] -= 1
+                return rule
+        return None
+    
+    # Runner interface
+    
+    def is_admin(self):
+        """Whether the simulated session is elevated."""
+        return self.admin
+    
+    def run(self, cmd, timeout=120, on_output=None):
+        """Run a command against the simulated machine.
+        
+        Args:
+            cmd (str): PowerShell command
+            timeout (float): Timeout in simulated seconds
+            on_output (callable): Called with each line the command wrote,
+                once the simulated run is over
+        
+        Returns:
+            subprocess.CompletedProcess: The simulated result
+        
+        Raises:
+            subprocess.TimeoutExpired: If the command hangs or takes longer than
+                timeout; the output written up to that point is attached
+        """
+        kind, handler = "other", lambda cmd: (0, "", "", 0)
+        for name, matches, candidate in self._handlers:
+            if matches(cmd):
+                kind, handler = name, candidate
+                break
+        
+        hang = self._matching_rule(cmd, "hang")
+        failure = self._matching_rule(cmd, "fail")
+        if hang is not None:
+            returncode, stdout, stderr, cost = 1, "", "", float("inf")
+        elif failure is not None:
+            returncode, stdout, stderr, cost = 1, "", failure["message"], 0
+        else:
+            with self._lock:
+                returncode, stdout, stderr, cost = handler(cmd)
+        
+        latency = self._matching_rule(cmd, "latency")
+        if latency is not None:
+            cost = latency["seconds"]
+        cost += self.spawn_latency
+        
+        # A command that overruns its timeout keeps the effects it simulated,
+        # like a real script killed part way through
+        timed_out = cost > timeout
+        self._sleep(timeout if timed_out else cost)
+        self.calls.append({"kind": kind, "cost": min(cost, timeout), "ok": returncode == 0 and not timed_out})
+        
+        if timed_out:
+            # Keep the share of the output written before the deadline
+            lines = stdout.splitlines()
+            done = int(len(lines) * timeout / cost) if cost != float("inf") else 0
+            _report_lines(lines[:done], on_output)
+            raise subprocess.TimeoutExpired(cmd, timeout, output="\n".join(lines[:done]))
+        _report_lines(stdout.splitlines(), on_output)
+        return subprocess.CompletedProcess(cmd, returncode, stdout, stderr)
+    
+    def _sleep(self, seconds):
+        if self.time_scale > 0:
+            time.sleep(seconds * self.time_scale)
+    
+    # Bookkeeping for benchmarks
+    
+    def reset_calls(self):
+        """Forget the commands run so far."""
+        self.calls = []
+    
+    def call_counts(self):
+        """Number of commands run so far, by kind."""
+        counts = {}
+        for call in self.calls:
+            counts[call["kind"]] = counts.get(call["kind"], 0) + 1
+        return counts
+    
+    def installed_names(self):
+        """Names of the installed packages."""
+        with self._lock:
+            return sorted(self.catalog[key]["Name"] for key in self.installed)
+    
+    # Command handlers; each returns (returncode, stdout, stderr, simulated cost)
+    
+    def _installed_packages(self):
+        return [self.catalog[key] for key in sorted(self.installed)]
+    
+    def _public(self, package):
+        return {key: value for key, value in package.items() if key[0].isupper()}
+    
+    def _enumeration_cost(self):
+        return self.per_package_latency * len(self.installed)
+    
+    def _matching(self, pattern, keys):
+        """Keys whose name matches a -like pattern with * wildcards."""
+        regex = re.compile(".*".join(re.escape(part) for part in pattern.casefold().split("*")) + r"\Z")
+        return [key for key in keys if regex.match(key)]
+    
+    def _inventory(self, cmd):
+        lines = [RECORD_PREFIX + json.dumps(self._public(package), separators=(",", ":"))
+                 for package in self._installed_packages()]
+        return 0, "\n".join(lines), "", self._enumeration_cost()
+    
+    def _fingerprint(self, cmd):
+        lines = [package["PackageFullName"] for package in self._installed_packages()]
+        return 0, "\n".join(lines), "", self._enumeration_cost()
+    
+    def _installed_apps(self, cmd):
+        apps = [{"Name": package["Name"], "PackageFamilyName": package["PackageFamilyName"], "DisplayName": None}
+                for package in self._installed_packages()]
+        # ConvertTo-Json writes a single object instead of a one-item list
+        output = json.dumps(apps[0] if len(apps) == 1 else apps, indent=4) if apps else ""
+        return 0, output, "", self._enumeration_cost()
+    
+    def _recent_apps(self, cmd):
+        items = [dict(entry, PSChildName=key, AppId=f"App\\{self.catalog[key]['PackageFamilyName']}")
+                 for key, entry in sorted(self.usage.items()) if key in self.installed]
+        output = json.dumps(items[0] if len(items) == 1 else items, indent=4) if items else ""
+        return 0, output, "", self.per_package_latency * len(items)
+    
+    def _timeline(self, cmd):
+        return 0, "[]", "", self._enumeration_cost()
+    
+    def _remove_packages(self, pattern):
+        removed = self._matching(pattern, self.installed)
+        self.installed.difference_update(removed)
+        return removed
+    
+    def _remove_full_names(self, full_names):
+        """Remove the installed packages with these exact PackageFullNames."""
+        wanted = {full_name.casefold() for full_name in full_names}
+        removed = [key for key in self.installed if self.catalog[key]["PackageFullName"].casefold() in wanted]
+        self.installed.difference_update(removed)
+        return removed
+    
+    def _plan(self, cmd):
+        """The JSON plan embedded in a batch script, or None."""
+        match = re.search(r"ConvertFrom-Json @'\n(.*?)\n'@", cmd, re.DOTALL)
+        return json.loads(match.group(1)) if match else None
+    
+    def _remove_batch(self, cmd):
+        plan = self._plan(cmd)
+        if plan is None:
+            return 1, "", "Could not parse the removal plan", 0
+        lines = []
+        cost = 0
+        for app in plan:
+            lines.append(_record(app=app["name"], event=START_EVENT))
+            if app.get("packages") is not None:
+                removed = self._remove_full_names(app["packages"])
+            else:
+                removed = self._remove_packages(app["name"])
+            cost += self.per_app_latency * max(1, len(removed))
+            lines.append(_record(app=app["name"], step="package", ok=True, message=""))
+            for key in app.get("registry_keys", []):
+                lines.append(_record(app=app["name"], step=key, ok=True, message=""))
+        return 0, "\n".join(lines), "", cost
+    
+    def _reinstall_batch(self, cmd):
+        plan = self._plan(cmd)
+        if plan is None:
+            return 1, "", "Could not parse the reinstall plan", 0
+        lines = []
+        cost = 0
+        provisioned_listed = False
+        for app in plan:
+            lines.append(_record(app=app["name"], event=START_EVENT))
+            key = app["name"].casefold()
+            method, message = "", ""
+            if app.get("manifests"):
+                # Registering still-present packages only works if they are there
+                present = [key] if key in self.installed else []
+                if present:
+                    for match in present:
+                        self.catalog[match]["Status"] = "Ok"
+                    method = "register"
+                else:
+                    message = "The package manifest could not be found"
+                cost += self.per_app_latency * len(app["manifests"])
+            if not method:
+                if app.get("sources") is not None:
+                    sources = [self._by_package_path(path) for path in app["sources"]]
+                    sources = [source for source in sources if source is not None]
+                else:
+                    if not provisioned_listed:
+                        cost += self.per_package_latency * len(self.catalog)
+                        provisioned_listed = True
+                    sources = [key] if key in self.catalog and self.catalog[key]["provisioned"] else []
+                if sources:
+                    self.installed.update(sources)
+                    cost += self.per_app_latency * len(sources)
+                    method = "provisioned"
+            if not method:
+                cost += self.per_app_latency
+                family_key = self._by_family(app.get("family") or "")
+                if family_key is not None and self.catalog[family_key]["registrable"]:
+                    self.installed.add(family_key)
+                    method = "family"
+                else:
+                    message = f"Deployment failed with HRESULT: 0x80073CF3, package {app.get('family')} not found"
+            lines.append(_record(app=app["name"], method=method, ok=bool(method), message=message))
+        return 0, "\n".join(lines), "", cost
+    
+    def _remove(self, cmd):
+        full_names = re.findall(r"Remove-AppxPackage -Package '([^']*)'", cmd)
+        match = re.search(r"Get-AppxPackage -AllUsers (?:-Name )?(\S+) \| Remove-AppxPackage", cmd)
+        if full_names:
+            removed = self._remove_full_names(full_names)
+        else:
+            removed = self._remove_packages(match.group(1).strip("\"'")) if match else []
+        return 0, "", "", self.per_app_latency * max(1, len(removed))
+    
+    def _register_all(self, cmd):
+        # Re-registering installed packages changes nothing that is simulated
+        return 0, "", "", self.per_app_latency * len(self.installed)
+    
+    def _register_existing(self, cmd):
+        match = re.search(r"Get-AppxPackage -AllUsers (\S+) \|", cmd)
+        registered = self._matching(match.group(1).strip("\"'"), self.installed) if match else []
+        return 0, "", "", self.per_app_latency * len(registered)
+    
+    def _provisioned(self, cmd):
+        cost = self.per_package_latency * len(self.catalog)
+        match = re.search(r"-(?:like|eq) '([^']*)'", cmd)
+        if match and "Add-AppxProvisionedPackage" in cmd:
+            for key in self._matching(match.group(1), self.catalog):
+                if self.catalog[key]["provisioned"]:
+                    self.installed.add(key)
+                    cost += self.per_app_latency
+        return 0, "", "", cost
+    
+    def _provisioned_index(self, cmd):
+        lines = [_record(DisplayName=package["Name"], PackageName=f"{package['Name']}_{package['Version']}_neutral_~_{PUBLISHER_ID}",
+                         PackagePath=package["package_path"], Version=package["Version"])
+                 for package in self.catalog.values() if package["provisioned"]]
+        return 0, "\n".join(lines), "", self.per_package_latency * len(self.catalog)
+    
+    def _by_package_path(self, path):
+        """Key of the provisioned package with this PackagePath, or None."""
+        for key, package in self.catalog.items():
+            if package["provisioned"] and package["package_path"].casefold() == path.casefold():
+                return key
+        return None
+    
+    def _provisioned_install(self, cmd):
+        match = re.search(r"-PackagePath '((?:[^']|'')*)'", cmd)
+        key = self._by_package_path(match.group(1).replace("''", "'")) if match else None
+        if key is not None:
+            self.installed.add(key)
+        return 0, "", "", self.per_app_latency
+    
+    def _by_family(self, family_name):
+        """Key of the package with this family name, or None (a bare package name doesn't match)."""
+        family_name = family_name.casefold()
+        for key, package in self.catalog.items():
+            if package["PackageFamilyName"].casefold() == family_name:
+                return key
+        return None
+    
+    def _register_family(self, cmd):
+        match = re.search(r"-MainPackage (\S+)", cmd)
+        family_name = match.group(1).strip("\"'") if match else ""
+        key = self._by_family(family_name)
+        package = self.catalog.get(key) if key is not None else None
+        if package is None or not package["registrable"]:
+            if "SilentlyContinue" in cmd:
+                return 0, "", "", self.per_app_latency
+            return 1, "", f"Deployment failed with HRESULT: 0x80073CF3, package {family_name} not found", self.per_app_latency
+        self.installed.add(key)
+        return 0, "", "", self.per_app_latency
+
+def _report_lines(lines, on_output):
+    """Hand written lines to a run's output callback."""
+    if on_output is not None:
+        for line in lines:
+            on_output(line)
+
+def _record(**record):
+    """One result line as written by the Write-Record helper."""
+    return RECORD_PREFIX + json.dumps(record, separators=(",", ":"))
@@ -1,18 +1,40 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import messagebox
 import logging
-import psutil
-import threading
-from app_actions import remove_selected_apps
-from restore import create_restore_point, reinstall_selected_apps, get_available_apps_for_reinstall, check_app_installed
-from powershell_utils import ensure_admin
+from app_checklist import AppChecklist, install_status_detail
+from job_manager import get_job_manager, on_main_thread, PACKAGES_RESOURCE
+
+# The PowerShell-backed modules (app_actions, restore, powershell_utils) are
+# imported by the handlers that use them, so building the first tab doesn't
+# load them before the window is drawn
+
+# Sparkline size in pixels
+SPARKLINE_WIDTH = 150
+SPARKLINE_HEIGHT = 30
 
 class CPURamMonitor(tk.Frame):
-    """Widget to display CPU and RAM usage with circular progress indicators"""
-    def __init__(self, parent):
+    """Widget to display CPU and RAM usage with circular progress indicators
+    
+    Values come from a SystemSampler's history, so updating the widget never
+    waits on psutil. Canvas items are only redrawn when a value moved by more
+    than redraw_threshold percentage points since it was last drawn.
+    """
+    def __init__(self, parent, sampler=None, redraw_threshold=1.0):
         try:
             super().__init__(parent, bg="#e0e0e0")
             
+            # Background sampler; the widget starts its own if none is given
+            if sampler is None:
+                # Deferred: psutil only loads once a monitor is built
+                from system_sampler import SystemSampler
+                sampler = SystemSampler()
+                sampler.start()
+            self.sampler = sampler
+            self.redraw_threshold = redraw_threshold
+            
+            # Values currently drawn, by canvas
+            self._drawn = {}
+            
             # CPU Frame
             self.cpu_frame = tk.Frame(self, bg="#e0e0e0")
             self.cpu_frame.pack(fill=tk.X, pady=10)
@@ -54,6 +76,9 @@ class CPURamMonitor(tk.Frame):
                 fill="#555555"
             )
             
+            # CPU history
+            self.cpu_sparkline = self._create_sparkline(self.cpu_frame)
+            
             # RAM Frame
             self.ram_frame = tk.Frame(self, bg="#e0e0e0")
             self.ram_frame.pack(fill=tk.X, pady=10)
@@ -94,30 +119,87 @@ class CPURamMonitor(tk.Frame):
                 font=("Arial", 16, "bold"),
                 fill="#555555"
             )
+            
+            # RAM history
+            self.ram_sparkline = self._create_sparkline(self.ram_frame)
+            
+            # Commit charge and process count
+            self.details_label = tk.Label(
+                self,
+                text="",
+                font=("Arial", 9),
+                bg="#e0e0e0",
+                fg="#555555"
+            )
+            self.details_label.pack(pady=5)
         except Exception as e:
             logging.error(f"Error initializing CPURamMonitor: {str(e)}")
             # Create a minimal fallback UI if initialization fails
             label = tk.Label(self, text="System Monitor Unavailable", bg="#e0e0e0", fg="red")
             label.pack(pady=20)
     
+    def _create_sparkline(self, parent):
+        """Create a small canvas with one line item for a value's history"""
+        canvas = tk.Canvas(
+            parent,
+            width=SPARKLINE_WIDTH,
+            height=SPARKLINE_HEIGHT,
+            bg="#e0e0e0",
+            highlightthickness=0
+        )
+        canvas.pack(pady=(0, 5))
+        canvas.line = canvas.create_line(0, SPARKLINE_HEIGHT, 0, SPARKLINE_HEIGHT, fill="#9e4e6a", width=2)
+        return canvas
+    
     def update_values(self):
-        """Update CPU and RAM usage values"""
+        """Update CPU and RAM usage values from the sampler's latest sample"""
         try:
-            # Get CPU usage (average across all cores)
-            cpu_percent = psutil.cpu_percent()
-            # Get RAM usage
-            ram_percent = psutil.virtual_memory().percent
+            sample = self.sampler.latest()
+            if sample is None:
+                return
             
-            # Update CPU display
-            self.cpu_canvas.itemconfig(self.cpu_indicator, extent=3.6 * cpu_percent)
-            self.cpu_canvas.itemconfig(self.cpu_text, text=f"{int(cpu_percent)}%")
+            # Update CPU display (average across all cores)
+            self._draw_gauge(self.cpu_canvas, self.cpu_indicator, self.cpu_text, sample["cpu"])
+            self._draw_sparkline(self.cpu_sparkline, self.sampler.history("cpu"))
             
             # Update RAM display
-            self.ram_canvas.itemconfig(self.ram_indicator, extent=3.6 * ram_percent)
-            self.ram_canvas.itemconfig(self.ram_text, text=f"{int(ram_percent)}%")
+            self._draw_gauge(self.ram_canvas, self.ram_indicator, self.ram_text, sample["ram"])
+            self._draw_sparkline(self.ram_sparkline, self.sampler.history("ram"))
+            
+            details = f"Commit {int(sample['commit'])}%  |  {sample['processes']} processes"
+            if self.details_label.cget("text") != details:
+                self.details_label.config(text=details)
         except Exception as e:
             # Log but don't crash on update errors
             logging.error(f"Error updating system monitor: {str(e)}")
+    
+    def _draw_gauge(self, canvas, indicator, text, percent):
+        """Redraw a circular gauge if its value moved past the threshold"""
+        drawn = self._drawn.get(canvas)
+        if drawn is not None and abs(percent - drawn) <= self.redraw_threshold:
+            return
+        self._drawn[canvas] = percent
+        canvas.itemconfig(indicator, extent=3.6 * percent)
+        canvas.itemconfig(text, text=f"{int(percent)}%")
+    
+    def _draw_sparkline(self, canvas, values):
+        """Redraw a history line if any point moved past the threshold"""
+        drawn = self._drawn.get(canvas)
+        if drawn is not None and len(drawn) == len(values) and all(
+                abs(value - old) <= self.redraw_threshold for value, old in zip(values, drawn)):
+            return
+        self._drawn[canvas] = values
+        if len(values) < 2:
+            return
+        
+        # Oldest sample on the left, newest on the right; 100% at the top
+        step = (SPARKLINE_WIDTH - 1) / (self.sampler.buffer.capacity - 1)
+        x0 = SPARKLINE_WIDTH - 1 - step * (len(values) - 1)
+        coords = []
+        for i, value in enumerate(values):
+            coords.append(x0 + step * i)
+            coords.append((SPARKLINE_HEIGHT - 2) * (1 - min(value, 100) / 100) + 1)
+        canvas.coords(canvas.line, *coords)
 
 class StorageBar(tk.Frame):
     """Widget to display storage usage with a horizontal progress bar - redesigned for minimal look"""
@@ -262,6 +344,9 @@ class StorageBar(tk.Frame):
     def update_storage_info(self):
         """Update storage information display"""
         try:
+            # Deferred so importing this module doesn't load psutil
+            import psutil
+            
             # Get storage info for C: drive or system drive
             try:
                 drive_path = 'C:\\'
@@ -295,13 +380,13 @@ class StorageBar(tk.Frame):
 
 class AppSelectionFrame(tk.Frame):
     """Frame for selecting apps to remove"""
-    def __init__(self, parent, apps, app_descriptions):
+    def __init__(self, parent, apps, catalog):
         try:
             super().__init__(parent, bg="#d4d4d4")
             
-            # Store the apps and their descriptions
+            # Store the apps and the catalog describing them
             self.apps = apps
-            self.app_descriptions = app_descriptions
+            self.catalog = catalog
             
             # Title
             self.title_label = tk.Label(
@@ -312,52 +397,19 @@ class AppSelectionFrame(tk.Frame):
             )
             self.title_label.pack(pady=10)
             
-            # Create a frame for the app list with scrollbar
-            self.list_frame = tk.Frame(self, bg="#d4d4d4")
-            self.list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-            
-            # Scrollbar
-            self.scrollbar = tk.Scrollbar(self.list_frame)
-            self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-            
-            # Listbox-like container with checkboxes (using a Frame and Canvas for scrolling)
-            self.canvas = tk.Canvas(
-                self.list_frame, 
-                bg="#d4d4d4",
-                highlightthickness=0,
-                yscrollcommand=self.scrollbar.set
-            )
-            self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-            
-            self.scrollbar.config(command=self.canvas.yview)
-            
-            # Frame inside canvas for checkboxes
-            self.checkbox_frame = tk.Frame(self.canvas, bg="#d4d4d4")
-            self.checkbox_window = self.canvas.create_window((0, 0), window=self.checkbox_frame, anchor="nw")
+            # App list; only the rows in view have widgets
+            self.app_list = AppChecklist(self)
+            self.app_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
             
-            # App checkboxes and variables
-            self.app_vars = {}
-            
-            # Create checkboxes for all apps
+            # Create a row for every app
+            rows = []
             for app_name in self.apps:
-                var = tk.BooleanVar(value=False)
-                self.app_vars[app_name] = var
-                
-                # Get description if available
-                description = self.app_descriptions[app_name]["description"] if app_name in self.app_descriptions and "description" in self.app_descriptions[app_name] else app_name
-                
-                # Create checkbox
-                checkbox = ttk.Checkbutton(
-                    self.checkbox_frame,
-                    text=description,
-                    variable=var,
-                    style="TCheckbutton"
-                )
-                checkbox.pack(anchor="w", pady=2, padx=5)
+                rows.append({"name": app_name, "text": self.catalog.description(app_name)})
+            self.app_list.set_rows(rows)
             
             # Add category selection buttons
-            self.button_frame = tk.Frame(self.checkbox_frame, bg="#d4d4d4")
-            self.button_frame.pack(fill=tk.X, pady=10, padx=5)
+            self.button_frame = tk.Frame(self, bg="#d4d4d4")
+            self.button_frame.pack(fill=tk.X, pady=(0, 5), padx=15)
             
             select_all_btn = tk.Button(
                 self.button_frame,
@@ -377,13 +429,6 @@ class AppSelectionFrame(tk.Frame):
             )
             select_none_btn.pack(side=tk.LEFT, padx=5)
             
-            # Update scrollregion after all checkboxes are added
-            self.checkbox_frame.update_idletasks()
-            self.canvas.config(scrollregion=self.canvas.bbox("all"))
-            
-            # Bind canvas resize event
-            self.canvas.bind("<Configure>", self.on_canvas_configure)
-            
             # Status label
             self.status_label = tk.Label(
                 self,
@@ -410,27 +455,17 @@ class AppSelectionFrame(tk.Frame):
             label = tk.Label(self, text=f"Error loading app selection: {str(e)}", bg="#d4d4d4", fg="red")
             label.pack(pady=20)
     
-    def on_canvas_configure(self, event):
-        """Update scrollregion when canvas is resized"""
-        try:
-            self.canvas.itemconfig(self.checkbox_window, width=event.width)
-            self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        except Exception as e:
-            logging.error(f"Error in on_canvas_configure: {str(e)}")
-    
     def select_all(self):
         """Select all apps"""
         try:
-            for var in self.app_vars.values():
-                var.set(True)
+            self.app_list.select_all()
         except Exception as e:
             logging.error(f"Error in select_all: {str(e)}")
     
     def select_none(self):
         """Deselect all apps"""
         try:
-            for var in self.app_vars.values():
-                var.set(False)
+            self.app_list.clear_selection()
         except Exception as e:
             logging.error(f"Error in select_none: {str(e)}")
     
@@ -438,14 +473,14 @@ class AppSelectionFrame(tk.Frame):
         """Remove selected apps"""
         try:
             # Get list of selected apps
-            selected_apps = [app for app, var in self.app_vars.items() if var.get()]
+            selected_apps = self.app_list.selected_names()
             
             if not selected_apps:
                 messagebox.showinfo("No Selection", "No apps were selected for removal.")
                 return
             
             # Confirm removal
-            app_list = "\n".join([self.app_descriptions[app]["description"] if app in self.app_descriptions and "description" in self.app_descriptions[app] else app for app in selected_apps])
+            app_list = "\n".join([self.catalog.description(app) for app in selected_apps])
             response = messagebox.askyesno(
                 "Confirm Removal",
                 f"Are you sure you want to remove the following apps?\n\n{app_list}"
@@ -453,6 +488,7 @@ class AppSelectionFrame(tk.Frame):
             
             if response:
                 # Check for admin privileges
+                from powershell_utils import ensure_admin
                 if not ensure_admin():
                     messagebox.showwarning(
                         "Administrator Privileges Required",
@@ -465,33 +501,39 @@ class AppSelectionFrame(tk.Frame):
                 self.status_label.config(text="Removing apps... Please wait.")
                 self.remove_button.config(state=tk.DISABLED)
                 
-                # Start thread for removal
-                threading.Thread(target=lambda: self._perform_removal(selected_apps), daemon=True).start()
+                # Remove in the background; the same selection submitted again joins this run
+                # and other package changes wait for it
+                get_job_manager().submit(
+                    f"remove:{','.join(sorted(selected_apps))}",
+                    self._perform_removal,
+                    selected_apps,
+                    on_done=on_main_thread(self, lambda job: self._removal_complete(job, selected_apps)),
+                    resource=PACKAGES_RESOURCE
+                )
         except Exception as e:
             logging.error(f"Error in remove_selected: {str(e)}")
             messagebox.showerror("Error", f"Error preparing to remove apps: {str(e)}")
     
     def _perform_removal(self, selected_apps):
-        """Perform the actual removal in a separate thread"""
-        try:
-            # Create restore point first (just in case)
-            create_restore_point()
-            
-            # Call the removal function from app_actions.py
-            success = remove_selected_apps(selected_apps)
-            
-            # Update UI on main thread
-            self.after(0, lambda: self._removal_complete(success, selected_apps))
-        except Exception as e:
-            logging.error(f"Error removing apps: {str(e)}")
-            self.after(0, lambda: self.status_label.config(text=f"Error removing apps"))
-            self.after(0, lambda: self.remove_button.config(state=tk.NORMAL))
-            self.after(0, lambda: messagebox.showerror("Error", f"Error removing apps: {str(e)}"))
+        """Perform the actual removal (runs as a background job)"""
+        from app_actions import remove_selected_apps
+        from restore import create_restore_point
+        
+        # Create restore point first (just in case)
+        create_restore_point()
+        
+        # Call the removal function from app_actions.py
+        return remove_selected_apps(selected_apps)
     
-    def _removal_complete(self, success, selected_apps):
-        """Handle completion of app removal"""
+    def _removal_complete(self, job, selected_apps):
+        """Handle completion of app removal (called on main thread)"""
         try:
-            if success:
+            if job.error is not None:
+                self.status_label.config(text="Error removing apps")
+                messagebox.showerror("Error", f"Error removing apps: {str(job.error)}")
+            elif job.cancelled:
+                self.status_label.config(text="Removal cancelled")
+            elif job.result:
                 self.status_label.config(text="Removal complete")
                 messagebox.showinfo(
                     "Removal Complete",
@@ -500,8 +542,7 @@ class AppSelectionFrame(tk.Frame):
                 
                 # Reset checkboxes for removed apps
                 for app in selected_apps:
-                    if app in self.app_vars:
-                        self.app_vars[app].set(False)
+                    self.app_list.set_selected(app, False)
             else:
                 self.status_label.config(text="Removal failed")
                 messagebox.showerror(
@@ -569,6 +610,9 @@ class RestorePointFrame(tk.Frame):
     def create_restore_point(self):
         """Create a system restore point"""
         try:
+            from powershell_utils import ensure_admin
+            from restore import create_restore_point
+            
             # Check for admin privileges
             if not ensure_admin():
                 messagebox.showwarning(
@@ -588,34 +632,30 @@ class RestorePointFrame(tk.Frame):
                 "Creating system restore point...\nThis may take a moment."
             )
             
-            # Run the restore point creation in a separate thread
-            threading.Thread(target=self._create_restore_point_thread, daemon=True).start()
+            # Create the restore point in the background; clicking again joins this run
+            get_job_manager().submit(
+                "restore_point",
+                create_restore_point,
+                on_done=on_main_thread(self, self._restore_point_complete),
+                resource=PACKAGES_RESOURCE
+            )
         except Exception as e:
             logging.error(f"Error preparing to create restore point: {str(e)}")
             self.status_label.config(text=f"Error: {str(e)[:50]}...")
             messagebox.showerror("Error", f"Error preparing to create restore point: {str(e)}")
     
-    def _create_restore_point_thread(self):
-        """Create restore point in a separate thread to not freeze the UI"""
+    def _restore_point_complete(self, job):
+        """Handle completion of restore point creation (called on main thread)"""
         try:
-            # Call the actual function from restore.py
-            success = create_restore_point()
-            
-            # Update UI on main thread
-            self.after(0, lambda: self._restore_point_complete(success))
-        except Exception as e:
-            logging.error(f"Error creating restore point: {str(e)}")
-            self.after(0, lambda: self.status_label.config(text=f"Error: {str(e)[:50]}..."))
-            self.after(0, lambda: self.restore_button.config(state=tk.NORMAL))
-            self.after(0, lambda: messagebox.showerror(
-                "Restore Point Error",
-                f"An error occurred while creating restore point:\n{str(e)}"
-            ))
-    
-    def _restore_point_complete(self, success):
-        """Handle completion of restore point creation"""
-        try:
-            if success:
+            if job.error is not None:
+                self.status_label.config(text=f"Error: {str(job.error)[:50]}...")
+                messagebox.showerror(
+                    "Restore Point Error",
+                    f"An error occurred while creating restore point:\n{str(job.error)}"
+                )
+            elif job.cancelled:
+                self.status_label.config(text="Restore point cancelled")
+            elif job.result:
                 self.status_label.config(text="Restore point created successfully")
                 messagebox.showinfo(
                     "Restore Point",
@@ -649,28 +689,43 @@ class AppReinstallFrame(tk.Frame):
             )
             self.title_label.pack(pady=10)
             
-            # Create a frame for the app list with scrollbar
-            self.list_frame = tk.Frame(self, bg="#d4d4d4")
-            self.list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+            # App list; only the rows in view have widgets
+            self.app_list = AppChecklist(self)
+            self.app_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
             
-            # Scrollbar
-            self.scrollbar = tk.Scrollbar(self.list_frame)
-            self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+            # Add 'Select All' and 'Select Missing' buttons
+            buttons_frame = tk.Frame(self, bg="#d4d4d4", pady=5)
+            buttons_frame.pack(fill=tk.X, padx=15)
             
-            # Listbox-like container with checkboxes (using a Frame and Canvas for scrolling)
-            self.canvas = tk.Canvas(
-                self.list_frame, 
+            select_all_btn = tk.Button(
+                buttons_frame,
+                text="Select All",
+                command=self.select_all_apps,
+                relief=tk.GROOVE,
                 bg="#d4d4d4",
-                highlightthickness=0,
-                yscrollcommand=self.scrollbar.set
+                font=("Arial", 9)
             )
-            self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+            select_all_btn.pack(side=tk.LEFT, padx=5)
             
-            self.scrollbar.config(command=self.canvas.yview)
+            select_missing_btn = tk.Button(
+                buttons_frame,
+                text="Select Missing",
+                command=self.select_missing_apps,
+                relief=tk.GROOVE,
+                bg="#d4d4d4",
+                font=("Arial", 9)
+            )
+            select_missing_btn.pack(side=tk.LEFT, padx=5)
             
-            # Frame inside canvas for checkboxes
-            self.checkbox_frame = tk.Frame(self.canvas, bg="#d4d4d4")
-            self.canvas_window = self.canvas.create_window((0, 0), window=self.checkbox_frame, anchor="nw")
+            clear_btn = tk.Button(
+                buttons_frame,
+                text="Clear All",
+                command=self.clear_selection,
+                relief=tk.GROOVE,
+                bg="#d4d4d4",
+                font=("Arial", 9)
+            )
+            clear_btn.pack(side=tk.LEFT, padx=5)
             
             # Status label
             self.status_label = tk.Label(
@@ -704,13 +759,8 @@ class AppReinstallFrame(tk.Frame):
             )
             self.reinstall_button.pack(pady=10)
             
-            # App checkboxes and variables
-            self.app_vars = {}
+            # App data by name
             self.available_apps = {}
-            self.app_frames = {}  # Track app frames for status updates
-            
-            # Bind canvas resize event
-            self.canvas.bind("<Configure>", self.on_canvas_configure)
             
             # Schedule loading after the window is initialized
             self.after(100, self._start_load_thread)
@@ -720,14 +770,6 @@ class AppReinstallFrame(tk.Frame):
             label = tk.Label(self, text=f"Error loading app reinstall panel: {str(e)}", bg="#d4d4d4", fg="red")
             label.pack(pady=20)
     
-    def on_canvas_configure(self, event):
-        """Update scrollregion when canvas is resized"""
-        try:
-            self.canvas.itemconfig(self.canvas_window, width=event.width)
-            self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        except Exception as e:
-            logging.error(f"Error in on_canvas_configure: {str(e)}")
-    
     def _start_load_thread(self):
         """Start a thread to load app data"""
         try:
@@ -735,121 +777,44 @@ class AppReinstallFrame(tk.Frame):
             self.reload_button.config(state=tk.DISABLED)
             self.status_label.config(text="Loading available apps...")
             
-            # Start thread for loading data
-            threading.Thread(target=self._load_app_data, daemon=True).start()
+            # Load in the background; a reload while one is running joins it
+            from restore import get_available_apps_for_reinstall
+            get_job_manager().submit(
+                "reinstall_list",
+                get_available_apps_for_reinstall,
+                on_done=on_main_thread(self, self._load_app_data_complete)
+            )
         except Exception as e:
             logging.error(f"Error starting load thread: {str(e)}")
             self.status_label.config(text=f"Error: {str(e)[:50]}...")
             self.reload_button.config(state=tk.NORMAL)
     
-    def _load_app_data(self):
-        """Load app data in a background thread"""
-        try:
-            # Get available apps without touching the UI
-            apps = get_available_apps_for_reinstall()
-            
-            # Schedule UI update on main thread
-            self.after(0, lambda: self._update_ui_with_apps(apps))
-        except Exception as e:
-            logging.error(f"Error loading available apps: {str(e)}")
-            self.after(0, lambda e=e: self.status_label.config(
-                text=f"Error loading apps: {str(e)[:50]}..."
-            ))
-            self.after(0, lambda: self.reload_button.config(state=tk.NORMAL))
+    def _load_app_data_complete(self, job):
+        """Show the loaded apps or the load error (called on main thread)"""
+        if job.error is not None or job.cancelled:
+            error = job.error if job.error is not None else "cancelled"
+            logging.error(f"Error loading available apps: {str(error)}")
+            self.status_label.config(text=f"Error loading apps: {str(error)[:50]}...")
+            self.reload_button.config(state=tk.NORMAL)
+            return
+        self._update_ui_with_apps(job.result)
     
     def _update_ui_with_apps(self, apps):
         """Update UI with loaded app data (called on main thread)"""
         try:
             self.available_apps = apps
             
-            # Clear existing checkboxes
-            for widget in self.checkbox_frame.winfo_children():
-                widget.destroy()
-            
-            # Re-create all app variables (on the main thread)
-            self.app_vars = {}
-            self.app_frames = {}  # Clear the app frames dictionary
-            
-            # Create checkboxes for all apps
-            for app_name, app_info in self.available_apps.items():
-                var = tk.BooleanVar(value=False)
-                self.app_vars[app_name] = var
-                
-                # Get description
-                description = app_info["description"]
-                installed = app_info["installed"]
-                
-                # Create a frame for each app
-                app_frame = tk.Frame(self.checkbox_frame, bg="#d4d4d4", pady=2)
-                app_frame.pack(fill=tk.X, padx=5)
-                self.app_frames[app_name] = app_frame  # Store reference to the frame
-                
-                # Create checkbox
-                checkbox = ttk.Checkbutton(
-                    app_frame,
-                    text=description,
-                    variable=var,
-                    style="TCheckbutton"
-                )
-                checkbox.pack(side=tk.LEFT)
-                
-                # Status label (installed or not)
-                status_color = "#008000" if installed else "#800000"  # Green if installed, red if not
-                status_text = "Installed" if installed else "Not Installed"
-                
-                status_label = tk.Label(
-                    app_frame,
-                    text=status_text,
-                    font=("Arial", 8),
-                    bg="#d4d4d4",
-                    fg=status_color
-                )
-                status_label.pack(side=tk.RIGHT, padx=5)
-                app_frame.status_label = status_label  # Store reference to the label
+            # Update the rows by name, keeping the user's selection
+            self.app_list.reconcile_rows([
+                dict(install_status_detail(app_info["installed"]), name=app_name, text=app_info["description"])
+                for app_name, app_info in self.available_apps.items()
+            ])
             
             # Update status
             app_count = len(self.available_apps)
             installed_count = sum(1 for app_info in self.available_apps.values() if app_info["installed"])
             
             self.status_label.config(text=f"Found {app_count} apps ({installed_count} installed)")
-            
-            # Add 'Select All' and 'Select Missing' buttons
-            buttons_frame = tk.Frame(self.checkbox_frame, bg="#d4d4d4", pady=5)
-            buttons_frame.pack(fill=tk.X, padx=5)
-            
-            select_all_btn = tk.Button(
-                buttons_frame,
-                text="Select All",
-                command=self.select_all_apps,
-                relief=tk.GROOVE,
-                bg="#d4d4d4",
-                font=("Arial", 9)
-            )
-            select_all_btn.pack(side=tk.LEFT, padx=5)
-            
-            select_missing_btn = tk.Button(
-                buttons_frame,
-                text="Select Missing",
-                command=self.select_missing_apps,
-                relief=tk.GROOVE,
-                bg="#d4d4d4",
-                font=("Arial", 9)
-            )
-            select_missing_btn.pack(side=tk.LEFT, padx=5)
-            
-            clear_btn = tk.Button(
-                buttons_frame,
-                text="Clear All",
-                command=self.clear_selection,
-                relief=tk.GROOVE,
-                bg="#d4d4d4",
-                font=("Arial", 9)
-            )
-            clear_btn.pack(side=tk.LEFT, padx=5)
-            
-            # Update scrollregion after all checkboxes are added
-            self.checkbox_frame.update_idletasks()
-            self.canvas.config(scrollregion=self.canvas.bbox("all"))
         except Exception as e:
             logging.error(f"Error updating UI with apps: {str(e)}")
             self.status_label.config(text=f"Error: {str(e)[:50]}...")
@@ -859,39 +824,30 @@ class AppReinstallFrame(tk.Frame):
     
     def update_app_status(self, app_name, is_installed):
         """Update the status indicator for a specific app"""
-        if app_name in self.app_frames:
-            app_frame = self.app_frames[app_name]
-            if hasattr(app_frame, 'status_label'):
-                status_color = "#008000" if is_installed else "#800000"
-                status_text = "Installed" if is_installed else "Not Installed"
-                app_frame.status_label.config(text=status_text, fg=status_color)
-                
-                # Also update our data
-                if app_name in self.available_apps:
-                    self.available_apps[app_name]["installed"] = is_installed
+        if self.app_list.update_row(app_name, **install_status_detail(is_installed)):
+            # Also update our data
+            if app_name in self.available_apps:
+                self.available_apps[app_name]["installed"] = is_installed
     
     def select_all_apps(self):
         """Select all apps"""
         try:
-            for var in self.app_vars.values():
-                var.set(True)
+            self.app_list.select_all()
         except Exception as e:
             logging.error(f"Error in select_all_apps: {str(e)}")
     
     def select_missing_apps(self):
         """Select only missing apps"""
         try:
-            for app_name, var in self.app_vars.items():
-                # Select if app is not installed
-                var.set(not self.available_apps[app_name]["installed"])
+            # Select if app is not installed
+            self.app_list.select_where(lambda row: not self.available_apps[row["name"]]["installed"])
         except Exception as e:
             logging.error(f"Error in select_missing_apps: {str(e)}")
     
     def clear_selection(self):
         """Clear all selections"""
         try:
-            for var in self.app_vars.values():
-                var.set(False)
+            self.app_list.clear_selection()
         except Exception as e:
             logging.error(f"Error in clear_selection: {str(e)}")
     
@@ -899,6 +855,7 @@ class AppReinstallFrame(tk.Frame):
         """Reinstall selected apps"""
         try:
             # Check for admin privileges
+            from powershell_utils import ensure_admin
             if not ensure_admin():
                 messagebox.showwarning(
                     "Administrator Privileges Required",
@@ -908,7 +865,7 @@ class AppReinstallFrame(tk.Frame):
                 return
             
             # Get list of selected apps
-            selected_apps = [app for app, var in self.app_vars.items() if var.get()]
+            selected_apps = self.app_list.selected_names()
             
             if not selected_apps:
                 messagebox.showinfo("No Selection", "No apps were selected for reinstallation.")
@@ -927,54 +884,70 @@ class AppReinstallFrame(tk.Frame):
                 self.reinstall_button.config(state=tk.DISABLED)
                 self.reload_button.config(state=tk.DISABLED)
                 
-                # Start reinstallation in a separate thread
-                threading.Thread(target=lambda: self._perform_reinstall(selected_apps), daemon=True).start()
+                # Reinstall in the background; the same selection submitted again joins this run
+                # and other package changes wait for it
+                get_job_manager().submit(
+                    f"reinstall:{','.join(sorted(selected_apps))}",
+                    self._perform_reinstall,
+                    selected_apps,
+                    on_done=on_main_thread(self, self._reinstall_complete),
+                    resource=PACKAGES_RESOURCE
+                )
         except Exception as e:
             logging.error(f"Error preparing to reinstall apps: {str(e)}")
             messagebox.showerror("Error", f"Error preparing to reinstall apps: {str(e)}")
     
     def _perform_reinstall(self, selected_apps):
-        """Perform the actual reinstall in a separate thread"""
-        try:
-            # Create restore point first
-            create_restore_point()
-            
-            # Call the reinstall function
-            success_count, failed_count = reinstall_selected_apps(selected_apps)
-            
-            # Check actual installation status for each app
-            for app_name in selected_apps:
-                is_installed = check_app_installed(app_name)
-                # Update in UI thread - need to use lambda with default args to capture current values
-                self.after(0, lambda app=app_name, status=is_installed: 
-                          self.update_app_status(app, status))
-            
-            # Show success message (needs to be run on the main thread)
-            self.after(0, lambda: messagebox.showinfo(
-                "Reinstall Complete",
-                f"Successfully reinstalled {success_count} app(s).\n"
-                f"Failed to reinstall {failed_count} app(s)."
-            ))
-            
-            # Reload app list to show updated status
-            self.after(0, self._start_load_thread)
-                    
-        except Exception as e:
+        """Perform the actual reinstall (runs as a background job)
+        
+        Returns:
+            tuple: (success_count, failed_count, {app_name: installed})
+        """
+        from restore import create_restore_point, reinstall_selected_apps, check_app_installed
+        
+        # Create restore point first
+        create_restore_point()
+        
+        # Call the reinstall function
+        success_count, failed_count = reinstall_selected_apps(selected_apps)
+        
+        # Check actual installation status for each app
+        statuses = {app_name: check_app_installed(app_name) for app_name in selected_apps}
+        return success_count, failed_count, statuses
+    
+    def _reinstall_complete(self, job):
+        """Handle completion of the reinstall (called on main thread)"""
+        if job.error is not None or job.cancelled:
+            error = job.error if job.error is not None else "cancelled"
             # Log the error
-            logging.error(f"Error reinstalling apps: {str(e)}")
+            logging.error(f"Error reinstalling apps: {str(error)}")
             
             # Show error message
-            self.after(0, lambda: messagebox.showerror(
+            messagebox.showerror(
                 "Error",
-                f"An error occurred while reinstalling apps:\n{str(e)}"
-            ))
+                f"An error occurred while reinstalling apps:\n{str(error)}"
+            )
             
             # Re-enable buttons
-            self.after(0, lambda: self.status_label.config(text="Reinstall failed. Try again."))
-            self.after(0, lambda: self.reinstall_button.config(state=tk.NORMAL))
-            self.after(0, lambda: self.reload_button.config(state=tk.NORMAL))
-        else:
-            # Re-enable buttons
-            self.after(0, lambda: self.status_label.config(text="Reinstall complete. Refresh list to see updates."))
-            self.after(0, lambda: self.reinstall_button.config(state=tk.NORMAL))
-            self.after(0, lambda: self.reload_button.config(state=tk.NORMAL))
\ No newline at end of file
+            self.status_label.config(text="Reinstall failed. Try again.")
+            self.reinstall_button.config(state=tk.NORMAL)
+            self.reload_button.config(state=tk.NORMAL)
+            return
+        
+        success_count, failed_count, statuses = job.result
+        for app_name, is_installed in statuses.items():
+            self.update_app_status(app_name, is_installed)
+        
+        messagebox.showinfo(
+            "Reinstall Complete",
+            f"Successfully reinstalled {success_count} app(s).\n"
+            f"Failed to reinstall {failed_count} app(s)."
+        )
+        
+        # Reload app list to show updated status
+        self._start_load_thread()
+        
+        # Re-enable buttons
+        self.status_label.config(text="Reinstall complete. Refresh list to see updates.")
+        self.reinstall_button.config(state=tk.NORMAL)
+        self.reload_button.config(state=tk.NORMAL)
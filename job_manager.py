@@ -0,0 +1,343 @@
+import heapq
+import itertools
+import logging
+import threading
+
+# Job priorities; lower runs first
+PRIORITY_USER = 0
+PRIORITY_BACKGROUND = 10
+
+# Worker threads. The work is mostly waiting on PowerShell and the AppX
+# deployment service, which runs one deployment at a time anyway; two workers
+# keep a status poll from waiting behind a long removal without starting
+# more deployments side by side.
+DEFAULT_WORKERS = 2
+
+# Resource of every job that changes the installed packages or makes a
+# restore point (removals, reinstalls, resuming). The AppX deployment service
+# and restore points don't tolerate overlapping changes, so such jobs run one
+# at a time whatever their keys.
+PACKAGES_RESOURCE = "packages"
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_local = threading.local()
+
+class JobCancelled(Exception):
+    """Raised by check_cancelled() and by Job.wait() for a cancelled job."""
+
+def current_job():
+    """Get the job the calling worker thread is running, or None."""
+    return getattr(_local, "job", None)
+
+def check_cancelled():
+    """Stop a running job whose cancellation was requested.
+    
+    Long jobs call this between steps; a job can't be interrupted halfway
+    through a PowerShell command.
+    
+    Raises:
+        JobCancelled: If the current job was asked to cancel
+    """
+    job = current_job()
+    if job is not None and job.cancel_requested:
+        raise JobCancelled(job.key)
+
+def on_main_thread(widget, callback):
+    """Wrap a done callback so it runs on the Tk main thread.
+    
+    Args:
+        widget (tk.Misc): Any widget of the window
+        callback (callable): Called as callback(job)
+    
+    Returns:
+        callable: Done callback for Job.add_done_callback
+    """
+    return lambda job: widget.after(0, lambda: callback(job))
+
+class Job:
+    """One piece of submitted work, shared by every submission of its key.
+    
+    Attributes:
+        key (str): Deduplication key
+        priority (int): Current priority (PRIORITY_USER, PRIORITY_BACKGROUND)
+        resource (str): Resource the job holds while it runs, or None
+        state (str): QUEUED, RUNNING, DONE, FAILED or CANCELLED
+        result: Return value of the function once DONE
+        error (Exception): Exception the function raised once FAILED
+        joined (int): Submissions that joined the job while it was in flight
+    """
+    def __init__(self, manager, key, func, args, kwargs, priority, resource=None):
+        self.key = key
+        self.priority = priority
+        self.resource = resource
+        self.state = QUEUED
+        self.result = None
+        self.error = None
+        self.joined = 0
+        self._manager = manager
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._callbacks = []
+        self._done = threading.Event()
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+    
+    @property
+    def done(self):
+        """True once the job finished, failed or was cancelled."""
+        return self._done.is_set()
+    
+    @property
+    def cancelled(self):
+        return self.state == CANCELLED
+    
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+    
+    def cancel(self):
+        """Cancel the job (see JobManager.cancel)."""
+        return self._manager.cancel(self)
+    
+    def add_done_callback(self, callback):
+        """Call callback(job) once the job is over, right away if it already is.
+        
+        Callbacks run on the worker thread; GUI code wraps them with
+        on_main_thread.
+        """
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        _run_callback(callback, self)
+    
+    def wait(self, timeout=None):
+        """Wait for the job and get its result.
+        
+        Args:
+            timeout (float): Seconds to wait, or None to wait until it is over
+        
+        Returns:
+            The function's return value
+        
+        Raises:
+            TimeoutError: If the job is still in flight after timeout
+            JobCancelled: If the job was cancelled
+            Exception: Whatever the function raised
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Job {self.key} is still {self.state}")
+        if self.state == CANCELLED:
+            raise JobCancelled(self.key)
+        if self.state == FAILED:
+            raise self.error
+        return self.result
+    
+    def _complete(self):
+        """Mark the job over and run its callbacks (state is already set)"""
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            _run_callback(callback, self)
+
+def _run_callback(callback, job):
+    try:
+        callback(job)
+    except Exception as e:
+        logging.error(f"Error in done callback of job {job.key}: {str(e)}")
+
+class JobManager:
+    """Bounded worker pool with keyed single-flight jobs and priorities.
+    
+    A submission whose key is already queued or running joins that job
+    instead of starting the work again, so a double click or an overlapping
+    refresh shares one PowerShell run and every submitter gets its result.
+    Queued jobs run lowest priority first, in submission order within a
+    priority; a user action submitted while background polls are queued
+    runs before them, and joining a queued job with a more urgent priority
+    raises the job's priority. Jobs that name the same resource never run at
+    the same time: a queued job waits, without taking a worker, until the
+    job holding its resource is over.
+    """
+    def __init__(self, max_workers=DEFAULT_WORKERS):
+        """
+        Args:
+            max_workers (int): Most jobs running at once
+        """
+        self.max_workers = max_workers
+        self._cond = threading.Condition()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._jobs = {}
+        self._workers = []
+        self._idle = 0
+        self._busy_resources = set()
+        self._shutdown = False
+    
+    def submit(self, key, func, *args, priority=PRIORITY_USER, on_done=None, resource=None, **kwargs):
+        """Run func(*args, **kwargs) on a worker, or join the job already in flight for key.
+        
+        Args:
+            key (str): Deduplication key; submissions with the same key while
+                a job is queued or running share it
+            func (callable): Work to run
+            priority (int): PRIORITY_USER or PRIORITY_BACKGROUND (lower runs first)
+            on_done (callable): Optional done callback, see Job.add_done_callback
+            resource (str): Resource the job must hold alone while it runs
+                (e.g. PACKAGES_RESOURCE), or None
+        
+        Returns:
+            Job: The new job, or the in-flight job that was joined
+        
+        Raises:
+            RuntimeError: If the manager was shut down
+        """
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("The job manager has been shut down")
+            job = self._jobs.get(key)
+            if job is not None and not job.cancel_requested:
+                job.joined += 1
+                if job.state == QUEUED and priority < job.priority:
+                    # The older heap entry is skipped once it no longer matches
+                    job.priority = priority
+                    heapq.heappush(self._queue, (priority, next(self._sequence), job))
+            else:
+                job = Job(self, key, func, args, kwargs, priority, resource)
+                self._jobs[key] = job
+                heapq.heappush(self._queue, (priority, next(self._sequence), job))
+                queued = sum(1 for queued_job in self._jobs.values() if queued_job.state == QUEUED)
+                if self._idle < queued and len(self._workers) < self.max_workers:
+                    worker = threading.Thread(target=self._work, name=f"job-worker-{len(self._workers) + 1}", daemon=True)
+                    self._workers.append(worker)
+                    worker.start()
+                self._cond.notify()
+        if on_done is not None:
+            job.add_done_callback(on_done)
+        return job
+    
+    def get(self, key):
+        """Get the queued or running job for key, or None."""
+        with self._cond:
+            return self._jobs.get(key)
+    
+    def cancel(self, job_or_key):
+        """Cancel a job.
+        
+        A queued job is dropped and finishes as CANCELLED right away. A
+        running job is only asked to stop: it ends as CANCELLED if it calls
+        check_cancelled() before it is done, and later submissions of its key
+        start a fresh job instead of joining it.
+        
+        Args:
+            job_or_key (Job or str): The job, or the key of the in-flight job
+        
+        Returns:
+            bool: True if a job in flight was cancelled or asked to stop
+        """
+        with self._cond:
+            job = job_or_key if isinstance(job_or_key, Job) else self._jobs.get(job_or_key)
+            if job is None or job.done or job.cancel_requested:
+                return False
+            job._cancel.set()
+            dropped = job.state == QUEUED
+            if dropped:
+                job.state = CANCELLED
+                self._forget(job)
+        if dropped:
+            job._complete()
+        return True
+    
+    def shutdown(self):
+        """Cancel the queued jobs and stop the workers once they are idle.
+        
+        Running jobs are asked to stop; the workers are daemon threads, so
+        they never keep the process alive.
+        """
+        with self._cond:
+            self._shutdown = True
+            jobs = list(self._jobs.values())
+            self._cond.notify_all()
+        for job in jobs:
+            self.cancel(job)
+    
+    def _forget(self, job):
+        """Drop the key of a job that is over (lock held)"""
+        if self._jobs.get(job.key) is job:
+            del self._jobs[job.key]
+    
+    def _next_job(self):
+        """Pop the most urgent queued job whose resource is free, dropping stale heap entries (lock held)"""
+        waiting = []
+        found = None
+        while self._queue:
+            entry = heapq.heappop(self._queue)
+            priority, _, job = entry
+            if job.state != QUEUED or priority != job.priority:
+                continue
+            if job.resource is not None and job.resource in self._busy_resources:
+                waiting.append(entry)
+                continue
+            found = job
+            break
+        for entry in waiting:
+            heapq.heappush(self._queue, entry)
+        if found is not None and found.resource is not None:
+            self._busy_resources.add(found.resource)
+        return found
+    
+    def _work(self):
+        """Worker thread: run queued jobs until shutdown"""
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    if self._shutdown:
+                        return
+                    self._idle += 1
+                    self._cond.wait()
+                    self._idle -= 1
+                    job = self._next_job()
+                job.state = RUNNING
+            
+            _local.job = job
+            try:
+                result = job._func(*job._args, **job._kwargs)
+                state, error = DONE, None
+            except JobCancelled:
+                result, state, error = None, CANCELLED, None
+            except Exception as e:
+                logging.error(f"Job {job.key} failed: {str(e)}")
+                result, state, error = None, FAILED, e
+            finally:
+                _local.job = None
+            
+            with self._cond:
+                job.result = result
+                job.error = error
+                job.state = state
+                self._forget(job)
+                if job.resource is not None:
+                    # Jobs waiting for the resource can start now
+                    self._busy_resources.discard(job.resource)
+                    self._cond.notify_all()
+            job._complete()
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+def get_job_manager():
+    """Get the process-wide job manager, creating it on first use."""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager()
+        return _job_manager
@@ -1,13 +1,21 @@
+import time
+_IMPORTS_STARTED = time.perf_counter()
 import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 import logging
-import threading
 import sys
-from gui_components import AppSelectionFrame, RestorePointFrame, CPURamMonitor, AppReinstallFrame
-from app_actions import SELECTABLE_APPS, APPS, remove_unneeded_apps
-from restore import create_restore_point
-from unused_apps_frame import UnusedAppsFrame  
+import atexit
+from job_manager import get_job_manager, on_main_thread, PACKAGES_RESOURCE
+
+# Time spent importing the modules the window needs before it can show; the
+# tab frames, the PowerShell-backed modules (app_actions, restore,
+# status_poller, operation_journal) and psutil are imported when first used
+IMPORT_SECONDS = time.perf_counter() - _IMPORTS_STARTED
+
+# Seconds the window may take to show before startup logs a warning
+# (tests/test_startup.py holds the imports to it)
+STARTUP_BUDGET = 1.0
 
 # Setup logging
 try:
@@ -26,6 +34,7 @@ except Exception as e:
 class GamingDebloaterApp(tk.Tk):
     def __init__(self):
         try:
+            init_started = time.perf_counter()
             super().__init__()
             self.title("Gaming Debloater")
             self.geometry("950x580")
@@ -56,10 +65,6 @@ class GamingDebloaterApp(tk.Tk):
             self.sidebar_frame = tk.Frame(self.main_frame, bg="#e0e0e0", width=200)
             self.sidebar_frame.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 20))
             
-            # CPU and RAM monitor
-            self.system_monitor = CPURamMonitor(self.sidebar_frame)
-            self.system_monitor.pack(fill=tk.Y, expand=True)
-            
             # Right content area with notebook for tabs
             self.content_frame = tk.Frame(self.main_frame, bg="#e0e0e0")
             self.content_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
@@ -71,37 +76,15 @@ class GamingDebloaterApp(tk.Tk):
             self.notebook = ttk.Notebook(self.content_frame)
             self.notebook.pack(fill=tk.BOTH, expand=True)
             
-            # Tab 1: One Click Delete
-            self.one_click_tab = tk.Frame(self.notebook, bg="#d4d4d4")
-            self.notebook.add(self.one_click_tab, text="One Click Delete")
-            self.setup_one_click_panel()
-            
-            # Tab 2: Selective Removal
-            self.removal_tab = tk.Frame(self.notebook, bg="#d4d4d4")
-            self.notebook.add(self.removal_tab, text="Selective Removal")
-            
-            # Selective Removal panel
-            self.app_selection = AppSelectionFrame(
-                self.removal_tab, 
-                apps=SELECTABLE_APPS, 
-                app_descriptions=APPS
-            )
-            self.app_selection.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+            # Each tab starts empty and is built the first time it is selected,
+            # so its imports and scans wait until the user opens it
+            self.tab_builders = {}
+            self.one_click_tab = self._add_tab("One Click Delete", self.setup_one_click_panel)
+            self.removal_tab = self._add_tab("Selective Removal", self.setup_removal_panel)
+            self.reinstall_tab = self._add_tab("Selective Reinstall", self.setup_reinstall_panel)
+            self.unused_tab = self._add_tab("Unused Apps", self.setup_unused_panel)
+            self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
             
-            # Tab 3: Selective Reinstall
-            self.reinstall_tab = tk.Frame(self.notebook, bg="#d4d4d4")
-            self.notebook.add(self.reinstall_tab, text="Selective Reinstall")
-            
-            # Selective Reinstall panel
-            self.app_reinstall = AppReinstallFrame(self.reinstall_tab)
-            self.app_reinstall.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-            
-            self.unused_tab = tk.Frame(self.notebook, bg="#d4d4d4")
-            self.notebook.add(self.unused_tab, text="Unused Apps")
-
-            # Unused Apps panel
-            self.unused_apps = UnusedAppsFrame(self.unused_tab, days_threshold=90)
-            self.unused_apps.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
             # Add status bar
             self.status_bar = tk.Label(
                 self, 
@@ -114,18 +97,114 @@ class GamingDebloaterApp(tk.Tk):
             )
             self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
             
-            # Start updating system monitor
-            self.update_system_info()
+            # Build the tab that is showing, then draw the window
+            self._build_tab(self.one_click_tab)
+            widgets_done = time.perf_counter()
+            self.update_idletasks()
+            paint_done = time.perf_counter()
+            self.startup_timings = {
+                "imports": IMPORT_SECONDS,
+                "widgets": widgets_done - init_started,
+                "first_paint": paint_done - widgets_done
+            }
             
-            # Start checking app installation statuses
-            self.check_app_statuses()
+            # Everything else starts once the window is up
+            self.after(0, self._start_background_work)
             
             # Log application start
             logging.info("Application started")
+            log_startup_report(self.startup_timings)
         except Exception as e:
             logging.error(f"Error initializing application: {str(e)}")
             messagebox.showerror("Initialization Error", f"Error initializing the application: {str(e)}")
     
+    def _add_tab(self, text, builder):
+        """Add an empty tab whose contents builder() creates on first selection"""
+        tab = tk.Frame(self.notebook, bg="#d4d4d4")
+        self.notebook.add(tab, text=text)
+        self.tab_builders[str(tab)] = builder
+        return tab
+    
+    def _on_tab_changed(self, event=None):
+        """Build the newly selected tab if this is its first showing"""
+        try:
+            self._build_tab(self.notebook.select())
+        except Exception as e:
+            logging.error(f"Error switching tabs: {str(e)}")
+    
+    def _build_tab(self, tab):
+        """Run a tab's builder once and log how long it took"""
+        builder = self.tab_builders.pop(str(tab), None)
+        if builder is None:
+            return
+        started = time.perf_counter()
+        builder()
+        logging.info(f"Built tab {self.notebook.tab(tab, 'text')!r} in {time.perf_counter() - started:.3f}s")
+    
+    def _start_background_work(self):
+        """Start the session pool, the system monitor and the status poller once the window is up"""
+        # Keep PowerShell hosts warm instead of starting one per command; each
+        # host starts with the first command it runs
+        if os.name == 'nt':
+            try:
+                from powershell_utils import enable_session_pool, disable_session_pool
+                enable_session_pool()
+                atexit.register(disable_session_pool)
+            except Exception as e:
+                logging.error(f"Error starting the PowerShell session pool: {str(e)}")
+        
+        try:
+            # CPU and RAM monitor, fed by a background sampler
+            from gui_components import CPURamMonitor
+            from system_sampler import SystemSampler
+            self.system_sampler = SystemSampler(interval=2.0)
+            self.system_sampler.start()
+            self.system_monitor = CPURamMonitor(self.sidebar_frame, sampler=self.system_sampler)
+            self.system_monitor.pack(fill=tk.Y, expand=True)
+            
+            # Start updating system monitor
+            self.update_system_info()
+        except Exception as e:
+            logging.error(f"Error starting system monitor: {str(e)}")
+        
+        # Start checking app installation statuses
+        self.check_app_statuses()
+        
+        # Offer to finish a removal or reinstall cut short by a crash
+        self.offer_resume()
+    
+    def offer_resume(self):
+        """Ask whether to resume operations left unfinished by an earlier run"""
+        try:
+            from operation_journal import get_journal, describe_interrupted, resume_interrupted
+            from powershell_utils import is_admin
+            
+            # Resuming needs admin rights; an elevated instance will offer it
+            interrupted = get_journal().interrupted()
+            if not interrupted or not is_admin():
+                return
+            response = messagebox.askyesno(
+                "Resume Interrupted Work",
+                "An earlier run stopped before it finished:\n\n"
+                + "\n".join(describe_interrupted(interrupted))
+                + "\n\nFinish the remaining apps now?"
+            )
+            if response:
+                self.status_bar.config(text="Resuming interrupted work...")
+                get_job_manager().submit("resume", resume_interrupted, on_done=on_main_thread(self, self._resume_complete),
+                                         resource=PACKAGES_RESOURCE)
+        except Exception as e:
+            logging.error(f"Error checking for interrupted work: {str(e)}")
+    
+    def _resume_complete(self, job):
+        """Report the resumed operations (called on main thread)"""
+        if job.error is not None:
+            logging.error(f"Error resuming interrupted work: {str(job.error)}")
+            self.status_bar.config(text=f"Error: {str(job.error)[:50]}...")
+        elif job.result is not None:
+            count = len(job.result["remove"]) + len(job.result["reinstall"])
+            self.status_bar.config(text=f"Resumed interrupted work for {count} apps")
+    
     def setup_styles(self):
         """Set up custom styles for the application."""
         try:
@@ -202,12 +281,36 @@ class GamingDebloaterApp(tk.Tk):
             delete_button.pack(pady=10)
             
             # Add restore point frame
+            from gui_components import RestorePointFrame
             self.restore_frame = RestorePointFrame(self.one_click_tab)
             self.restore_frame.pack(fill=tk.X, pady=20)
         except Exception as e:
             logging.error(f"Error setting up one-click panel: {str(e)}")
             messagebox.showerror("Setup Error", f"Error setting up one-click panel: {str(e)}")
 
+    def setup_removal_panel(self):
+        """Set up the Selective Removal panel"""
+        from gui_components import AppSelectionFrame
+        from app_actions import SELECTABLE_APPS, CATALOG
+        self.app_selection = AppSelectionFrame(
+            self.removal_tab, 
+            apps=SELECTABLE_APPS, 
+            catalog=CATALOG
+        )
+        self.app_selection.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+    
+    def setup_reinstall_panel(self):
+        """Set up the Selective Reinstall panel; it loads the app list when built"""
+        from gui_components import AppReinstallFrame
+        self.app_reinstall = AppReinstallFrame(self.reinstall_tab)
+        self.app_reinstall.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+    
+    def setup_unused_panel(self):
+        """Set up the Unused Apps panel; it starts its scan when built"""
+        from unused_apps_frame import UnusedAppsFrame
+        self.unused_apps = UnusedAppsFrame(self.unused_tab, days_threshold=90)
+        self.unused_apps.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+    
     def one_click_delete(self):
         """Handle one-click delete functionality"""
         try:
@@ -221,31 +324,37 @@ class GamingDebloaterApp(tk.Tk):
                 # Update status
                 self.status_bar.config(text="Removing bloatware...")
                 
-                # Run in a separate thread to avoid freezing UI
-                threading.Thread(target=self._run_one_click_delete, daemon=True).start()
+                # Run in the background to avoid freezing UI; clicking again joins this run
+                get_job_manager().submit(
+                    "remove_unneeded",
+                    self._run_one_click_delete,
+                    on_done=on_main_thread(self, self._one_click_delete_complete),
+                    resource=PACKAGES_RESOURCE
+                )
         except Exception as e:
             logging.error(f"Error in one_click_delete: {str(e)}")
             messagebox.showerror("Error", f"Error initiating one-click delete: {str(e)}")
     
     def _run_one_click_delete(self):
-        """Execute one-click delete in a separate thread"""
-        try:
-            # Create restore point first
-            create_restore_point()
-            
-            # Call the actual removal function
-            success = remove_unneeded_apps()
-            
-            # Update UI on main thread
-            self.after(0, lambda: self._one_click_delete_complete(success))
-        except Exception as e:
-            logging.error(f"Error running one-click delete: {str(e)}")
-            self.after(0, lambda: self.status_bar.config(text=f"Error: {str(e)[:50]}..."))
-            self.after(0, lambda: messagebox.showerror("Error", f"Error running one-click delete: {str(e)}"))
+        """Execute one-click delete (runs as a background job)"""
+        from app_actions import remove_unneeded_apps
+        from restore import create_restore_point
+        
+        # Create restore point first
+        create_restore_point()
+        
+        # Call the actual removal function
+        return remove_unneeded_apps()
     
-    def _one_click_delete_complete(self, success):
-        """Handle completion of one-click delete"""
-        if success:
+    def _one_click_delete_complete(self, job):
+        """Handle completion of one-click delete (called on main thread)"""
+        if job.error is not None:
+            logging.error(f"Error running one-click delete: {str(job.error)}")
+            self.status_bar.config(text=f"Error: {str(job.error)[:50]}...")
+            messagebox.showerror("Error", f"Error running one-click delete: {str(job.error)}")
+        elif job.cancelled:
+            self.status_bar.config(text="Bloatware removal cancelled")
+        elif job.result:
             self.status_bar.config(text="Bloatware removal complete")
             messagebox.showinfo("Deletion Complete", "All selected bloatware categories have been removed successfully.")
         else:
@@ -256,51 +365,47 @@ class GamingDebloaterApp(tk.Tk):
         """Update system information periodically"""
         try:
             self.system_monitor.update_values()
-            # Update every 2 seconds
-            self.after(2000, self.update_system_info)
+            # Update once per sample
+            self.after(int(self.system_sampler.interval * 1000), self.update_system_info)
         except Exception as e:
             logging.error(f"Error updating system info: {str(e)}")
             # Try again after a delay
             self.after(5000, self.update_system_info)
     
     def check_app_statuses(self):
-        """Periodically check app installation statuses"""
+        """Start watching app installation statuses for the reinstall tab"""
         try:
-            # Only run if reinstall tab has been initialized
-            if hasattr(self, 'app_reinstall'):
-                # Start background thread to check statuses
-                threading.Thread(target=self._check_app_statuses_thread, daemon=True).start()
-            
-            # Schedule next check (every 15 seconds)
-            self.after(15000, self.check_app_statuses)
+            # Only push changes for rows the reinstall frame is showing
+            from status_poller import StatusPoller
+            self.status_poller = StatusPoller(self, self._current_app_statuses, self._on_app_status_changed)
+            self.status_poller.start()
         except Exception as e:
-            logging.error(f"Error scheduling status check: {str(e)}")
-            # Try again after a delay
-            self.after(30000, self.check_app_statuses)
+            logging.error(f"Error starting status poller: {str(e)}")
     
-    def _check_app_statuses_thread(self):
-        """Background thread to check app installation statuses"""
-        try:
-            # Only proceed if the reinstall frame exists and is populated
-            if hasattr(self, 'app_reinstall') and hasattr(self.app_reinstall, 'available_apps') and self.app_reinstall.available_apps:
-                # For each app in the reinstall frame
-                for app_name in list(self.app_reinstall.available_apps.keys()):
-                    # Import here to avoid circular imports
-                    from restore import check_app_installed
-                    
-                    # Check current installation status
-                    is_installed = check_app_installed(app_name)
-                    
-                    # Get the current stored status
-                    current_status = self.app_reinstall.available_apps.get(app_name, {}).get("installed", False)
-                    
-                    # Only update if status has changed
-                    if is_installed != current_status:
-                        # Update UI on main thread
-                        self.after(0, lambda app=app_name, status=is_installed: 
-                                  self.app_reinstall.update_app_status(app, status))
-        except Exception as e:
-            logging.error(f"Error checking app statuses: {str(e)}")
+    def _current_app_statuses(self):
+        """Get {app_name: installed} for the apps shown in the reinstall tab"""
+        if not hasattr(self, 'app_reinstall') or not getattr(self.app_reinstall, 'available_apps', None):
+            return {}
+        return {app_name: app_info.get("installed", False)
+                for app_name, app_info in self.app_reinstall.available_apps.items()}
+    
+    def _on_app_status_changed(self, app_name, is_installed):
+        """Update one row whose installation status changed"""
+        if hasattr(self, 'app_reinstall'):
+            self.app_reinstall.update_app_status(app_name, is_installed)
+
+def log_startup_report(timings, budget=STARTUP_BUDGET):
+    """Log how long each startup phase took and warn when over budget.
+    
+    Args:
+        timings (dict): Seconds per phase: "imports", "widgets", "first_paint"
+        budget (float): Seconds allowed until the window is drawn
+    """
+    total = sum(timings.values())
+    phases = ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in timings.items())
+    logging.info(f"Startup: {phases} (total {total:.3f}s)")
+    if total > budget:
+        logging.warning(f"Startup took {total:.3f}s, over the {budget:.1f}s budget")
 
 def show_error_and_exit(message):
     """Show error message and exit application"""
@@ -311,9 +416,13 @@ def show_error_and_exit(message):
 
 if __name__ == "__main__":
     try:
-        # Configure custom styles for the app
+        # Configure custom styles for the app; PowerShell work, the session
+        # pool included, starts once the window is up
         app = GamingDebloaterApp()
         app.mainloop()
+        
+        # Drop background work still queued; running jobs are on daemon threads
+        get_job_manager().shutdown()
     except Exception as e:
         error_message = f"Critical application error: {str(e)}"
         show_error_and_exit(error_message)
\ No newline at end of file
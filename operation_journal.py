@@ -0,0 +1,355 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from app_data import data_path
+from result_protocol import is_start_record
+
+# Append-only record of the steps of each removal and reinstall (in the data directory)
+JOURNAL_FILE = "operations_journal.jsonl"
+
+# Compacted outcome of the finished operations
+SUMMARY_FILE = "operations_summary.json"
+
+# Finished operations kept in the summary file
+SUMMARY_LIMIT = 50
+
+# Step name of an app's own package in a removal, and of the app in a reinstall
+PACKAGE_STEP = "package"
+REINSTALL_STEP = "reinstall"
+
+class OperationJournal:
+    """Crash-safe journal of the planned, started and finished steps of each operation.
+    
+    Every record is one JSON line, flushed and fsync'd as soon as the batch
+    script reports the app or step it describes (see RecordJournaler), so
+    the journal still says which apps and registry keys were done if the
+    process dies halfway. A
+    torn last line from a crash mid-write is ignored when reading.
+    
+    Records: {"op", "event", "time", ...} where the event is
+        "planned"  - "kind" ("remove" or "reinstall") and "steps" {app: [step, ...]}
+        "started"  - "steps" {app: [step, ...]} the script started on
+        "finished" - "app", "step", "ok" and "message" of one step
+        "ended"    - "status" ("completed", "resumed" or "cancelled")
+    
+    Once an operation has ended, compact() moves it out of the journal into
+    the summary file, so the journal only ever holds unfinished operations.
+    """
+    def __init__(self, path=None, summary_path=None):
+        """
+        Args:
+            path (str): Journal file, or None for JOURNAL_FILE in the data directory
+            summary_path (str): Summary file for compacted operations, or None
+                for SUMMARY_FILE in the data directory
+        """
+        self.path = path or data_path(JOURNAL_FILE)
+        self.summary_path = summary_path or data_path(SUMMARY_FILE)
+        self._lock = threading.Lock()
+    
+    # Writing
+    
+    def begin(self, kind, steps):
+        """Record a new operation and its planned steps.
+        
+        Args:
+            kind (str): "remove" or "reinstall"
+            steps (dict): app_name -> list of step names
+        
+        Returns:
+            str: Operation id for the other calls
+        """
+        op_id = uuid.uuid4().hex[:12]
+        self._append([{"op": op_id, "event": "planned", "kind": kind, "steps": steps}])
+        return op_id
+    
+    def started(self, op_id, steps):
+        """Record that steps ({app_name: [step, ...]}) started running."""
+        self._append([{"op": op_id, "event": "started", "steps": steps}])
+    
+    def finished(self, op_id, outcomes):
+        """Record the outcome of steps that ran.
+        
+        Args:
+            op_id (str): Operation id from begin()
+            outcomes (list): (app_name, step, ok, message) tuples
+        """
+        self._append([
+            {"op": op_id, "event": "finished", "app": app_name, "step": step, "ok": bool(ok), "message": message or ""}
+            for app_name, step, ok, message in outcomes
+        ])
+    
+    def end(self, op_id, status="completed"):
+        """Record that an operation is over and compact the journal."""
+        self._append([{"op": op_id, "event": "ended", "status": status}])
+        self.compact()
+    
+    def _append(self, records):
+        """Write records as JSON lines and fsync them before returning"""
+        if not records:
+            return
+        now = time.time()
+        lines = "".join(json.dumps(dict(record, time=now), separators=(",", ":")) + "\n" for record in records)
+        with self._lock:
+            try:
+                with open(self.path, "a+b") as f:
+                    # Start on a fresh line if a crash left the last one torn
+                    f.seek(0, os.SEEK_END)
+                    if f.tell():
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b"\n":
+                            lines = "\n" + lines
+                    f.write(lines.encode("utf-8"))
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                # The operation itself must not fail because its journal can't be written
+                logging.error(f"Could not write operation journal {self.path}: {str(e)}")
+    
+    # Reading
+    
+    def operations(self):
+        """Fold the journal into one entry per operation.
+        
+        Returns:
+            dict: op_id -> {"kind", "planned" (time), "steps" {app: [step]},
+                  "started" set of (app, step), "outcomes" {(app, step): (ok, message)},
+                  "ended" (status or None)}
+        """
+        with self._lock:
+            return _fold(self._read())
+    
+    def interrupted(self, kind=None):
+        """Find the operations that never ended and the steps they have left.
+        
+        A step is left if it has no outcome: it was either never started or
+        cut off while running. Steps that failed did run, so they are not
+        retried.
+        
+        Args:
+            kind (str): Only operations of this kind, or None for all
+        
+        Returns:
+            list: {"op", "kind", "planned", "pending" {app: [step, ...]},
+                  "done", "failed"} for each unfinished operation, oldest first
+        """
+        interrupted = []
+        for op_id, op in self.operations().items():
+            if op["ended"] or (kind is not None and op["kind"] != kind):
+                continue
+            pending = {}
+            for app_name, steps in op["steps"].items():
+                left = [step for step in steps if (app_name, step) not in op["outcomes"]]
+                if left:
+                    pending[app_name] = left
+            interrupted.append({
+                "op": op_id,
+                "kind": op["kind"],
+                "planned": op["planned"],
+                "pending": pending,
+                "done": sum(1 for ok, _ in op["outcomes"].values() if ok),
+                "failed": sum(1 for ok, _ in op["outcomes"].values() if not ok)
+            })
+        return interrupted
+    
+    def summary(self):
+        """Get the compacted operations, oldest first."""
+        try:
+            with open(self.summary_path, "r", encoding="utf-8") as f:
+                return json.load(f).get("operations", [])
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable operation summary {self.summary_path}: {str(e)}")
+            return []
+    
+    def _read(self):
+        """Parse the journal lines, skipping a torn or corrupt line"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return []
+        except OSError as e:
+            logging.error(f"Could not read operation journal {self.path}: {str(e)}")
+            return []
+        
+        records = []
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                logging.warning(f"Skipping unreadable line {number} of {self.path}")
+        return records
+    
+    # Compaction
+    
+    def compact(self):
+        """Move the ended operations into the summary file.
+        
+        The summary is replaced before the journal, each through a synced
+        temporary file, so a crash in between at worst leaves an operation in
+        both files; it is summarized once by its id.
+        """
+        with self._lock:
+            records = self._read()
+            operations = _fold(records)
+            ended = [op_id for op_id, op in operations.items() if op["ended"]]
+            if not ended:
+                return
+            
+            summary = [entry for entry in self.summary() if entry.get("op") not in operations]
+            summary += [_summarize(op_id, operations[op_id]) for op_id in ended]
+            try:
+                _write_synced(self.summary_path, json.dumps({"operations": summary[-SUMMARY_LIMIT:]}, indent=2) + "\n")
+                kept = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records if record.get("op") not in ended)
+                _write_synced(self.path, kept)
+            except OSError as e:
+                logging.error(f"Could not compact operation journal {self.path}: {str(e)}")
+
+class RecordJournaler:
+    """Journals the records of one batch script as the script writes them.
+    
+    Passed as the on_record callback of result_protocol.run_record_script: an
+    app's start record marks its steps started and each outcome record is
+    journaled as soon as it arrives, so a crash part way through a chunk
+    leaves only the unreported steps pending.
+    """
+    def __init__(self, journal, op_id, steps, step=None):
+        """
+        Args:
+            journal (OperationJournal): Journal to write to
+            op_id (str): Operation id from begin()
+            steps (dict): app_name -> planned steps of the script's apps
+            step (str): Step every outcome record stands for (REINSTALL_STEP),
+                or None to take it from the record's "step"
+        """
+        self.journal = journal
+        self.op_id = op_id
+        self.steps = steps
+        self.step = step
+        self.reported = set()
+    
+    def __call__(self, record):
+        app_name = record.get("app")
+        if app_name not in self.steps:
+            return
+        if is_start_record(record):
+            self.journal.started(self.op_id, {app_name: self.steps[app_name]})
+            return
+        step = self.step or record.get("step")
+        self.reported.add((app_name, step))
+        self.journal.finished(self.op_id, [(app_name, step, record.get("ok"), record.get("message"))])
+    
+    def finish(self, outcomes):
+        """Journal the outcomes ((app_name, step, ok, message) tuples) the script did not report itself."""
+        self.journal.finished(self.op_id, [outcome for outcome in outcomes if outcome[:2] not in self.reported])
+
+def _fold(records):
+    """Group journal records by operation"""
+    operations = {}
+    for record in records:
+        op_id = record.get("op")
+        event = record.get("event")
+        if event == "planned":
+            operations[op_id] = {
+                "kind": record.get("kind"),
+                "planned": record.get("time"),
+                "steps": record.get("steps", {}),
+                "started": set(),
+                "outcomes": {},
+                "ended": None
+            }
+            continue
+        op = operations.get(op_id)
+        if op is None:
+            continue
+        if event == "started":
+            for app_name, steps in record.get("steps", {}).items():
+                op["started"].update((app_name, step) for step in steps)
+        elif event == "finished":
+            op["outcomes"][(record.get("app"), record.get("step"))] = (record.get("ok", False), record.get("message", ""))
+        elif event == "ended":
+            op["ended"] = record.get("status", "completed")
+    return operations
+
+def _summarize(op_id, op):
+    """Small summary entry for an ended operation"""
+    failed = sorted({app_name for (app_name, _), (ok, _) in op["outcomes"].items() if not ok})
+    return {
+        "op": op_id,
+        "kind": op["kind"],
+        "planned": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(op["planned"] or 0)),
+        "status": op["ended"],
+        "apps": len(op["steps"]),
+        "steps_done": sum(1 for ok, _ in op["outcomes"].values() if ok),
+        "steps_failed": sum(1 for ok, _ in op["outcomes"].values() if not ok),
+        "failed_apps": failed
+    }
+
+def _write_synced(path, text):
+    """Replace a file atomically with text that has reached the disk"""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+_journal = None
+_journal_lock = threading.Lock()
+
+def get_journal():
+    """Get the session's operation journal."""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = OperationJournal()
+        return _journal
+
+def describe_interrupted(interrupted):
+    """One line per unfinished operation, for prompts and logs."""
+    lines = []
+    for op in interrupted:
+        action = "removal" if op["kind"] == "remove" else "reinstall"
+        planned = time.strftime("%Y-%m-%d %H:%M", time.localtime(op["planned"] or 0))
+        lines.append(f"Interrupted {action} from {planned}: {len(op['pending'])} apps left ({', '.join(op['pending'])})")
+    return lines
+
+def resume_interrupted(journal=None):
+    """Finish the unfinished operations, running only their pending steps.
+    
+    Removals rerun the apps with steps left; packages that are already gone
+    resolve to nothing, so only their remaining registry keys are cleaned up.
+    Reinstalls rerun the apps that are still missing. Each resumed operation
+    ends as "resumed" and its remaining work is journaled as a new operation.
+    
+    Returns:
+        dict: {"remove": {app: result}, "reinstall": {app: result}} from the
+              batch engines (assumes admin was already checked)
+    """
+    from app_actions import remove_apps_batch
+    from restore import reinstall_apps_batch
+    from app_inventory import get_inventory
+    
+    journal = journal or get_journal()
+    results = {"remove": {}, "reinstall": {}}
+    for op in journal.interrupted():
+        logging.info(describe_interrupted([op])[0])
+        apps = list(op["pending"])
+        if op["kind"] == "reinstall":
+            inventory = get_inventory()
+            apps = [app_name for app_name in apps if inventory is None or not inventory.is_installed(app_name)]
+        
+        if apps and op["kind"] == "remove":
+            results["remove"].update(remove_apps_batch(apps, journal=journal))
+        elif apps and op["kind"] == "reinstall":
+            results["reinstall"].update(reinstall_apps_batch(apps, journal=journal))
+        
+        # Ended only now, so a crash while resuming leaves the work pending
+        journal.end(op["op"], "resumed")
+    return results
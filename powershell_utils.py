@@ -3,6 +3,16 @@ import logging
 import ctypes
 import sys
 import os
+import asyncio
+import base64
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from command_policy import (get_latency_history, infer_command_class, class_policy,
+                            classify_failure, backoff_delay)
+from command_metrics import get_metrics, infer_caller, caller_scope
 
 # Setup basic logging
 logging.basicConfig(
@@ -13,6 +23,10 @@ logging.basicConfig(
 
 def is_admin():
     """Check if the current process has admin privileges."""
+    runner = _command_runner
+    if runner is not None:
+        # A substitute backend decides whether the simulated session is elevated
+        return runner.is_admin()
     try:
         # Make sure we return a proper boolean value
         return ctypes.windll.shell32.IsUserAnAdmin() != 0
@@ -47,118 +61,825 @@ def ensure_admin():
             return False
     return True  # Already admin
 
-def run_powershell(cmd, timeout=120, silent=True):
+# PowerShell loop run by each pooled session host. Requests arrive on stdin as
+# single lines ("###REQ <id> <base64 command>" or "###PING <id>"). While a
+# command runs, each line of its output is sent as "###OUT <id> <base64 line>",
+# so output written before a timeout is not lost; the command then ends with
+# "###RESP <id> <0|1> <base64 error message>". A ping is answered with
+# "###PONG <id>". Base64 keeps multi-line commands and output on one line.
+#
+# Success follows a one-shot "powershell -Command": the command fails if it
+# throws, if its last statement fails ($? is false) or if a native program
+# left a non-zero $LASTEXITCODE. The error message is built from $Error, like
+# the stderr of a one-shot run.
+SESSION_HOST_SCRIPT = r"""
+$ErrorActionPreference = 'Continue'
+$ProgressPreference = 'SilentlyContinue'
+function Send-Frame($text) {
+    [Console]::Out.WriteLine($text)
+    [Console]::Out.Flush()
+}
+function ConvertTo-Base64($text) {
+    [Convert]::ToBase64String([Text.Encoding]::UTF8.GetBytes([string]$text))
+}
+while ($true) {
+    $line = [Console]::In.ReadLine()
+    if ($null -eq $line) { break }
+    $parts = $line.Split(' ')
+    if ($parts[0] -eq '###PING') {
+        Send-Frame "###PONG $($parts[1])"
+        continue
+    }
+    if ($parts[0] -ne '###REQ' -or $parts.Count -lt 3) { continue }
+    $id = $parts[1]
+    $cmd = [Text.Encoding]::UTF8.GetString([Convert]::FromBase64String($parts[2]))
+    $Error.Clear()
+    $global:LASTEXITCODE = 0
+    $global:__lastOk = $true
+    $ok = 1
+    $message = ''
+    try {
+        # The appended statement keeps $? of the command's own last statement
+        $block = [ScriptBlock]::Create($cmd + "`n" + '$global:__lastOk = $?')
+        & $block | Out-String -Stream | ForEach-Object { Send-Frame "###OUT $id $(ConvertTo-Base64 $_)" }
+        if (-not $global:__lastOk -or ($LASTEXITCODE -and $LASTEXITCODE -ne 0)) { $ok = 0 }
+    } catch {
+        $ok = 0
+        $message = $_.Exception.Message
+    }
+    if ($ok -eq 0 -and $Error.Count -gt 0) {
+        $errors = @($Error)
+        [array]::Reverse($errors)
+        $message = ($errors | Out-String)
+    }
+    Send-Frame "###RESP $id $ok $(ConvertTo-Base64 $message)"
+}
+"""
+
+# Default command line used to start a pooled session host
+SESSION_HOST_ARGS = [
+    "powershell",
+    "-NoProfile",
+    "-NonInteractive",
+    "-ExecutionPolicy", "Bypass",
+    "-Command", SESSION_HOST_SCRIPT
+]
+
+# Seconds to wait for the output a stuck host framed before it was stopped
+DRAIN_TIMEOUT = 2
+
+class PowerShellSession:
+    """A long-lived PowerShell host that runs framed commands sent over stdin.
+    
+    The host process is started lazily and restarted automatically if it
+    crashes or a command runs past its timeout.
+    """
+    def __init__(self, host_args=None, silent=True):
+        self.host_args = list(host_args) if host_args else list(SESSION_HOST_ARGS)
+        self.silent = silent
+        self.process = None
+        self._lines = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Start the host process and the thread that reads its responses."""
+        creation_flags = subprocess.CREATE_NO_WINDOW if self.silent and os.name == 'nt' else 0
+        self.process = subprocess.Popen(
+            self.host_args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="ascii",
+            errors="replace",
+            bufsize=1,
+            creationflags=creation_flags
+        )
+        self._lines = queue.Queue()
+        threading.Thread(
+            target=self._read_output,
+            args=(self.process, self._lines),
+            daemon=True
+        ).start()
+        logging.info(f"Started PowerShell session host (pid {self.process.pid})")
+    
+    @staticmethod
+    def _read_output(process, lines):
+        """Forward host stdout lines to the queue; None marks end of stream."""
+        try:
+            for line in process.stdout:
+                lines.put(line.rstrip("\r\n"))
+        except Exception as e:
+            logging.debug(f"PowerShell session reader stopped: {e}")
+        finally:
+            lines.put(None)
+    
+    def is_alive(self):
+        """Check whether the host process is running."""
+        return self.process is not None and self.process.poll() is None
+    
+    def close(self):
+        """Stop the host process."""
+        process, self.process = self.process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=2)
+        except Exception:
+            process.kill()
+            try:
+                process.wait(timeout=2)
+            except Exception:
+                pass
+    
+    def restart(self):
+        """Replace the host process with a fresh one."""
+        logging.warning("Restarting PowerShell session host")
+        self.close()
+        self.start()
+    
+    def _request(self, header, payload, timeout, on_output=None):
+        """Send one framed request and wait for the matching response line.
+        
+        Args:
+            on_output (callable): Called with each output line as it arrives
+        
+        Returns:
+            tuple: (fields, output) - the response fields after the request id
+                   and the output lines the host streamed for the request
+        
+        Raises:
+            subprocess.TimeoutExpired: If no response arrives in time; the host
+                is stopped and the output it streamed is attached
+            RuntimeError: If the host exits before answering
+        """
+        if not self.is_alive():
+            # Crashed or stopped after a timeout - bring up a fresh host
+            self.close()
+            self.start()
+        
+        request_id = str(next(self._ids))
+        line = f"{header} {request_id}" + (f" {payload}" if payload else "")
+        self.process.stdin.write(line + "\n")
+        self.process.stdin.flush()
+        
+        expected = "###PONG" if header == "###PING" else "###RESP"
+        deadline = time.monotonic() + timeout
+        output = []
+        while True:
+            try:
+                response = self._lines.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                # The host is stuck on the command, so don't wait for it to exit;
+                # what it framed before is still in the pipe and is read first
+                self.process.kill()
+                self._drain(request_id, output, on_output)
+                self.close()
+                raise subprocess.TimeoutExpired(header, timeout, output="\n".join(output))
+            if response is None:
+                self.close()
+                raise RuntimeError("PowerShell session host exited unexpectedly")
+            parts = response.split(" ")
+            if len(parts) >= 2 and parts[0] == "###OUT" and parts[1] == request_id:
+                _add_output(output, _decode_frame(parts), on_output)
+            elif len(parts) >= 2 and parts[0] == expected and parts[1] == request_id:
+                return parts[2:], output
+    
+    def _drain(self, request_id, output, on_output):
+        """Collect the output frames left in the pipe of a stopped host"""
+        deadline = time.monotonic() + DRAIN_TIMEOUT
+        while True:
+            try:
+                response = self._lines.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                return
+            if response is None:
+                return
+            parts = response.split(" ")
+            if len(parts) >= 2 and parts[0] == "###OUT" and parts[1] == request_id:
+                _add_output(output, _decode_frame(parts), on_output)
+    
+    def ping(self, timeout=5):
+        """Health check: return True if the host answers a ping in time."""
+        with self._lock:
+            try:
+                self._request("###PING", None, timeout)
+                return True
+            except Exception as e:
+                logging.warning(f"PowerShell session health check failed: {e}")
+                return False
+    
+    def run(self, cmd, timeout=120, on_output=None):
+        """Run a command in the session.
+        
+        Args:
+            cmd (str): PowerShell command to execute
+            timeout (int): Timeout in seconds
+            on_output (callable): Called with each stdout line as the host
+                streams it
+        
+        Returns:
+            subprocess.CompletedProcess: Result shaped like a one-shot run
+        
+        Raises:
+            subprocess.TimeoutExpired: If the command runs past the timeout
+                (the host is stopped and restarted on next use)
+        """
+        payload = base64.b64encode(cmd.encode("utf-8")).decode("ascii")
+        with self._lock:
+            try:
+                fields, output = self._request("###REQ", payload, timeout, on_output)
+            except RuntimeError as e:
+                return subprocess.CompletedProcess(cmd, 1, "", str(e))
+        
+        status = fields[0] if fields else "0"
+        message = _decode_frame(["###RESP", "", *fields[1:2]])
+        stdout = "\n".join(output)
+        if status == "1":
+            return subprocess.CompletedProcess(cmd, 0, stdout, "")
+        return subprocess.CompletedProcess(cmd, 1, stdout, message)
+
+def _add_output(output, line, on_output):
+    """Keep a streamed output line and hand it to the caller's callback"""
+    output.append(line)
+    if on_output is not None:
+        on_output(line)
+
+def _decode_frame(parts):
+    """Text of a framed line split on spaces: the base64 field after the id"""
+    if len(parts) < 3 or not parts[2]:
+        return ""
+    return base64.b64decode(parts[2]).decode("utf-8", errors="replace")
+
+class PowerShellSessionPool:
+    """A fixed-size pool of PowerShell sessions shared by all callers."""
+    def __init__(self, size=2, host_args=None, silent=True):
+        self.sessions = [PowerShellSession(host_args, silent) for _ in range(max(1, size))]
+        self._idle = queue.Queue()
+        for session in self.sessions:
+            self._idle.put(session)
+    
+    def run(self, cmd, timeout=120, on_output=None):
+        """Run a command on the next free session (blocks while all are busy)."""
+        session = self._idle.get()
+        try:
+            return session.run(cmd, timeout, on_output)
+        finally:
+            self._idle.put(session)
+    
+    def health_check(self, timeout=5):
+        """Ping every session, restarting any that do not answer.
+        
+        Returns:
+            int: Number of sessions that had to be restarted
+        """
+        restarted = 0
+        for session in self.sessions:
+            if session.process is not None and not session.ping(timeout):
+                session.restart()
+                restarted += 1
+        return restarted
+    
+    def close(self):
+        """Stop every session host."""
+        for session in self.sessions:
+            session.close()
+
+# Active session pool; None means every command spawns its own process
+_session_pool = None
+
+def enable_session_pool(size=2, host_args=None):
+    """Route run_powershell through a pool of persistent PowerShell sessions.
+    
+    Args:
+        size (int): Number of session hosts to keep
+        host_args (list): Command line for the host process (defaults to PowerShell)
+    
+    Returns:
+        PowerShellSessionPool: The active pool
+    """
+    global _session_pool
+    disable_session_pool()
+    _session_pool = PowerShellSessionPool(size=size, host_args=host_args)
+    logging.info(f"PowerShell session pool enabled with {size} session(s)")
+    return _session_pool
+
+def disable_session_pool():
+    """Stop the session pool and go back to one process per command."""
+    global _session_pool
+    pool, _session_pool = _session_pool, None
+    if pool is not None:
+        pool.close()
+        logging.info("PowerShell session pool disabled")
+
+# Backend that runs commands instead of PowerShell (e.g. fake_powershell.FakePowerShell);
+# None runs them in PowerShell
+_command_runner = None
+
+def set_command_runner(runner):
+    """Send every PowerShell command to a substitute backend.
+    
+    The runner needs the same interface as PowerShellSessionPool:
+    run(cmd, timeout, on_output=None) returns a subprocess.CompletedProcess or
+    raises subprocess.TimeoutExpired and calls on_output(line) for each stdout
+    line the command wrote, and is_admin() reports elevation. It takes
+    precedence over the session pool.
+    
+    Args:
+        runner: The backend, or None to go back to PowerShell
+    
+    Returns:
+        The previous runner
+    """
+    global _command_runner
+    previous, _command_runner = _command_runner, runner
+    if runner is not None:
+        logging.info(f"PowerShell commands routed to {type(runner).__name__}")
+    return previous
+
+# Commands longer than this are sent to a one-shot PowerShell over stdin
+# rather than on its command line, which Windows caps at 32,767 characters
+# with quoting included
+INLINE_COMMAND_LIMIT = 8000
+
+# Command line of a one-shot PowerShell that runs a script sent on stdin. The
+# script arrives base64-encoded UTF-8, so neither its length nor the console
+# code page can change it; running it as a script block keeps the -Command
+# exit code semantics.
+STDIN_SCRIPT_BOOTSTRAP = (
+    "$script = [Text.Encoding]::UTF8.GetString([Convert]::FromBase64String([Console]::In.ReadToEnd())); "
+    "& ([ScriptBlock]::Create($script))"
+)
+
+def powershell_invocation(cmd):
+    """Arguments and stdin payload that run cmd in a one-shot PowerShell.
+    
+    Short commands go on the command line; longer ones (generated batch
+    scripts) are sent over stdin, so their size is not limited by the
+    command line.
+    
+    Args:
+        cmd (str): PowerShell command to execute
+    
+    Returns:
+        tuple: (args, stdin_payload) where stdin_payload is None for an
+               inline command
+    """
+    if len(cmd) <= INLINE_COMMAND_LIMIT:
+        return ["powershell", "-NoProfile", "-ExecutionPolicy", "Bypass", "-Command", cmd], None
+    payload = base64.b64encode(cmd.encode("utf-8")).decode("ascii")
+    return ["powershell", "-NoProfile", "-NonInteractive", "-ExecutionPolicy", "Bypass", "-Command", STDIN_SCRIPT_BOOTSTRAP], payload
+
+def run_powershell(cmd, timeout=None, silent=True, command_class=None, units=1, retries=None):
     """Run a PowerShell command and return success status and output.
     
+    Commands go to the session pool when one is enabled, otherwise a new
+    PowerShell process is started for the command.
+    
+    Without an explicit timeout, the timeout comes from the latency history of
+    the command's class, scaled by units. Transient failures (see
+    command_policy.classify_failure) are retried with jittered exponential
+    backoff as often as the class allows; timeouts and hard failures are not.
+    
     Args:
         cmd (str): PowerShell command to execute
-        timeout (int): Timeout in seconds
+        timeout (int): Timeout in seconds, or None for the adaptive timeout
         silent (bool): Whether to hide the PowerShell window
-        
+        command_class (str): Class for timeouts and retries (see
+            command_policy.COMMAND_CLASSES); defaults to the first cmdlet
+        units (int): Items of work in the command, e.g. apps in a batch
+        retries (int): Retries after a transient failure, or None for the
+            class default
+    
     Returns:
         tuple: (success, output) where success is a boolean indicating if the command succeeded,
                and output is the command output or error message
     """
+    success, output, _ = run_powershell_partial(cmd, timeout, silent, command_class, units, retries)
+    return success, output
+
+def run_powershell_partial(cmd, timeout=None, silent=True, command_class=None, units=1, retries=None, on_output=None):
+    """Run a PowerShell command, keeping what it printed if it times out.
+    
+    Takes the same arguments as run_powershell, and optionally:
+    
+    Args:
+        on_output (callable): Called with each stdout line (without the line
+            break) as soon as the command writes it, so long scripts can
+            report progress; a retried command reports its lines again
+    
+    Returns:
+        tuple: (success, output, partial_output) like run_powershell, plus the
+               stdout written before a timeout ("" if the command finished)
+    """
+    command_class, timeout, retries = _resolve_policy(cmd, timeout, command_class, units, retries)
+    attempt = 0
+    while True:
+        started = time.monotonic()
+        success, output, partial = _run_powershell_once(cmd, timeout, silent, command_class, on_output)
+        if not _should_retry(command_class, success, output, time.monotonic() - started, timeout, units, attempt, retries):
+            return success, output, partial
+        time.sleep(backoff_delay(attempt))
+        attempt += 1
+
+def _resolve_policy(cmd, timeout, command_class, units, retries):
+    """Fill in the command class, adaptive timeout and retry count"""
+    command_class = command_class or infer_command_class(cmd)
+    if timeout is None:
+        timeout = get_latency_history().timeout_for(command_class, units)
+    if retries is None:
+        retries = class_policy(command_class)["retries"]
+    return command_class, timeout, retries
+
+def _should_retry(command_class, success, output, elapsed, timeout, units, attempt, retries):
+    """Record the run's latency and decide whether a failure is worth another attempt"""
+    timed_out = not success and elapsed >= timeout
+    if success or timed_out:
+        # Timeouts count at their full length, so the next timeout grows
+        get_latency_history().record(command_class, elapsed, units)
+    if success:
+        return False
+    
+    failure = classify_failure(output, timed_out)
+    if failure == "transient" and attempt < retries:
+        logging.warning(f"Transient failure of {command_class} (attempt {attempt + 1} of {retries + 1}), retrying: {output[:200]}")
+        return True
+    logging.debug(f"{command_class} failed ({failure}) after {attempt + 1} attempt(s)")
+    return False
+
+def _run_powershell_once(cmd, timeout, silent, command_class, on_output=None):
+    """Run a command once and record its metrics; returns (success, output, partial_output)"""
+    # Log a sanitized version of the command for debugging
+    cmd_preview = (cmd[:100] + '...') if len(cmd) > 100 else cmd
+    caller = infer_caller()
+    started = time.monotonic()
+    spawn = None
+    result = None
+    outcome = "exception"
     try:
-        # Build PowerShell arguments
-        powershell_args = [
-            "powershell",
-            "-NoProfile",
-            "-ExecutionPolicy", "Bypass",
-            "-Command", cmd
-        ]
-        
-        # Creation flags to hide window if silent is True
-        creation_flags = subprocess.CREATE_NO_WINDOW if silent and os.name == 'nt' else 0
-        
-        # Log a sanitized version of the command for debugging
-        cmd_preview = (cmd[:100] + '...') if len(cmd) > 100 else cmd
         logging.debug(f"Running PowerShell command: {cmd_preview}")
         
-        # Run the command
-        result = subprocess.run(
-            powershell_args,
-            capture_output=True, 
-            text=True,
-            timeout=timeout,
-            creationflags=creation_flags
-        )
+        runner = _command_runner or _session_pool
+        if runner is not None:
+            result = runner.run(cmd, timeout, on_output)
+        else:
+            # Build PowerShell arguments; long scripts travel over stdin
+            powershell_args, payload = powershell_invocation(cmd)
+            
+            # Creation flags to hide window if silent is True
+            creation_flags = subprocess.CREATE_NO_WINDOW if silent and os.name == 'nt' else 0
+            
+            # Run the command; starting it apart from waiting on it times the spawn
+            process = subprocess.Popen(
+                powershell_args,
+                stdin=subprocess.PIPE if payload is not None else None,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                creationflags=creation_flags
+            )
+            spawn = time.monotonic() - started
+            if on_output is not None:
+                stdout, stderr = _communicate_streaming(process, payload, timeout, on_output)
+            else:
+                try:
+                    stdout, stderr = process.communicate(input=payload, timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    stdout, stderr = process.communicate()
+                    raise subprocess.TimeoutExpired(powershell_args, timeout, output=stdout, stderr=stderr)
+            result = subprocess.CompletedProcess(powershell_args, process.returncode, stdout, stderr)
         
         # Check for errors
         if result.returncode != 0:
+            outcome = "error"
             error_message = result.stderr.strip() if result.stderr else f"Unknown error (return code {result.returncode})"
             logging.error(f"Error running command: {cmd_preview}")
             logging.error(f"Error details: {error_message}")
-            return False, error_message
+            return False, error_message, ""
         else:
+            outcome = "ok"
             # For successful commands, log the command but not necessarily all output
             output_preview = (result.stdout[:100] + '...') if len(result.stdout) > 100 else result.stdout
             logging.info(f"Successfully ran command: {cmd_preview}")
             if output_preview.strip():
                 logging.debug(f"Command output: {output_preview}")
-            return True, result.stdout.strip()
+            return True, result.stdout.strip(), ""
+    except subprocess.TimeoutExpired as e:
+        outcome = "timeout"
+        error_msg = f"Command timed out after {timeout} seconds"
+        logging.error(f"{error_msg}: {cmd_preview}")
+        
+        # subprocess hands back bytes on POSIX and text on Windows
+        partial = e.stdout or ""
+        if isinstance(partial, bytes):
+            partial = partial.decode(errors="replace")
+        return False, error_msg, partial
+    except Exception as e:
+        error_msg = str(e)
+        logging.error(f"Exception running PowerShell command: {error_msg}")
+        return False, error_msg, ""
+    finally:
+        output_bytes = _byte_length(result.stdout) + _byte_length(result.stderr) if result is not None else 0
+        get_metrics().record(caller, command_class, cmd, time.monotonic() - started, spawn, output_bytes,
+                             result.returncode if result is not None else None, outcome)
+
+def _communicate_streaming(process, payload, timeout, on_output):
+    """Like process.communicate(), but hands each stdout line to on_output as it is written.
+    
+    Returns:
+        tuple: (stdout, stderr)
+    
+    Raises:
+        subprocess.TimeoutExpired: If the process runs past timeout; it is
+            killed and the stdout read so far is attached
+    """
+    stdout_lines = []
+    stderr_chunks = []
+    
+    def read_stdout():
+        for line in process.stdout:
+            stdout_lines.append(line)
+            on_output(line.rstrip("\r\n"))
+    
+    readers = [
+        threading.Thread(target=read_stdout, daemon=True),
+        threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+    ]
+    for reader in readers:
+        reader.start()
+    if payload is not None:
+        try:
+            process.stdin.write(payload)
+            process.stdin.close()
+        except OSError:
+            # The process exited early; its exit code tells what happened
+            pass
+    
+    try:
+        process.wait(timeout=timeout)
     except subprocess.TimeoutExpired:
+        process.kill()
+        for reader in readers:
+            reader.join(DRAIN_TIMEOUT)
+        raise subprocess.TimeoutExpired(process.args, timeout, output="".join(stdout_lines), stderr="".join(stderr_chunks))
+    for reader in readers:
+        reader.join()
+    return "".join(stdout_lines), "".join(stderr_chunks)
+
+def _byte_length(text):
+    """Size in bytes of captured output, which may be text or bytes"""
+    if not text:
+        return 0
+    return len(text) if isinstance(text, bytes) else len(text.encode("utf-8", errors="replace"))
+
+async def run_powershell_async(cmd, timeout=None, silent=True, command_class=None, units=1, retries=None):
+    """Run a PowerShell command from an asyncio event loop.
+    
+    Same contract as run_powershell, but the process is awaited instead of
+    blocking a thread. If the calling task is cancelled the process is killed
+    and the cancellation propagates. With the session pool enabled the
+    command runs in a pooled session from a worker thread instead, like the
+    synchronous calls; a cancelled task then leaves the command to finish
+    or time out in its session.
+    
+    Args:
+        cmd (str): PowerShell command to execute
+        timeout (int): Timeout in seconds, or None for the adaptive timeout
+        silent (bool): Whether to hide the PowerShell window
+        command_class (str): Class for timeouts and retries
+        units (int): Items of work in the command
+        retries (int): Retries after a transient failure, or None for the class default
+    
+    Returns:
+        tuple: (success, output) where success is a boolean indicating if the command succeeded,
+               and output is the command output or error message
+    """
+    success, output, _ = await run_powershell_async_partial(cmd, timeout, silent, command_class, units, retries)
+    return success, output
+
+async def run_powershell_async_partial(cmd, timeout=None, silent=True, command_class=None, units=1, retries=None, on_output=None):
+    """Async counterpart of run_powershell_partial.
+    
+    on_output runs on the event loop thread, or on a worker thread when a
+    substitute command runner or the session pool runs the command.
+    
+    Returns:
+        tuple: (success, output, partial_output)
+    """
+    if _command_runner is not None or _session_pool is not None:
+        # Substitute backends and the session pool are synchronous, so keep
+        # them off the event loop; the worker thread can't see this caller,
+        # so name it for the metrics
+        with caller_scope(infer_caller()):
+            return await asyncio.to_thread(run_powershell_partial, cmd, timeout, silent, command_class, units, retries, on_output)
+    
+    command_class, timeout, retries = _resolve_policy(cmd, timeout, command_class, units, retries)
+    attempt = 0
+    while True:
+        started = time.monotonic()
+        success, output, partial = await _run_powershell_async_once(cmd, timeout, silent, command_class, on_output)
+        if not _should_retry(command_class, success, output, time.monotonic() - started, timeout, units, attempt, retries):
+            return success, output, partial
+        await asyncio.sleep(backoff_delay(attempt))
+        attempt += 1
+
+async def _run_powershell_async_once(cmd, timeout, silent, command_class, on_output=None):
+    """Run a command once from the event loop and record its metrics; returns (success, output, partial_output)"""
+    cmd_preview = (cmd[:100] + '...') if len(cmd) > 100 else cmd
+    caller = infer_caller()
+    started = time.monotonic()
+    spawn = None
+    output_bytes = 0
+    outcome = "exception"
+    process = None
+    stdout_chunks = []
+    try:
+        logging.debug(f"Running PowerShell command (async): {cmd_preview}")
+        
+        creation_flags = subprocess.CREATE_NO_WINDOW if silent and os.name == 'nt' else 0
+        powershell_args, payload = powershell_invocation(cmd)
+        process = await asyncio.create_subprocess_exec(
+            *powershell_args,
+            stdin=asyncio.subprocess.PIPE if payload is not None else None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            creationflags=creation_flags
+        )
+        spawn = time.monotonic() - started
+        
+        # Read stdout as it arrives so a timeout still leaves the partial output
+        async def read_stdout():
+            pending = b""
+            while True:
+                chunk = await process.stdout.read(65536)
+                if not chunk:
+                    break
+                stdout_chunks.append(chunk)
+                if on_output is not None:
+                    *lines, pending = (pending + chunk).split(b"\n")
+                    for line in lines:
+                        on_output(line.decode(errors="replace").rstrip("\r"))
+            if on_output is not None and pending:
+                on_output(pending.decode(errors="replace").rstrip("\r"))
+        
+        async def write_stdin():
+            # The bootstrap reads all of stdin before the script starts writing output
+            if payload is not None:
+                process.stdin.write(payload.encode("ascii"))
+                await process.stdin.drain()
+                process.stdin.close()
+        
+        async def finish():
+            _, _, stderr = await asyncio.gather(write_stdin(), read_stdout(), process.stderr.read())
+            await process.wait()
+            return stderr
+        
+        stderr_bytes = await asyncio.wait_for(finish(), timeout)
+        output_bytes = sum(len(chunk) for chunk in stdout_chunks) + len(stderr_bytes)
+        stderr = stderr_bytes.decode(errors="replace")
+        stdout = b"".join(stdout_chunks).decode(errors="replace")
+        
+        if process.returncode != 0:
+            outcome = "error"
+            error_message = stderr.strip() if stderr else f"Unknown error (return code {process.returncode})"
+            logging.error(f"Error running command: {cmd_preview}")
+            logging.error(f"Error details: {error_message}")
+            return False, error_message, ""
+        outcome = "ok"
+        logging.info(f"Successfully ran command: {cmd_preview}")
+        return True, stdout.strip(), ""
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        output_bytes = sum(len(chunk) for chunk in stdout_chunks)
         error_msg = f"Command timed out after {timeout} seconds"
         logging.error(f"{error_msg}: {cmd_preview}")
-        return False, error_msg
+        return False, error_msg, b"".join(stdout_chunks).decode(errors="replace")
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        logging.warning(f"PowerShell command cancelled: {cmd_preview}")
+        raise
     except Exception as e:
         error_msg = str(e)
         logging.error(f"Exception running PowerShell command: {error_msg}")
-        return False, error_msg
+        return False, error_msg, ""
+    finally:
+        # Don't leave the process running after a timeout or cancellation
+        if process is not None and process.returncode is None:
+            try:
+                process.kill()
+                await process.wait()
+            except Exception:
+                pass
+        exit_code = process.returncode if process is not None and outcome in ("ok", "error") else None
+        get_metrics().record(caller, command_class, cmd, time.monotonic() - started, spawn, output_bytes, exit_code, outcome)
+
+def export_metrics(json_path=None, prometheus_path=None):
+    """Write the PowerShell call metrics of this process.
+    
+    Args:
+        json_path (str): File for the JSON snapshot (counters, histograms
+            and the most recent calls), or None to skip it
+        prometheus_path (str): File for the Prometheus text format, or None
+            to skip it
+    
+    Returns:
+        dict: The snapshot that was taken
+    """
+    metrics = get_metrics()
+    if json_path:
+        metrics.export_json(json_path)
+    if prometheus_path:
+        metrics.export_prometheus(prometheus_path)
+    return metrics.snapshot()
+
+# Default number of PowerShell jobs run at the same time
+DEFAULT_MAX_WORKERS = 4
+
+def run_powershell_jobs(jobs, max_workers=DEFAULT_MAX_WORKERS, timeout=None, command_class=None, retries=None):
+    """Run independent PowerShell commands concurrently.
+    
+    Args:
+        jobs (list): Commands to run, either strings or (cmd, timeout) tuples
+            for a per-job timeout
+        max_workers (int): Maximum number of commands running at once
+        timeout (int): Timeout in seconds for jobs without their own, or None
+            for the adaptive timeout
+        command_class (str): Class of every job (see run_powershell)
+        retries (int): Retries of every job after a transient failure, or
+            None for the class default
+    
+    Returns:
+        list: One dict per job, in submission order, with "success", "output",
+              "elapsed" (seconds the job took, retries included), "timed_out"
+              and "failure" ("timeout", "transient", "hard" or None)
+    """
+    results = [None] * len(jobs)
+    for index, result in iter_powershell_jobs(jobs, max_workers, timeout, command_class, retries):
+        results[index] = result
+    
+    logging.debug("PowerShell job latencies: " + ", ".join(f"{r['elapsed']:.2f}s" for r in results))
+    return results
+
+def iter_powershell_jobs(jobs, max_workers=DEFAULT_MAX_WORKERS, timeout=None, command_class=None, retries=None):
+    """Run independent PowerShell commands concurrently, yielding each result as it finishes.
+    
+    Takes the same arguments as run_powershell_jobs.
+    
+    Yields:
+        tuple: (index, result) in completion order, where index is the job's
+               position in jobs and result is the dict run_powershell_jobs returns
+    """
+    # Worker threads can't see who submitted the jobs, so name it for the metrics
+    caller = infer_caller()
+    
+    def run_job(job):
+        cmd, job_timeout = job if isinstance(job, tuple) else (job, timeout)
+        job_class, job_timeout, _ = _resolve_policy(cmd, job_timeout, command_class, 1, None)
+        started = time.monotonic()
+        with caller_scope(caller):
+            success, output = run_powershell(cmd, timeout=job_timeout, command_class=job_class, retries=retries)
+        elapsed = time.monotonic() - started
+        timed_out = not success and elapsed >= job_timeout
+        return {
+            "success": success,
+            "output": output,
+            "elapsed": elapsed,
+            "timed_out": timed_out,
+            "failure": None if success else classify_failure(output, timed_out)
+        }
+    
+    if not jobs:
+        return
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as executor:
+        futures = {executor.submit(run_job, job): index for index, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
 
-def run_batch_app_check(app_names, timeout=180):
-    """Run a batch check of multiple apps in a single PowerShell process.
+def run_batch_app_check(app_names, timeout=None):
+    """Check whether multiple apps are installed using one package enumeration.
     
     Args:
         app_names (list): List of app names to check
-        timeout (int): Timeout in seconds
-        
+        timeout (int): Timeout in seconds for the enumeration, or None for
+            the adaptive inventory timeout
+    
     Returns:
         dict: Dictionary with app_name as key and installed status as value
     """
     try:
-        # Build PowerShell command to check all apps at once
-        ps_commands = []
-        
-        for app_name in app_names:
-            # Format a command that outputs app name and status
-            # Use a more precise check that ensures we match the exact app name
-            ps_commands.append(
-                f"Write-Output '{app_name}---START---';"
-                f"$pkg = Get-AppxPackage -AllUsers | Where-Object {{$_.Name -eq '{app_name}' -or $_.PackageFullName -eq '{app_name}'}};"
-                f"if ($pkg) {{ "
-                f"Write-Output 'INSTALLED' }} else {{ "
-                f"Write-Output 'NOT_INSTALLED' }};"
-                f"Write-Output '---END---';"
-            )
+        # Import here to avoid circular imports
+        from app_inventory import get_inventory
         
-        # Join all commands and run as a single PowerShell process
-        full_command = " ".join(ps_commands)
-        success, output = run_powershell(full_command, timeout=timeout)
+        inventory = get_inventory(timeout=timeout)
+        if inventory is None:
+            return {}
         
-        # Parse the results
-        results = {}
-        if success:
-            lines = output.strip().split('\n')
-            current_app = None
-            
-            for line in lines:
-                line = line.strip()
-                if '---START---' in line:
-                    current_app = line.split('---START---')[0]
-                elif line == 'INSTALLED' and current_app:
-                    results[current_app] = True
-                elif line == 'NOT_INSTALLED' and current_app:
-                    results[current_app] = False
-                elif line == '---END---':
-                    current_app = None
-                    
-            # Make sure we have a result for each app
-            for app_name in app_names:
-                if app_name not in results:
-                    results[app_name] = False
-        
-        return results
+        # Match on Name or PackageFullName
+        return {app_name: inventory.is_installed(app_name) for app_name in app_names}
     except Exception as e:
         logging.error(f"Error in batch app check: {str(e)}")
         return {}
\ No newline at end of file
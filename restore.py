@@ -1,7 +1,14 @@
-from powershell_utils import run_powershell, ensure_admin
+from powershell_utils import run_powershell, run_powershell_jobs, ensure_admin, is_admin
+from app_catalog import get_catalog
+from app_inventory import (get_inventory, get_inventory_async, invalidate_inventory, get_provisioned_index,
+                           load_baseline)
+from result_protocol import run_record_script, run_record_script_async, render_plan_script, split_plan, is_start_record
+from operation_journal import get_journal, RecordJournaler, REINSTALL_STEP
+from job_manager import check_cancelled, JobCancelled
 import logging
 from datetime import datetime
 import time
+import asyncio
 
 # Setup logging if not already configured
 if not logging.getLogger().handlers:
@@ -30,11 +37,14 @@ def create_restore_point():
         date_string = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         description = f"Gaming Bloatware Remover - {date_string}"
         
-        # Check if system restore service is running
+        # Check the system restore service and enable System Restore on C drive
+        # at the same time; the enable step is only repeated if the service was down
         ps_cmd_check = "Get-Service -Name SRSERVICE | Select-Object -ExpandProperty Status"
-        success, output = run_powershell(ps_cmd_check)
+        ps_cmd_enable = "Enable-ComputerRestore -Drive \"C:\\\" -ErrorAction SilentlyContinue"
+        check_result, enable_result = run_powershell_jobs([ps_cmd_check, ps_cmd_enable])
+        success, output = enable_result["success"], enable_result["output"]
         
-        if not success or "Running" not in output:
+        if not check_result["success"] or "Running" not in check_result["output"]:
             # Try to enable the System Restore service
             print("System Restore service not running. Attempting to enable it...")
             ps_cmd_enable_service = "Set-Service -Name SRSERVICE -StartupType Manual; Start-Service -Name SRSERVICE -ErrorAction SilentlyContinue"
@@ -42,10 +52,9 @@ def create_restore_point():
             
             # Give it a moment to start
             time.sleep(2)
-        
-        # Enable System Restore on C drive
-        ps_cmd_enable = "Enable-ComputerRestore -Drive \"C:\\\" -ErrorAction SilentlyContinue"
-        success, output = run_powershell(ps_cmd_enable)
+            
+            # Enable System Restore again now that the service is up
+            success, output = run_powershell(ps_cmd_enable)
         
         if not success and "Access denied" in output:
             print("Warning: Could not enable system restore (access denied). Ensure you're running as administrator.")
@@ -78,63 +87,28 @@ def create_restore_point():
 def check_app_installed(app_name):
     """Check if an app is installed on the system."""
     try:
-        # Use a more precise check that ensures we match the exact app name
-        ps_cmd = f"Get-AppxPackage -AllUsers | Where-Object {{$_.Name -eq '{app_name}'}} | Select-Object -ExpandProperty Name"
-        success, output = run_powershell(ps_cmd)
-        
-        # If command was successful and returned non-empty output that exactly matches app name
-        return success and output and output.strip() == app_name
+        # Look the exact app name up in the shared package inventory
+        inventory = get_inventory()
+        return inventory is not None and inventory.is_installed(app_name)
     except Exception as e:
         logging.error(f"Error checking if {app_name} is installed: {str(e)}")
         # Assume not installed on error to be safe
         return False
 
 
-def run_batch_app_check(app_names, timeout=180):
-    """Run a batch check of multiple apps in a single PowerShell process with improved accuracy."""
+def run_batch_app_check(app_names, timeout=None):
+    """Check multiple apps against a single package enumeration."""
     try:
-        # Build PowerShell command to check all apps at once with exact matching
-        ps_commands = []
+        inventory = get_inventory(timeout=timeout)
+        if inventory is None:
+            # Default everything to not installed to avoid false positives
+            return {app_name: False for app_name in app_names}
         
-        for app_name in app_names:
-            # Use exact name matching to prevent false positives
-            ps_commands.append(
-                f"Write-Output '{app_name}---START---';"
-                f"$pkg = Get-AppxPackage -AllUsers | Where-Object {{$_.Name -eq '{app_name}'}};"
-                f"if ($pkg) {{ "
-                f"Write-Output 'INSTALLED' }} else {{ "
-                f"Write-Output 'NOT_INSTALLED' }};"
-                f"Write-Output '---END---';"
-            )
-        
-        # Join all commands and run as a single PowerShell process
-        full_command = " ".join(ps_commands)
-        success, output = run_powershell(full_command, timeout=timeout)
-        
-        # Parse the results
+        # Use exact name matching to prevent false positives
         results = {}
-        if success:
-            lines = output.strip().split('\n')
-            current_app = None
-            
-            for line in lines:
-                line = line.strip()
-                if '---START---' in line:
-                    current_app = line.split('---START---')[0]
-                elif line == 'INSTALLED' and current_app:
-                    results[current_app] = True
-                    logging.debug(f"App {current_app} is detected as INSTALLED")
-                elif line == 'NOT_INSTALLED' and current_app:
-                    results[current_app] = False
-                    logging.debug(f"App {current_app} is detected as NOT_INSTALLED")
-                elif line == '---END---':
-                    current_app = None
-            
-            # Make sure we have a result for each app
-            for app_name in app_names:
-                if app_name not in results:
-                    results[app_name] = False
-                    logging.debug(f"App {app_name} defaulted to NOT_INSTALLED (no result)")
+        for app_name in app_names:
+            results[app_name] = inventory.is_installed(app_name)
+            logging.debug(f"App {app_name} is detected as {'INSTALLED' if results[app_name] else 'NOT_INSTALLED'}")
         
         return results
     except Exception as e:
@@ -142,7 +116,6 @@ def run_batch_app_check(app_names, timeout=180):
         # Default everything to not installed to avoid false positives
         return {app_name: False for app_name in app_names}
 
-# Around line 87-110 in restore.py
 def get_available_apps_for_reinstall():
     """Get a list of apps that can be reinstalled with accurate installation status.
     
@@ -151,39 +124,280 @@ def get_available_apps_for_reinstall():
     """
     try:
         # Get app list from app_actions.py
-        from app_actions import APPS
-        
-        # First verify each app individually with direct PowerShell checking
-        available_apps = {}
-        for app_name in APPS.keys():
-            try:
-                # Use a more precise checking mechanism
-                ps_cmd = f"Get-AppxPackage -AllUsers | Where-Object {{$_.Name -eq '{app_name}'}} | Select-Object -ExpandProperty Name"
-                success, output = run_powershell(ps_cmd)
-                
-                # Consider installed only if output exactly matches app name
-                is_installed = success and output and output.strip() == app_name
-                
-                available_apps[app_name] = {
-                    "description": APPS[app_name]["description"] if "description" in APPS[app_name] else app_name,
-                    "installed": is_installed
-                }
-                
-                # Log the status
-                logging.info(f"App {app_name} detected as {'installed' if is_installed else 'not installed'}")
-                
-            except Exception as app_error:
-                logging.error(f"Error checking app {app_name}: {str(app_error)}")
-                # Default to not installed in case of errors to avoid false positives
-                available_apps[app_name] = {
-                    "description": APPS[app_name]["description"] if "description" in APPS[app_name] else app_name,
-                    "installed": False
-                }
+        from app_actions import CATALOG
         
-        return available_apps
+        # One enumeration answers the status of every app
+        return _available_apps_from_inventory(CATALOG, get_inventory())
     except Exception as e:
         logging.error(f"Error in get_available_apps_for_reinstall: {str(e)}")
         return {}
+
+async def get_available_apps_for_reinstall_async():
+    """Async counterpart of get_available_apps_for_reinstall."""
+    try:
+        from app_actions import CATALOG
+        return _available_apps_from_inventory(CATALOG, await get_inventory_async())
+    except Exception as e:
+        logging.error(f"Error in get_available_apps_for_reinstall_async: {str(e)}")
+        return {}
+
+def _available_apps_from_inventory(catalog, inventory):
+    """Build the reinstall list with the installed status of each app."""
+    if inventory is None:
+        logging.warning("Package inventory unavailable, reporting all apps as not installed")
+    
+    available_apps = {}
+    for app_name in catalog.names:
+        is_installed = inventory is not None and inventory.is_installed(app_name)
+        
+        available_apps[app_name] = {
+            "description": catalog.description(app_name),
+            "installed": is_installed
+        }
+        
+        # Log the status
+        logging.info(f"App {app_name} detected as {'installed' if is_installed else 'not installed'}")
+    
+    return available_apps
+
+# Maximum number of apps handled by one reinstall script
+REINSTALL_CHUNK_SIZE = 50
+
+# Reinstall script: the JSON plan replaces __PLAN__. Each app goes down the
+# fallback chain until a method succeeds: register the existing package from
+# its manifest, reinstall from the provisioned source, register from the
+# package family. Each app writes a start record {"app", "event": "start"}
+# and then one result record naming the method that worked.
+# Provisioned sources come resolved in the plan; the script only enumerates
+# them itself if the plan has none (sources is null).
+REINSTALL_SCRIPT_TEMPLATE = r"""
+$plan = ConvertFrom-Json @'
+__PLAN__
+'@
+$provisioned = $null
+foreach ($app in $plan) {
+    Write-Record @{ app = $app.name; event = 'start' }
+    $method = ''
+    $message = ''
+    if (@($app.manifests).Count -gt 0) {
+        try {
+            foreach ($manifest in $app.manifests) { Add-AppxPackage -DisableDevelopmentMode -Register $manifest -ErrorAction Stop }
+            $method = 'register'
+        } catch { $message = $_.Exception.Message }
+    }
+    if (-not $method) {
+        try {
+            $sources = @($app.sources)
+            if ($null -eq $app.sources) {
+                if ($null -eq $provisioned) { $provisioned = @(Get-AppxProvisionedPackage -Online -ErrorAction Stop) }
+                $sources = @($provisioned | Where-Object { $_.DisplayName -eq $app.name } | ForEach-Object { $_.PackagePath })
+            }
+            foreach ($source in $sources) { Add-AppxProvisionedPackage -Online -PackagePath $source -SkipLicense -ErrorAction Stop | Out-Null }
+            if ($sources.Count -gt 0) { $method = 'provisioned' }
+        } catch { $message = $_.Exception.Message }
+    }
+    if (-not $method) {
+        try {
+            Add-AppxPackage -RegisterByFamilyName -MainPackage $app.family -ErrorAction Stop
+            $method = 'family'
+        } catch { $message = $_.Exception.Message }
+    }
+    Write-Record @{ app = $app.name; method = $method; ok = [bool]$method; message = $message }
+}
+"""
+
+# Readable names of the reinstall methods, for progress messages
+REINSTALL_METHODS = {
+    "register": "existing package",
+    "provisioned": "provisioned source",
+    "family": "package family"
+}
+
+def build_reinstall_plan(app_list, inventory=None, provisioned=None):
+    """Plan entries for REINSTALL_SCRIPT_TEMPLATE, one per app.
+    
+    Args:
+        app_list (list): List of app names to reinstall
+        inventory (AppInventory): Snapshot used to find the manifests of
+            packages that are still present (method 1)
+        provisioned (ProvisionedIndex): Index used to find the provisioned
+            sources (method 2); without it the script looks them up itself
+    
+    Returns:
+        list: {"name", "manifests", "sources", "family"} dicts
+    """
+    plan = []
+    for app_name in app_list:
+        packages = inventory.find(app_name) if inventory is not None else []
+        manifests = [f"{package['InstallLocation']}\\AppXManifest.xml" for package in packages if package.get("InstallLocation")]
+        sources = provisioned.package_paths(app_name) if provisioned is not None else None
+        plan.append({"name": app_name, "manifests": manifests, "sources": sources, "family": family_name(app_name, packages)})
+    return plan
+
+def family_name(app_name, packages=()):
+    """Package family name to register a missing app by (method 3).
+    
+    Add-AppxPackage -RegisterByFamilyName wants the family name (e.g.
+    Microsoft.XboxApp_8wekyb3d8bbwe), not the package name.
+    
+    Args:
+        app_name (str): App name
+        packages (list): The app's packages still in the inventory, if any
+    
+    Returns:
+        str: The catalog's family name, else that of a package still
+             present, else the app name itself
+    """
+    entry = get_catalog().get(app_name)
+    if entry is not None and entry.family_name:
+        return entry.family_name
+    for package in packages:
+        if package.get("PackageFamilyName"):
+            return package["PackageFamilyName"]
+    return app_name
+
+def build_reinstall_script(app_list, inventory=None, provisioned=None):
+    """Compile a list of apps into a single reinstall script.
+    
+    Takes the same arguments as build_reinstall_plan.
+    
+    Returns:
+        str: PowerShell script that runs the fallback chain for every app
+    """
+    return render_plan_script(REINSTALL_SCRIPT_TEMPLATE, build_reinstall_plan(app_list, inventory, provisioned))
+
+def parse_reinstall_results(app_list, records, error=None):
+    """Turn the records written by a reinstall script into per-app results.
+    
+    Apps without a record (e.g. the script was cut short) count as failed.
+    
+    Args:
+        app_list (list): App names that were in the script
+        records (list): Records parsed from the script output
+        error (str): Script failure message, used for apps without a record
+    
+    Returns:
+        dict: app_name -> {"method": str or None, "error": str}
+    """
+    results = {app_name: {"method": None, "error": error or "No result reported"} for app_name in app_list}
+    for record in records:
+        result = results.get(record.get("app"))
+        if result is None or is_start_record(record):
+            continue
+        if record.get("ok") and record.get("method"):
+            result["method"] = record["method"]
+            result["error"] = ""
+        else:
+            result["error"] = record.get("message") or "No reinstall method succeeded"
+    return results
+
+def reinstall_apps_batch(app_list, chunk_size=REINSTALL_CHUNK_SIZE, journal=None):
+    """Reinstall apps with one PowerShell script per chunk.
+    
+    The installed status is checked before and after against a single
+    package enumeration each, and every app is journaled as the script
+    reports it, so an interrupted reinstall can be resumed (see operation_journal). Chunks hold up to
+    chunk_size apps, fewer if their plan would pass
+    result_protocol.MAX_PLAN_CHARS. Run as a job, it stops between chunks
+    once the job is cancelled and the operation ends as "cancelled".
+    
+    Args:
+        app_list (list): List of app names to reinstall
+        chunk_size (int): Maximum number of apps per script
+        journal (OperationJournal): Journal to record the steps in
+            (defaults to the session's journal)
+    
+    Returns:
+        dict: app_name -> {"was_installed": bool, "installed": bool,
+              "method": str or None, "error": str}
+    
+    Raises:
+        JobCancelled: If the job running the reinstall was cancelled
+    """
+    before = get_inventory()
+    provisioned = get_provisioned_index()
+    journal = journal or get_journal()
+    op_id = journal.begin("reinstall", {app_name: [REINSTALL_STEP] for app_name in app_list})
+    
+    results = {}
+    try:
+        for chunk_plan in split_plan(build_reinstall_plan(app_list, before, provisioned), chunk_size):
+            check_cancelled()
+            chunk = [entry["name"] for entry in chunk_plan]
+            logging.info(f"Reinstalling batch of {len(chunk)} apps: {', '.join(chunk)}")
+            
+            recorder = RecordJournaler(journal, op_id, {app_name: [REINSTALL_STEP] for app_name in chunk}, REINSTALL_STEP)
+            script = render_plan_script(REINSTALL_SCRIPT_TEMPLATE, chunk_plan)
+            success, records, error = run_record_script(script, command_class="reinstall", units=len(chunk), on_record=recorder)
+            if not success:
+                logging.error(f"Batch reinstall script failed: {error}")
+            chunk_results = parse_reinstall_results(chunk, records, error)
+            recorder.finish(_reinstall_outcomes(chunk_results))
+            results.update(chunk_results)
+    except JobCancelled:
+        logging.warning(f"Reinstall cancelled after {len(results)} of {len(app_list)} apps")
+        journal.end(op_id, "cancelled")
+        invalidate_inventory()
+        raise
+    
+    journal.end(op_id)
+    invalidate_inventory()
+    return _check_reinstall_results(results, before, get_inventory())
+
+async def reinstall_apps_batch_async(app_list, chunk_size=REINSTALL_CHUNK_SIZE, max_concurrency=1, journal=None):
+    """Async counterpart of reinstall_apps_batch; up to max_concurrency chunks run at once."""
+    before = await get_inventory_async()
+    provisioned = await asyncio.to_thread(get_provisioned_index)
+    journal = journal or get_journal()
+    op_id = await asyncio.to_thread(journal.begin, "reinstall", {app_name: [REINSTALL_STEP] for app_name in app_list})
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    
+    async def reinstall_chunk(chunk_plan):
+        chunk = [entry["name"] for entry in chunk_plan]
+        async with semaphore:
+            logging.info(f"Reinstalling batch of {len(chunk)} apps: {', '.join(chunk)}")
+            # Records are journaled from the event loop; each is one small synced append
+            recorder = RecordJournaler(journal, op_id, {app_name: [REINSTALL_STEP] for app_name in chunk}, REINSTALL_STEP)
+            script = render_plan_script(REINSTALL_SCRIPT_TEMPLATE, chunk_plan)
+            success, records, error = await run_record_script_async(script, command_class="reinstall", units=len(chunk), on_record=recorder)
+            if not success:
+                logging.error(f"Batch reinstall script failed: {error}")
+            chunk_results = parse_reinstall_results(chunk, records, error)
+            await asyncio.to_thread(recorder.finish, _reinstall_outcomes(chunk_results))
+            return chunk_results
+    
+    chunks = split_plan(build_reinstall_plan(app_list, before, provisioned), chunk_size)
+    results = {}
+    for chunk_results in await asyncio.gather(*(reinstall_chunk(chunk) for chunk in chunks)):
+        results.update(chunk_results)
+    
+    await asyncio.to_thread(journal.end, op_id)
+    invalidate_inventory()
+    return _check_reinstall_results(results, before, await get_inventory_async())
+
+def _reinstall_outcomes(results):
+    """Journal outcomes of the apps a reinstall script reported on."""
+    return [(app_name, REINSTALL_STEP, bool(result["method"]), result["error"]) for app_name, result in results.items()]
+
+def _provisioned_install_command(package_path):
+    """Command that reinstalls one package from its provisioned source."""
+    package_path = package_path.replace("'", "''")
+    return f"Add-AppxProvisionedPackage -Online -PackagePath '{package_path}' -SkipLicense -ErrorAction SilentlyContinue"
+
+def _check_reinstall_results(results, before, after):
+    """Add the installed status before and after the scripts ran.
+    
+    An app only counts as reinstalled if the fresh enumeration finds it,
+    whatever the script reported.
+    """
+    for app_name, result in results.items():
+        result["was_installed"] = before is not None and before.is_installed(app_name)
+        result["installed"] = after is not None and after.is_installed(app_name)
+        if result["method"] and not result["installed"]:
+            result["error"] = f"Reported reinstalled via {result['method']} but not found afterwards"
+            logging.warning(f"{app_name}: {result['error']}")
+    return results
+
 def reinstall_selected_apps(app_list):
     """Reinstall selected apps."""
     if not app_list:
@@ -203,59 +417,16 @@ def reinstall_selected_apps(app_list):
     # Create a restore point before making changes
     create_restore_point()
     
-    success_count = 0
-    failed_count = 0
+    try:
+        results = reinstall_apps_batch(list(app_list))
+    except JobCancelled:
+        raise
+    except Exception as e:
+        print(f"Error reinstalling apps: {str(e)}")
+        logging.error(f"Error reinstalling apps: {str(e)}")
+        return 0, len(app_list)
     
-    for app_name in app_list:
-        try:
-            print(f"Attempting to reinstall {app_name}...")
-            logging.info(f"Attempting to reinstall {app_name}")
-            
-            # Check if already installed
-            was_installed = check_app_installed(app_name)
-            
-            # Method 1: Try to register from existing package
-            ps_cmd1 = f"Get-AppxPackage -AllUsers *{app_name}* | ForEach-Object {{Add-AppxPackage -DisableDevelopmentMode -Register \"$($_.InstallLocation)\\AppXManifest.xml\" -ErrorAction SilentlyContinue}}"
-            success1, _ = run_powershell(ps_cmd1)
-            
-            # Method 2: Try to reinstall from the provisioned source
-            ps_cmd2 = f"Get-AppxProvisionedPackage -Online | Where-Object {{$_.DisplayName -like '*{app_name}*'}} | ForEach-Object {{Add-AppxProvisionedPackage -Online -PackagePath $_.PackagePath -SkipLicense -ErrorAction SilentlyContinue}}"
-            success2, _ = run_powershell(ps_cmd2)
-            
-            # Method 3: Try to register from package family
-            ps_cmd3 = f"Add-AppxPackage -RegisterByFamilyName -MainPackage {app_name} -ErrorAction SilentlyContinue"
-            success3, _ = run_powershell(ps_cmd3)
-            
-            # Check if reinstall was successful - use improved check function
-            now_installed = check_app_installed(app_name)
-            
-            if now_installed:
-                print(f"Successfully reinstalled {app_name}")
-                logging.info(f"Successfully reinstalled {app_name}")
-                success_count += 1
-            else:
-                # Try a more aggressive reinstall attempt
-                print(f"Initial reinstall attempts failed for {app_name}, trying alternative methods...")
-                
-                # Method 4: Try direct reinstall from Microsoft Store
-                ps_cmd4 = f"Add-AppxPackage -RegisterByFamilyName -MainPackage {app_name}"
-                success4, output4 = run_powershell(ps_cmd4)
-                
-                # Check one more time
-                now_installed = check_app_installed(app_name)
-                
-                if now_installed:
-                    print(f"Successfully reinstalled {app_name} from store")
-                    logging.info(f"Successfully reinstalled {app_name} from store")
-                    success_count += 1
-                else:
-                    print(f"Failed to reinstall {app_name}")
-                    logging.warning(f"Failed to reinstall {app_name}")
-                    failed_count += 1
-        except Exception as e:
-            print(f"Error reinstalling {app_name}: {str(e)}")
-            logging.error(f"Error reinstalling {app_name}: {str(e)}")
-            failed_count += 1
+    success_count, failed_count = _report_reinstall_results(results)
     
     # Final results
     result_msg = f"Reinstallation complete. Successfully reinstalled {success_count} apps."
@@ -268,36 +439,246 @@ def reinstall_selected_apps(app_list):
     
     return success_count, failed_count
 
-def restore_defaults():
+def _report_reinstall_results(results):
+    """Print and log the outcome for each app.
+    
+    Returns:
+        tuple: (success_count, failed_count)
+    """
+    success_count = 0
+    failed_count = 0
+    for app_name, result in results.items():
+        if result["installed"]:
+            method = REINSTALL_METHODS.get(result["method"], result["method"] or "already installed")
+            print(f"Successfully reinstalled {app_name} ({method})")
+            logging.info(f"Successfully reinstalled {app_name} via {result['method']}")
+            success_count += 1
+        else:
+            print(f"Failed to reinstall {app_name}")
+            logging.warning(f"Failed to reinstall {app_name}: {result['error']}")
+            failed_count += 1
+    return success_count, failed_count
+
+# Number of reinstall scripts run at the same time by reinstall_selected_apps_async.
+# Package deployments running side by side fail with 0x80073D02 or "another
+# deployment operation is in progress", and reinstalls are not retried, so
+# the scripts run one after another like every other package change
+REINSTALL_CONCURRENCY = 1
+
+async def reinstall_selected_apps_async(app_list, max_concurrency=REINSTALL_CONCURRENCY):
+    """Async counterpart of reinstall_selected_apps.
+    
+    Args:
+        app_list (list): List of app names to reinstall
+        max_concurrency (int): Maximum number of reinstall scripts running at once
+    
+    Returns:
+        tuple: (success_count, failed_count)
+    """
+    if not app_list:
+        logging.info("No apps selected for reinstallation")
+        return 0, 0
+    
+    # Check for admin privileges
+    if not ensure_admin():
+        logging.warning("App reinstallation requires administrator privileges")
+        return 0, len(app_list)
+    
+    logging.info(f"Starting reinstallation of selected apps: {', '.join(app_list)}")
+    
+    # Create a restore point before making changes
+    await asyncio.to_thread(create_restore_point)
+    
+    try:
+        results = await reinstall_apps_batch_async(list(app_list), max_concurrency=max_concurrency)
+    except Exception as e:
+        logging.error(f"Error reinstalling apps: {str(e)}")
+        return 0, len(app_list)
+    
+    success_count = sum(1 for result in results.values() if result["installed"])
+    failed_count = len(results) - success_count
+    
+    result_msg = f"Reinstallation complete. Successfully reinstalled {success_count} apps."
+    if failed_count > 0:
+        result_msg += f" Failed to reinstall {failed_count} apps."
+    logging.info(result_msg)
+    
+    return success_count, failed_count
+
+def plan_restore(baseline_path=None):
+    """Work out what an incremental restore has to do, without changing anything.
+    
+    The current inventory is compared with the recorded baseline, or with the
+    APPS catalog if no baseline was recorded.
+    
+    Args:
+        baseline_path (str): Baseline file written before the first removal,
+            or None for the one in the data directory
+    
+    Returns:
+        dict: "source" ("baseline" or "catalog"), "checked" (number of
+              packages compared), "missing" and "broken" (app names),
+              "provisioned" (missing apps with a provisioned source) and
+              "scripts" (reinstall scripts needed), or None if the installed
+              packages could not be listed
+    """
+    inventory = get_inventory()
+    if inventory is None:
+        logging.error("Cannot plan restore: package inventory unavailable")
+        return None
+    
+    baseline = load_baseline(baseline_path)
+    if baseline is not None:
+        source, app_names = "baseline", baseline
+    else:
+        # Get app list from app_actions.py
+        from app_actions import APPS
+        source, app_names = "catalog", list(APPS)
+    
+    missing = [app_name for app_name in app_names if not inventory.is_installed(app_name)]
+    broken = [app_name for app_name in app_names if inventory.is_broken(app_name)]
+    
+    provisioned = get_provisioned_index() if missing else None
+    with_source = [app_name for app_name in missing if provisioned is not None and provisioned.package_paths(app_name)]
+    
+    work = len(missing) + len(broken)
+    return {
+        "source": source,
+        "checked": len(app_names),
+        "missing": missing,
+        "broken": broken,
+        "provisioned": with_source,
+        "scripts": -(-work // REINSTALL_CHUNK_SIZE)
+    }
+
+def format_restore_plan(plan):
+    """Describe a plan from plan_restore for the user.
+    
+    Returns:
+        str: Multi-line report
+    """
+    source = "the recorded baseline" if plan["source"] == "baseline" else "the app catalog"
+    lines = [f"Checked {plan['checked']} packages against {source}."]
+    if not plan["missing"] and not plan["broken"]:
+        lines.append("Nothing to restore: every package is installed and registered.")
+        return "\n".join(lines)
+    
+    lines.append(f"Missing: {len(plan['missing'])} ({len(plan['provisioned'])} with a provisioned source)")
+    for app_name in plan["missing"]:
+        lines.append(f"  - {app_name}")
+    lines.append(f"Broken registration: {len(plan['broken'])}")
+    for app_name in plan["broken"]:
+        lines.append(f"  - {app_name}")
+    lines.append(f"Work: {plan['scripts']} reinstall script(s) covering {len(plan['missing']) + len(plan['broken'])} apps")
+    return "\n".join(lines)
+
+def plan_restore_defaults():
+    """Print what an incremental restore_defaults() would do, without changing anything.
+    
+    Doesn't ask for administrator privileges, so the plan can be shown before
+    elevating. Without them Windows may refuse to list every user's
+    packages, and there is no plan.
+    
+    Returns:
+        dict: The plan from plan_restore, or None if the installed packages
+              could not be listed
+    """
+    try:
+        plan = plan_restore()
+    except Exception as e:
+        logging.error(f"Error planning restore: {str(e)}")
+        plan = None
+    if plan is None:
+        hint = "" if is_admin() else " Listing every user's packages requires administrator privileges."
+        print(f"Could not list the installed packages.{hint}")
+    else:
+        print(format_restore_plan(plan))
+    return plan
+
+def restore_defaults(incremental=True):
     """Restore system defaults by reinstalling removed apps.
     
+    See plan_restore_defaults for a preview that changes nothing.
+    
+    Args:
+        incremental (bool): Only reinstall missing packages and re-register
+            broken ones (see plan_restore); False re-registers every package
+            and retries every app in APPS
+    
     Returns:
         bool: True if successful (at least some apps restored), False otherwise
     """
     try:
-        print("Restoring defaults to the system...")
-        logging.info("Starting system defaults restoration")
-        
         # Check for admin privileges
         if not ensure_admin():
             print("Restore defaults requires administrator privileges. Please run the application as administrator.")
             logging.warning("Restore defaults requires administrator privileges")
             return False
         
+        print("Restoring defaults to the system...")
+        logging.info("Starting system defaults restoration")
+        
         # Create a restore point first
         create_restore_point()
         
+        if incremental:
+            return _restore_incremental()
+        return _restore_all_defaults()
+    except Exception as e:
+        logging.error(f"Error in restore_defaults: {str(e)}")
+        print(f"Error restoring defaults: {str(e)}")
+        return False
+
+def _restore_incremental():
+    """Reinstall only the missing packages and re-register only the broken ones."""
+    plan = plan_restore()
+    if plan is None:
+        print("Could not list the installed packages; nothing was restored.")
+        return False
+    print(format_restore_plan(plan))
+    
+    app_list = plan["missing"] + [app_name for app_name in plan["broken"] if app_name not in plan["missing"]]
+    if not app_list:
+        logging.info("Restore defaults: nothing to restore")
+        return True
+    
+    # Broken apps are still installed, so the first method re-registers their manifests
+    results = reinstall_apps_batch(app_list)
+    success_count, failed_count = _report_reinstall_results(results)
+    
+    # Repair Windows Store only if something had to be restored
+    print("\nAttempting to repair Windows Store...")
+    run_powershell("WSReset.exe")
+    
+    result_msg = f"Restoration complete. Successfully restored {success_count} apps."
+    if failed_count > 0:
+        result_msg += f" Failed to restore {failed_count} apps."
+        result_msg += " Some apps may need to be manually reinstalled from the Microsoft Store."
+    
+    print(result_msg)
+    logging.info(result_msg)
+    return success_count > 0
+
+def _restore_all_defaults():
+    """Re-register every package, then retry every app in APPS (the full restore)."""
+    try:
         # Get app list from app_actions.py
         from app_actions import APPS
         
         # Step 1: Try to restore existing packages first
         print("Attempting to restore existing packages...")
         ps_cmd1 = "Get-AppxPackage -AllUsers | ForEach-Object {Add-AppxPackage -DisableDevelopmentMode -Register \"$($_.InstallLocation)\\AppXManifest.xml\" -ErrorAction SilentlyContinue}"
-        run_powershell(ps_cmd1)
+        # Re-registers every package in one run: a change, never retried, with
+        # its own latency history apart from the quick package queries
+        run_powershell(ps_cmd1, command_class="register_all")
+        invalidate_inventory()
         
         # Step 2: Reinstall known apps from Windows Store
         print("\nAttempting to reinstall apps from Windows Store...")
         
+        # Provisioned sources for every app from one enumeration
+        provisioned = get_provisioned_index()
+        
         success_count = 0
         failed_count = 0
         
@@ -313,15 +694,20 @@ def restore_defaults():
                     continue
                 
                 # Method 1: Try to reinstall from the provisioned source
-                ps_cmd = (f"Get-AppxProvisionedPackage -Online | Where-Object {{$_.DisplayName -like '*{app_name}*'}} | "
-                        f"ForEach-Object {{Add-AppxProvisionedPackage -Online -PackagePath $_.PackagePath -SkipLicense -ErrorAction SilentlyContinue}}")
-                success1, _ = run_powershell(ps_cmd)
+                if provisioned is None:
+                    ps_cmd = (f"Get-AppxProvisionedPackage -Online | Where-Object {{$_.DisplayName -eq '{app_name}'}} | "
+                            f"ForEach-Object {{Add-AppxProvisionedPackage -Online -PackagePath $_.PackagePath -SkipLicense -ErrorAction SilentlyContinue}}")
+                    success1, _ = run_powershell(ps_cmd, command_class="reinstall")
+                else:
+                    for package_path in provisioned.package_paths(app_name):
+                        run_powershell(_provisioned_install_command(package_path), command_class="reinstall")
                 
                 # Method 2: For Store apps, try to register package
-                ps_cmd = f"Add-AppxPackage -RegisterByFamilyName -MainPackage {app_name} -ErrorAction SilentlyContinue"
+                ps_cmd = f"Add-AppxPackage -RegisterByFamilyName -MainPackage {family_name(app_name)} -ErrorAction SilentlyContinue"
                 success2, _ = run_powershell(ps_cmd)
                 
                 # Check if now installed
+                invalidate_inventory()
                 now_installed = check_app_installed(app_name)
                 
                 if now_installed:
@@ -0,0 +1,159 @@
+from powershell_utils import run_powershell_partial, run_powershell_async_partial
+import json
+import logging
+
+# Prefix marking a result line; everything else a script prints is ignored
+RECORD_PREFIX = "@@R@@"
+
+# PowerShell helper prepended to every generated script. Write-Record writes one
+# hashtable as a single compact JSON line, so multi-line values stay on one line.
+POWERSHELL_RECORD_FUNCTION = r"""
+function Write-Record($record) {
+    Write-Output ('@@R@@' + (ConvertTo-Json -InputObject $record -Compress -Depth 4))
+}
+"""
+
+# Value of "event" in the record a batch script writes when it starts on an
+# app, before the records of the app's steps
+START_EVENT = "start"
+
+# Largest plan (in characters of JSON) compiled into one generated script.
+# Scripts travel over stdin, so this bounds the memory and the work lost to
+# one failed run rather than a command line limit.
+MAX_PLAN_CHARS = 256 * 1024
+
+def render_plan_script(template, plan):
+    """Put a JSON plan into a script template in place of __PLAN__.
+    
+    Args:
+        template (str): Script with a __PLAN__ placeholder inside a here-string
+        plan (list): Plan entries (dicts)
+    
+    Returns:
+        str: The script
+    """
+    return template.replace("__PLAN__", json.dumps(plan, separators=(",", ":")))
+
+def split_plan(plan, max_entries, max_chars=MAX_PLAN_CHARS):
+    """Split plan entries into chunks for separate scripts.
+    
+    A chunk takes up to max_entries entries, and fewer when their JSON would
+    pass max_chars, so apps with long package or registry key lists get
+    smaller chunks. An entry larger than max_chars gets a chunk of its own.
+    
+    Args:
+        plan (list): Plan entries in order
+        max_entries (int): Maximum entries per chunk
+        max_chars (int): Maximum JSON characters per chunk
+    
+    Returns:
+        list: Lists of entries, in the original order
+    """
+    chunks = []
+    current = []
+    size = 0
+    for entry in plan:
+        entry_size = len(json.dumps(entry, separators=(",", ":"))) + 1
+        if current and (len(current) >= max_entries or size + entry_size > max_chars):
+            chunks.append(current)
+            current = []
+            size = 0
+        current.append(entry)
+        size += entry_size
+    if current:
+        chunks.append(current)
+    return chunks
+
+def with_record_function(script):
+    """Prepend the Write-Record helper to a generated script."""
+    return POWERSHELL_RECORD_FUNCTION + script
+
+def iter_records(output):
+    """Yield the records found in script output, one dict per result line.
+    
+    Lines without the prefix are skipped, and so is a record line that cannot
+    be decoded (e.g. the last line of output cut short by a timeout).
+    
+    Args:
+        output (str): Script output
+    
+    Yields:
+        dict: One record
+    """
+    for line in (output or "").splitlines():
+        record = parse_record(line)
+        if record is not None:
+            yield record
+
+def parse_record(line):
+    """Decode one line of script output.
+    
+    Returns:
+        dict: The record, or None if the line is not a (well-formed) record
+    """
+    line = line.strip()
+    if not line.startswith(RECORD_PREFIX):
+        return None
+    try:
+        record = json.loads(line[len(RECORD_PREFIX):])
+    except ValueError:
+        logging.warning(f"Skipping malformed result record: {line[:100]}")
+        return None
+    return record if isinstance(record, dict) else None
+
+def is_start_record(record):
+    """Whether a record marks the start of an app rather than a step's outcome."""
+    return record.get("event") == START_EVENT
+
+def run_record_script(script, timeout=None, command_class="command", units=1, on_record=None):
+    """Run a generated script and collect the records it wrote.
+    
+    If the script times out, the records written before the timeout are
+    still returned.
+    
+    Args:
+        script (str): Script body that calls Write-Record
+        timeout (int): Timeout in seconds, or None for the adaptive timeout
+        command_class (str): Class for timeouts and retries (see run_powershell)
+        units (int): Items of work in the script, e.g. apps in a batch
+        on_record (callable): Called with each record as soon as the script
+            writes it, e.g. to journal progress while the script still runs
+    
+    Returns:
+        tuple: (success, records, error) where records is a list of dicts and
+               error is the failure message (None on success)
+    """
+    records = []
+    on_output = _record_listener(records, on_record) if on_record is not None else None
+    success, output, partial = run_powershell_partial(with_record_function(script), timeout=timeout, command_class=command_class,
+                                                      units=units, on_output=on_output)
+    if on_output is None:
+        records = list(iter_records(output if success else partial))
+    return _collect(success, output, records)
+
+async def run_record_script_async(script, timeout=None, command_class="command", units=1, on_record=None):
+    """Async counterpart of run_record_script."""
+    records = []
+    on_output = _record_listener(records, on_record) if on_record is not None else None
+    success, output, partial = await run_powershell_async_partial(with_record_function(script), timeout=timeout, command_class=command_class,
+                                                                  units=units, on_output=on_output)
+    if on_output is None:
+        records = list(iter_records(output if success else partial))
+    return _collect(success, output, records)
+
+def _record_listener(records, on_record):
+    """Output line callback that collects the records and hands each to on_record"""
+    def on_output(line):
+        record = parse_record(line)
+        if record is not None:
+            records.append(record)
+            on_record(record)
+    return on_output
+
+def _collect(success, output, records):
+    """Result of a run, keeping the records written before a failure."""
+    if success:
+        return True, records, None
+    if records:
+        logging.warning(f"Script failed after {len(records)} result(s): {output}")
+    return False, records, output
@@ -1,4 +1,4 @@
-from app_actions import APPS, SELECTABLE_APPS, remove_selected_apps
+from app_actions import CATALOG, SELECTABLE_APPS, remove_selected_apps
 from restore import get_available_apps_for_reinstall, reinstall_selected_apps, create_restore_point
 from powershell_utils import ensure_admin
 import logging
@@ -18,7 +18,7 @@ def choose_selected_apps():
         
         # Display the app list with descriptions
         for i, app_name in enumerate(SELECTABLE_APPS, start=1):
-            description = APPS[app_name]["description"] if app_name in APPS and "description" in APPS[app_name] else app_name
+            description = CATALOG.description(app_name)
             print(f"{i}. {description} ({app_name})")
         
         # Add an option to cancel
@@ -84,7 +84,7 @@ def choose_selected_apps():
             # Show selected apps and confirm
             print("\nYou've selected the following apps for removal:")
             for app_name in chosen_apps:
-                description = APPS[app_name]["description"] if app_name in APPS and "description" in APPS[app_name] else app_name
+                description = CATALOG.description(app_name)
                 print(f"- {description} ({app_name})")
             
             confirm = input("\nConfirm removal? (y/n): ").strip().lower()
@@ -0,0 +1,46 @@
+"""Stand-in for the PowerShell session host, for exercising the session pool off Windows.
+
+Speaks the same stdin/stdout framing as powershell_utils.SESSION_HOST_SCRIPT but
+runs each command with /bin/sh instead of PowerShell: every stdout line is sent
+as it is written, and the exit code decides success:
+
+    python session_host_standin.py
+
+Point the pool at it with:
+
+    enable_session_pool(host_args=[sys.executable, "session_host_standin.py"])
+"""
+import base64
+import subprocess
+import sys
+
+def _encode(text):
+    return base64.b64encode(text.encode("utf-8")).decode("ascii")
+
+def _send(line):
+    print(line, flush=True)
+
+def main():
+    """Answer framed requests until stdin is closed."""
+    for line in sys.stdin:
+        parts = line.strip().split(" ")
+        if len(parts) >= 2 and parts[0] == "###PING":
+            _send(f"###PONG {parts[1]}")
+            continue
+        if len(parts) < 3 or parts[0] != "###REQ":
+            continue
+        
+        request_id = parts[1]
+        cmd = base64.b64decode(parts[2]).decode("utf-8", errors="replace")
+        process = subprocess.Popen(["/bin/sh", "-c", cmd], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        for output_line in process.stdout:
+            text = output_line.rstrip("\n")
+            _send(f"###OUT {request_id} {_encode(text)}")
+        stderr = process.stderr.read()
+        returncode = process.wait()
+        
+        ok = 1 if returncode == 0 else 0
+        _send(f"###RESP {request_id} {ok} {_encode('' if ok else stderr)}")
+
+if __name__ == "__main__":
+    main()
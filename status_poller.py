@@ -0,0 +1,125 @@
+import logging
+from app_inventory import load_fingerprint, invalidate_inventory
+from job_manager import get_job_manager, PRIORITY_BACKGROUND
+
+class StatusPoller:
+    """Polls the installed-package fingerprint and pushes only changed app statuses.
+    
+    At most one check runs at a time, as a background-priority job, so user
+    actions queued at the same time run first. When nothing changes the
+    interval backs off up to max_interval; any change resets it. Polling
+    pauses while the window is minimized.
+    """
+    def __init__(self, root, get_statuses, on_change, min_interval=15000, max_interval=120000):
+        """
+        Args:
+            root (tk.Tk): Window used for scheduling and minimized detection
+            get_statuses (callable): Returns {app_name: installed} for the rows
+                currently shown (called on the main thread)
+            on_change (callable): Called on the main thread as
+                on_change(app_name, installed) for each row that changed
+            min_interval (int): Poll interval in milliseconds after a change
+            max_interval (int): Longest poll interval in milliseconds
+        """
+        self.root = root
+        self.get_statuses = get_statuses
+        self.on_change = on_change
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.fingerprint = None
+        self._in_flight = False
+        self._stopped = False
+        self._after_id = None
+    
+    def start(self):
+        """Schedule the first check."""
+        self._stopped = False
+        self._schedule(self.min_interval)
+    
+    def stop(self):
+        """Cancel the next scheduled check and drop a check still waiting for a worker."""
+        self._stopped = True
+        self._cancel_scheduled()
+        get_job_manager().cancel("status_poll")
+    
+    def poll_now(self):
+        """Check right away (e.g. after a removal or reinstall) and reset the backoff."""
+        self._cancel_scheduled()
+        self._stopped = False
+        self.interval = self.min_interval
+        self._tick()
+    
+    def _cancel_scheduled(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+    
+    def _schedule(self, delay):
+        self._after_id = self.root.after(delay, self._tick)
+    
+    def _tick(self):
+        """Start a background check unless one is running or the window is minimized."""
+        self._after_id = None
+        try:
+            if self.root.state() == "iconic":
+                # Nobody is looking; check again once the window is back
+                self._schedule(self.min_interval)
+                return
+            
+            statuses = self.get_statuses()
+            if self._in_flight or not statuses:
+                self._schedule(self.interval)
+                return
+            
+            self._in_flight = True
+            get_job_manager().submit(
+                "status_poll",
+                self._check,
+                dict(statuses),
+                priority=PRIORITY_BACKGROUND,
+                on_done=self._check_done
+            )
+        except Exception as e:
+            logging.error(f"Error scheduling status check: {str(e)}")
+            self._schedule(self.max_interval)
+    
+    def _check(self, statuses):
+        """Background job: compare the fingerprint and find changed rows."""
+        changed = {}
+        try:
+            # The next poll is the retry; a failed check must not hold up the workers
+            result = load_fingerprint(retries=0)
+            if result is not None:
+                fingerprint, installed_names = result
+                if fingerprint != self.fingerprint:
+                    if self.fingerprint is not None:
+                        # Something was installed or removed outside the app
+                        invalidate_inventory()
+                    self.fingerprint = fingerprint
+                    for app_name, installed in statuses.items():
+                        now_installed = app_name.casefold() in installed_names
+                        if now_installed != installed:
+                            changed[app_name] = now_installed
+        except Exception as e:
+            logging.error(f"Error checking app statuses: {str(e)}")
+        finally:
+            self.root.after(0, lambda: self._check_complete(changed))
+    
+    def _check_done(self, job):
+        """Worker thread: a check dropped before it ran never reports, so clear it here."""
+        if job.cancelled:
+            self.root.after(0, lambda: self._check_complete({}))
+    
+    def _check_complete(self, changed):
+        """Main thread: push changed rows and pick the next interval."""
+        self._in_flight = False
+        for app_name, installed in changed.items():
+            self.on_change(app_name, installed)
+        
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+        if self._after_id is None and not self._stopped:
+            self._schedule(self.interval)
@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+import psutil
+
+# Seconds between samples
+DEFAULT_INTERVAL = 2.0
+
+# Samples kept in the history (two minutes at the default interval)
+DEFAULT_HISTORY = 60
+
+class RingBuffer:
+    """Fixed-size history that overwrites its oldest entry once full."""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._items = [None] * capacity
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+    
+    def append(self, item):
+        with self._lock:
+            self._items[self._next] = item
+            self._next = (self._next + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+    
+    def latest(self):
+        """Get the newest entry, or None if the buffer is empty."""
+        with self._lock:
+            if not self._count:
+                return None
+            return self._items[self._next - 1]
+    
+    def items(self):
+        """Get the entries from oldest to newest."""
+        with self._lock:
+            start = (self._next - self._count) % self.capacity
+            return [self._items[(start + i) % self.capacity] for i in range(self._count)]
+    
+    def values(self, key):
+        """Get one field of every entry, oldest first."""
+        return [item[key] for item in self.items()]
+    
+    def __len__(self):
+        return self._count
+
+def take_sample():
+    """Take one sample of the system load.
+    
+    Returns:
+        dict: "time", "cpu" (average percent), "per_core" (percent per logical
+              core), "ram" (percent), "commit" (percent of RAM plus page file in
+              use, which tracks the Windows commit charge) and "processes"
+    """
+    per_core = psutil.cpu_percent(percpu=True)
+    memory = psutil.virtual_memory()
+    swap = psutil.swap_memory()
+    commit_total = memory.total + swap.total
+    return {
+        "time": time.time(),
+        "cpu": sum(per_core) / len(per_core) if per_core else 0.0,
+        "per_core": per_core,
+        "ram": memory.percent,
+        "commit": 100.0 * (memory.used + swap.used) / commit_total if commit_total else 0.0,
+        "processes": len(psutil.pids())
+    }
+
+class SystemSampler:
+    """Samples the system load on a background thread into a ring buffer.
+    
+    Readers (e.g. the sidebar monitor on the Tk main thread) only look at the
+    buffer, so they never wait on psutil.
+    """
+    def __init__(self, interval=DEFAULT_INTERVAL, history=DEFAULT_HISTORY):
+        """
+        Args:
+            interval (float): Seconds between samples
+            history (int): Number of samples kept
+        """
+        self.interval = interval
+        self.buffer = RingBuffer(history)
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Start sampling in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop sampling after the current sample."""
+        self._stop.set()
+    
+    def latest(self):
+        """Get the newest sample, or None before the first one."""
+        return self.buffer.latest()
+    
+    def history(self, key):
+        """Get one field of every kept sample, oldest first."""
+        return self.buffer.values(key)
+    
+    def _run(self):
+        # The first cpu_percent call only sets the baseline for the next one
+        psutil.cpu_percent(percpu=True)
+        while not self._stop.wait(self.interval):
+            try:
+                self.buffer.append(take_sample())
+            except Exception as e:
+                logging.error(f"Error sampling system load: {str(e)}")
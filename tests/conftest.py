@@ -0,0 +1,43 @@
+import logging
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The modules set up a log file in the working directory unless logging is
+# already configured, and keep their state files in the data directory; keep
+# both out of the checkout
+logging.getLogger().addHandler(logging.NullHandler())
+os.environ.setdefault("GAMING_DEBLOATER_DATA", tempfile.mkdtemp(prefix="debloater-tests-"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_data import DATA_DIR_ENV
+from app_inventory import invalidate_inventory, invalidate_provisioned_index
+from fake_powershell import FakePowerShell
+from operation_journal import OperationJournal
+from powershell_utils import set_command_runner
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Give every test its own data directory (baseline, journal, latency history)."""
+    path = tmp_path / "data"
+    monkeypatch.setenv(DATA_DIR_ENV, str(path))
+    return path
+
+@pytest.fixture
+def fake_powershell():
+    """Route every PowerShell command to a simulated machine that answers instantly."""
+    fake = FakePowerShell(package_count=60, time_scale=0)
+    previous = set_command_runner(fake)
+    invalidate_inventory()
+    invalidate_provisioned_index()
+    yield fake
+    set_command_runner(previous)
+    invalidate_inventory()
+    invalidate_provisioned_index()
+
+@pytest.fixture
+def journal(tmp_path):
+    return OperationJournal(str(tmp_path / "journal.jsonl"), str(tmp_path / "summary.json"))
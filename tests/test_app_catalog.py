@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from app_catalog import AppCatalog, compile_catalog, load_catalog, CATALOG_FILE
+
+def test_shipped_catalog_loads_without_leaving_files_behind(tmp_path):
+    catalog_path = tmp_path / "app_catalog.json"
+    with open(CATALOG_FILE, encoding="utf-8") as f:
+        catalog_path.write_text(f.read(), encoding="utf-8")
+    
+    catalog = load_catalog(str(catalog_path))
+    
+    assert len(catalog) > 0
+    assert catalog.is_protected("Microsoft.WindowsStore")
+    assert "Microsoft.WindowsStore" not in catalog.unneeded()
+    assert [path.name for path in tmp_path.iterdir()] == ["app_catalog.json"]
+
+def test_lookups_are_case_insensitive_and_indexes_are_built_on_first_use():
+    entries, categories = compile_catalog({
+        "categories": {"gaming": "Gaming Apps"},
+        "apps": [{"name": "Microsoft.XboxApp", "category": "gaming", "family_name": "Microsoft.XboxApp_8wekyb3d8bbwe"}]
+    })
+    catalog = AppCatalog(entries, categories)
+    assert "_by_family" not in vars(catalog)
+    
+    assert catalog.get("microsoft.xboxapp").name == "Microsoft.XboxApp"
+    assert catalog.find_by_family("MICROSOFT.XBOXAPP_8WEKYB3D8BBWE").name == "Microsoft.XboxApp"
+    assert catalog.in_category("gaming") == ("Microsoft.XboxApp",)
+    assert catalog.description("Microsoft.XboxApp") == "Microsoft.XboxApp"
+
+@pytest.mark.parametrize("data, message", [
+    ({"apps": {}}, "'apps' list"),
+    ({"apps": [{"description": "No name"}]}, "has no name"),
+    ({"apps": [{"name": "A"}, {"name": "a"}]}, "listed twice"),
+    ({"categories": {"gaming": "Gaming"}, "apps": [{"name": "A", "category": "other"}]}, "unknown category"),
+    ({"apps": [{"name": "A", "registry_keys": "HKCU:\\\\A"}]}, "invalid registry_keys"),
+])
+def test_malformed_catalogs_are_rejected(tmp_path, data, message):
+    path = tmp_path / "app_catalog.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    
+    with pytest.raises(ValueError, match=message):
+        load_catalog(str(path))
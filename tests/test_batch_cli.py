@@ -0,0 +1,31 @@
+from app_inventory import get_inventory
+from batch_cli import select_unused
+
+def unused_record(name, usage_known=True):
+    return {"name": name, "display_name": name, "days_since_used": 400, "usage_known": usage_known}
+
+def test_select_unused_leaves_out_protected_system_and_never_seen_apps(fake_powershell):
+    fillers = [name for name in fake_powershell.installed_names() if name.startswith("Fabrikam.")][:5]
+    framework, non_removable, system, never_seen, plain = fillers
+    fake_powershell.catalog[framework.casefold()]["IsFramework"] = True
+    fake_powershell.catalog[non_removable.casefold()]["NonRemovable"] = True
+    fake_powershell.catalog[system.casefold()]["SignatureKind"] = "System"
+    unused = [unused_record(name) for name in (framework, non_removable, system, plain)]
+    unused += [unused_record(never_seen, usage_known=False), unused_record("Microsoft.WindowsStore")]
+    
+    found, skipped = select_unused(unused, get_inventory())
+    
+    assert found == [plain]
+    assert {entry["name"]: entry["reason"] for entry in skipped} == {
+        framework: "system",
+        non_removable: "system",
+        system: "system",
+        never_seen: "unknown_usage",
+        "Microsoft.WindowsStore": "protected"
+    }
+
+def test_select_unused_picks_nothing_without_an_inventory():
+    found, skipped = select_unused([unused_record("Contoso.App")], None)
+    
+    assert found == []
+    assert skipped == [{"name": "Contoso.App", "reason": "unverified"}]
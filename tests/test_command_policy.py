@@ -0,0 +1,78 @@
+import pytest
+
+import powershell_utils
+from command_policy import classify_failure, class_policy, infer_command_class
+from powershell_utils import run_powershell
+
+@pytest.mark.parametrize("output, timed_out, expected", [
+    ("Command timed out after 120 seconds", False, "timeout"),
+    ("", True, "timeout"),
+    ("Deployment failed with HRESULT: 0x80073D02", False, "transient"),
+    ("Another operation is in progress", False, "transient"),
+    ("PowerShell session host exited unexpectedly", False, "transient"),
+    ("Package was not found", False, "hard"),
+    (None, False, "hard")
+])
+def test_classify_failure(output, timed_out, expected):
+    assert classify_failure(output, timed_out) == expected
+
+@pytest.mark.parametrize("cmd, expected", [
+    ("Get-AppxPackage -Name Foo | Select-Object Name", "Get-AppxPackage"),
+    ("Get-AppxPackage -AllUsers | ForEach-Object {Add-AppxPackage -Register $_.InstallLocation}", "Add-AppxPackage"),
+    ("Get-AppxProvisionedPackage -Online | Where-Object {$_.DisplayName -eq 'Foo'} | "
+     "ForEach-Object {Add-AppxProvisionedPackage -Online -PackagePath $_.PackagePath}", "Add-AppxProvisionedPackage"),
+    ("WSReset.exe", "command")
+])
+def test_infer_command_class(cmd, expected):
+    assert infer_command_class(cmd) == expected
+
+def test_query_feeding_a_change_gets_no_retries():
+    command_class = infer_command_class("Get-AppxPackage -AllUsers | ForEach-Object {Add-AppxPackage -Register $_}")
+    
+    assert class_policy(command_class)["retries"] == 0
+
+def test_timed_out_change_in_a_query_pipeline_runs_once(fake_powershell, no_backoff):
+    fake_powershell.hang("Add-AppxPackage")
+    
+    success, _ = run_powershell("Get-AppxPackage -AllUsers | ForEach-Object {Add-AppxPackage -Register $_}", timeout=10)
+    
+    assert not success
+    assert len(fake_powershell.calls) == 1
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(powershell_utils, "backoff_delay", lambda attempt: 0)
+
+def test_transient_failure_of_a_query_is_retried(fake_powershell, no_backoff):
+    fake_powershell.fail("Get-Service -Name Spooler", "Error 0x800706BA: RPC server unavailable", times=1)
+    
+    success, _ = run_powershell("Get-Service -Name Spooler", timeout=10)
+    
+    assert success
+    assert len(fake_powershell.calls) == 2
+
+def test_hard_failure_is_not_retried(fake_powershell, no_backoff):
+    fake_powershell.fail("Get-Service -Name Spooler", "Cannot find any service with service name 'Spooler'")
+    
+    success, output = run_powershell("Get-Service -Name Spooler", timeout=10)
+    
+    assert not success
+    assert "Cannot find" in output
+    assert len(fake_powershell.calls) == 1
+
+def test_timeout_is_not_retried(fake_powershell, no_backoff):
+    fake_powershell.hang("Get-Service -Name Spooler")
+    
+    success, output = run_powershell("Get-Service -Name Spooler", timeout=10)
+    
+    assert not success
+    assert classify_failure(output) == "timeout"
+    assert len(fake_powershell.calls) == 1
+
+def test_changes_are_not_retried_even_after_a_transient_failure(fake_powershell, no_backoff):
+    fake_powershell.fail("Remove-AppxPackage", "Error 0x80073D02: resources in use", times=1)
+    
+    success, _ = run_powershell("Remove-AppxPackage -Package Foo", timeout=10)
+    
+    assert not success
+    assert len(fake_powershell.calls) == 1
@@ -0,0 +1,145 @@
+import threading
+
+import pytest
+
+from app_actions import remove_apps_batch, UNNEEDED_APPS
+from job_manager import (JobManager, JobCancelled, current_job, PACKAGES_RESOURCE, PRIORITY_USER,
+                         PRIORITY_BACKGROUND, QUEUED, DONE)
+from powershell_utils import set_command_runner
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_workers=2)
+    yield manager
+    manager.shutdown()
+
+def hold_the_worker(manager):
+    """Occupy a one-worker manager until the returned event is set"""
+    release = threading.Event()
+    started = threading.Event()
+    
+    def hold():
+        started.set()
+        release.wait(5)
+    
+    manager.submit("hold", hold)
+    assert started.wait(5)
+    return release
+
+def test_same_key_joins_the_job_in_flight():
+    manager = JobManager(max_workers=1)
+    try:
+        release = hold_the_worker(manager)
+        calls = []
+        first = manager.submit("inventory", lambda: calls.append(1) or "inventory")
+        second = manager.submit("inventory", lambda: calls.append(2) or "other")
+        
+        assert second is first
+        assert first.joined == 1
+        release.set()
+        assert first.wait(5) == second.wait(5) == "inventory"
+        assert calls == [1]
+        # Once it is over the key starts a new job
+        assert manager.submit("inventory", lambda: "again").wait(5) == "again"
+    finally:
+        manager.shutdown()
+
+def test_user_jobs_run_before_queued_background_jobs():
+    manager = JobManager(max_workers=1)
+    try:
+        release = hold_the_worker(manager)
+        order = []
+        jobs = [
+            manager.submit("poll:a", order.append, "poll:a", priority=PRIORITY_BACKGROUND),
+            manager.submit("poll:b", order.append, "poll:b", priority=PRIORITY_BACKGROUND),
+            manager.submit("remove", order.append, "remove", priority=PRIORITY_USER),
+            # The user asks for what poll:b was going to fetch anyway; it now
+            # queues as a user job submitted at this point
+            manager.submit("poll:b", order.append, "poll:b", priority=PRIORITY_USER)
+        ]
+        
+        release.set()
+        for job in jobs:
+            job.wait(5)
+        assert order == ["remove", "poll:b", "poll:a"]
+        assert jobs[1].priority == PRIORITY_USER
+    finally:
+        manager.shutdown()
+
+def test_jobs_sharing_a_resource_run_one_at_a_time(manager):
+    release = threading.Event()
+    started = threading.Event()
+    lock = threading.Lock()
+    running = []
+    most_at_once = []
+    
+    def change(name):
+        with lock:
+            running.append(name)
+            most_at_once.append(len(running))
+        started.set()
+        release.wait(5)
+        with lock:
+            running.remove(name)
+        return name
+    
+    first = manager.submit("remove:A", change, "A", resource=PACKAGES_RESOURCE)
+    assert started.wait(5)
+    second = manager.submit("reinstall:B", change, "B", resource=PACKAGES_RESOURCE)
+    # A job without the resource still gets the free worker
+    other = manager.submit("reinstall_list", lambda: "listed")
+    assert other.wait(5) == "listed"
+    assert second.state == QUEUED
+    
+    release.set()
+    assert first.wait(5) == "A"
+    assert second.wait(5) == "B"
+    assert max(most_at_once) == 1
+
+def test_waiting_job_can_be_cancelled(manager):
+    release = threading.Event()
+    started = threading.Event()
+    
+    def hold():
+        started.set()
+        release.wait(5)
+    
+    holder = manager.submit("remove:A", hold, resource=PACKAGES_RESOURCE)
+    assert started.wait(5)
+    waiting = manager.submit("remove:B", lambda: "removed", resource=PACKAGES_RESOURCE)
+    
+    assert waiting.cancel()
+    with pytest.raises(JobCancelled):
+        waiting.wait(5)
+    release.set()
+    holder.wait(5)
+    assert holder.state == DONE
+
+class CancelAfterFirstRemoval:
+    """Runner that cancels the calling job once the first removal script ran"""
+    def __init__(self, fake):
+        self.fake = fake
+    
+    def is_admin(self):
+        return True
+    
+    def run(self, cmd, timeout=120, on_output=None):
+        result = self.fake.run(cmd, timeout, on_output)
+        if "Remove-AppxPackage" in cmd:
+            current_job().cancel()
+        return result
+
+def test_removal_stops_between_chunks_once_cancelled(manager, fake_powershell, journal):
+    apps = UNNEEDED_APPS[:3]
+    set_command_runner(CancelAfterFirstRemoval(fake_powershell))
+    
+    job = manager.submit("remove", remove_apps_batch, apps, chunk_size=1, journal=journal, resource=PACKAGES_RESOURCE)
+    
+    with pytest.raises(JobCancelled):
+        job.wait(10)
+    installed = fake_powershell.installed_names()
+    assert apps[0] not in installed
+    assert apps[1] in installed and apps[2] in installed
+    # A cancelled removal is over, not interrupted
+    assert journal.interrupted() == []
+    assert journal.summary()[-1]["status"] == "cancelled"
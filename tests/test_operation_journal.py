@@ -0,0 +1,107 @@
+from app_actions import remove_apps_batch, UNNEEDED_APPS
+from operation_journal import OperationJournal, RecordJournaler, resume_interrupted, PACKAGE_STEP, REINSTALL_STEP
+from restore import reinstall_apps_batch
+
+class RecordingJournal(OperationJournal):
+    """Journal that also keeps every record it wrote, compacted or not"""
+    def __init__(self, path, summary_path):
+        super().__init__(path, summary_path)
+        self.records = []
+    
+    def _append(self, records):
+        self.records.extend(records)
+        super()._append(records)
+
+def test_removal_journals_each_app_as_its_records_arrive(fake_powershell, tmp_path):
+    journal = RecordingJournal(str(tmp_path / "journal.jsonl"), str(tmp_path / "summary.json"))
+    apps = UNNEEDED_APPS[:3]
+    
+    results = remove_apps_batch(apps, journal=journal)
+    
+    assert all(result["removed"] for result in results.values())
+    events = [(record["event"], record.get("app") or list(record.get("steps", {}))) for record in journal.records]
+    assert events[0] == ("planned", apps)
+    assert events[-1] == ("ended", [])
+    # One started record per app, each followed by that app's outcomes
+    started = [index for index, (event, _) in enumerate(events) if event == "started"]
+    assert [events[index][1] for index in started] == [[app_name] for app_name in apps]
+    for index, app_name in zip(started, apps):
+        assert events[index + 1] == ("finished", app_name)
+    assert journal.interrupted() == []
+
+def test_reinstall_journals_one_outcome_per_app(fake_powershell, tmp_path):
+    journal = RecordingJournal(str(tmp_path / "journal.jsonl"), str(tmp_path / "summary.json"))
+    apps = UNNEEDED_APPS[:2]
+    
+    reinstall_apps_batch(apps, journal=journal)
+    
+    finished = [(record["app"], record["step"]) for record in journal.records if record["event"] == "finished"]
+    assert finished == [(app_name, "reinstall") for app_name in apps]
+
+def test_crash_mid_chunk_leaves_only_unreported_steps_pending(journal):
+    steps = {"A": [PACKAGE_STEP, "HKCU:\\A"], "B": [PACKAGE_STEP], "C": [PACKAGE_STEP]}
+    op_id = journal.begin("remove", steps)
+    recorder = RecordJournaler(journal, op_id, steps)
+    
+    recorder({"app": "A", "event": "start"})
+    recorder({"app": "A", "step": PACKAGE_STEP, "ok": True, "message": ""})
+    recorder({"app": "A", "step": "HKCU:\\A", "ok": True, "message": ""})
+    recorder({"app": "B", "event": "start"})
+    # The process dies here, before the script reports on B
+    
+    interrupted = journal.interrupted()
+    assert len(interrupted) == 1
+    assert interrupted[0]["pending"] == {"B": [PACKAGE_STEP], "C": [PACKAGE_STEP]}
+    assert interrupted[0]["done"] == 2
+    assert ("B", PACKAGE_STEP) in journal.operations()[op_id]["started"]
+
+def test_finish_only_journals_outcomes_the_script_did_not_report(journal):
+    steps = {"A": [PACKAGE_STEP], "B": [PACKAGE_STEP]}
+    op_id = journal.begin("remove", steps)
+    recorder = RecordJournaler(journal, op_id, steps)
+    recorder({"app": "A", "step": PACKAGE_STEP, "ok": True, "message": ""})
+    
+    recorder.finish([("A", PACKAGE_STEP, True, ""), ("B", PACKAGE_STEP, False, "Command timed out after 5 seconds")])
+    
+    finished = [record for record in journal._read() if record["event"] == "finished"]
+    assert [(record["app"], record["ok"]) for record in finished] == [("A", True), ("B", False)]
+
+def test_records_of_apps_outside_the_chunk_are_ignored(journal):
+    op_id = journal.begin("remove", {"A": [PACKAGE_STEP]})
+    recorder = RecordJournaler(journal, op_id, {"A": [PACKAGE_STEP]})
+    
+    recorder({"app": "Other", "event": "start"})
+    recorder({"app": "Other", "step": PACKAGE_STEP, "ok": True, "message": ""})
+    
+    assert [record["event"] for record in journal._read()] == ["planned"]
+
+def test_resume_reruns_only_the_apps_with_steps_left(fake_powershell, journal):
+    apps = UNNEEDED_APPS[:3]
+    op_id = journal.begin("remove", {app_name: [PACKAGE_STEP] for app_name in apps})
+    # The first app was reported done before the process died
+    journal.finished(op_id, [(apps[0], PACKAGE_STEP, True, "")])
+    
+    results = resume_interrupted(journal)
+    
+    assert sorted(results["remove"]) == sorted(apps[1:])
+    installed = fake_powershell.installed_names()
+    assert apps[0] in installed
+    assert apps[1] not in installed and apps[2] not in installed
+    assert journal.interrupted() == []
+    statuses = {entry["op"]: entry["status"] for entry in journal.summary()}
+    assert statuses[op_id] == "resumed"
+
+def test_resume_reinstalls_only_the_apps_still_missing(fake_powershell, journal):
+    apps = UNNEEDED_APPS[:2]
+    remove_apps_batch(apps[:1], journal=journal)
+    journal.begin("reinstall", {app_name: [REINSTALL_STEP] for app_name in apps})
+    
+    results = resume_interrupted(journal)
+    
+    assert list(results["reinstall"]) == apps[:1]
+    assert set(apps) <= set(fake_powershell.installed_names())
+    assert journal.interrupted() == []
+
+def test_nothing_to_resume(fake_powershell, journal):
+    assert resume_interrupted(journal) == {"remove": {}, "reinstall": {}}
+    assert fake_powershell.calls == []
@@ -0,0 +1,54 @@
+import pytest
+
+import restore
+from app_actions import remove_apps_batch, UNNEEDED_APPS
+from app_catalog import get_catalog
+from app_inventory import ensure_baseline, load_baseline, refresh_baseline, invalidate_provisioned_index
+from restore import plan_restore_defaults, reinstall_apps_batch, family_name
+
+@pytest.fixture
+def removed_app(fake_powershell, journal):
+    """An app that was installed when the baseline was recorded and has been removed since"""
+    app_name = UNNEEDED_APPS[0]
+    remove_apps_batch([app_name], journal=journal)
+    return app_name
+
+def test_plan_restore_defaults_needs_no_elevation(fake_powershell, removed_app, monkeypatch):
+    fake_powershell.admin = False
+    monkeypatch.setattr(restore, "ensure_admin", lambda: pytest.fail("planning must not ask for elevation"))
+    
+    plan = plan_restore_defaults()
+    
+    assert plan["source"] == "baseline"
+    assert plan["missing"] == [removed_app]
+
+def test_plan_restore_defaults_reports_an_unavailable_inventory(fake_powershell, capsys):
+    fake_powershell.admin = False
+    fake_powershell.fail("Get-AppxPackage -AllUsers", "Access is denied")
+    
+    assert plan_restore_defaults() is None
+    assert "requires administrator privileges" in capsys.readouterr().out
+
+def test_baseline_is_kept_until_refreshed(fake_powershell, removed_app):
+    # Recorded before the removal and not replaced by later removals
+    ensure_baseline()
+    assert removed_app in load_baseline()
+    
+    assert refresh_baseline()
+    assert removed_app not in load_baseline()
+
+def test_family_fallback_registers_by_the_catalog_family_name(fake_powershell, removed_app, journal):
+    # No manifest and no provisioned source left, so only the family method can work
+    fake_powershell.catalog[removed_app.casefold()]["provisioned"] = False
+    invalidate_provisioned_index()
+    
+    results = reinstall_apps_batch([removed_app], journal=journal)
+    
+    assert results[removed_app]["method"] == "family"
+    assert results[removed_app]["installed"]
+
+def test_family_name_prefers_the_catalog_then_the_installed_package():
+    assert family_name(UNNEEDED_APPS[0]) == get_catalog().get(UNNEEDED_APPS[0]).family_name
+    packages = [{"Name": "Contoso.App", "PackageFamilyName": "Contoso.App_abc123"}]
+    assert family_name("Contoso.App", packages) == "Contoso.App_abc123"
+    assert family_name("Contoso.App") == "Contoso.App"
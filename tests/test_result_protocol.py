@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from app_actions import build_removal_script, UNNEEDED_APPS
+from result_protocol import RECORD_PREFIX, iter_records, run_record_script, split_plan
+
+def record_line(**fields):
+    return RECORD_PREFIX + json.dumps(fields)
+
+def test_iter_records_skips_other_output_and_a_cut_off_last_record():
+    output = "\n".join([
+        "Removing apps...",
+        record_line(app="A", step="package", ok=True, message=""),
+        "WARNING: something unrelated",
+        record_line(app="B", step="package", ok=False, message="in use"),
+        # The timeout cut the script off while it wrote this line
+        RECORD_PREFIX + '{"app": "C", "step": "pack'
+    ])
+    
+    assert [(record["app"], record["ok"]) for record in iter_records(output)] == [("A", True), ("B", False)]
+
+@pytest.mark.parametrize("output", [None, "", "no records here"])
+def test_iter_records_of_output_without_records(output):
+    assert list(iter_records(output)) == []
+
+def test_timed_out_script_keeps_the_records_written_before_the_timeout(fake_powershell):
+    apps = UNNEEDED_APPS[:4]
+    # The removal takes twice its timeout, so about half its output is written
+    fake_powershell.set_latency(r"\$plan = ConvertFrom-Json", 10)
+    seen = []
+    
+    success, records, error = run_record_script(build_removal_script(apps), timeout=5, command_class="remove",
+                                                on_record=seen.append)
+    
+    assert not success
+    assert "timed out" in error
+    assert 0 < len(records) < 2 * len(apps)
+    assert records[0] == {"app": apps[0], "event": "start"}
+    assert seen == records
+
+def test_split_plan_keeps_order_and_bounds_each_chunk():
+    plan = [{"name": f"App{index}", "packages": ["x" * 40]} for index in range(7)]
+    
+    chunks = split_plan(plan, max_entries=3, max_chars=200)
+    
+    assert [entry for chunk in chunks for entry in chunk] == plan
+    assert all(len(chunk) <= 3 for chunk in chunks)
+    assert all(len(json.dumps(chunk, separators=(",", ":"))) <= 200 for chunk in chunks)
+
+def test_split_plan_gives_an_oversized_entry_its_own_chunk():
+    plan = [{"name": "Small"}, {"name": "Large", "packages": ["x" * 500]}, {"name": "Small2"}]
+    
+    assert split_plan(plan, max_entries=10, max_chars=200) == [[plan[0]], [plan[1]], [plan[2]]]
@@ -0,0 +1,90 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+from powershell_utils import (PowerShellSession, enable_session_pool, disable_session_pool, run_powershell_partial,
+                              run_powershell_async)
+
+STANDIN_ARGS = [
+    sys.executable,
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "session_host_standin.py")
+]
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="the stand-in host runs commands with /bin/sh")
+
+@pytest.fixture
+def session():
+    session = PowerShellSession(STANDIN_ARGS)
+    yield session
+    session.close()
+
+@pytest.fixture
+def pool():
+    pool = enable_session_pool(size=1, host_args=STANDIN_ARGS)
+    yield pool
+    disable_session_pool()
+
+def test_ping_starts_the_host_and_gets_a_pong(session):
+    assert session.process is None
+    assert session.ping(timeout=5)
+    assert session.is_alive()
+
+def test_request_and_response_round_trip_multiline_output(session):
+    result = session.run("printf 'a b\\n\\nz\\303\\244h \"quoted\"\\n'", timeout=10)
+    
+    assert result.returncode == 0
+    assert result.stdout == 'a b\n\nzäh "quoted"'
+    assert result.stderr == ""
+
+def test_failed_command_reports_its_error_output(session):
+    result = session.run("echo partial; echo broken >&2; exit 3", timeout=10)
+    
+    assert result.returncode == 1
+    assert result.stdout == "partial"
+    assert result.stderr.strip() == "broken"
+
+def test_timeout_keeps_the_output_framed_before_it(session):
+    with pytest.raises(subprocess.TimeoutExpired) as raised:
+        session.run("echo first; echo second; sleep 10; echo never", timeout=1)
+    
+    assert raised.value.output == "first\nsecond"
+    assert session.process is None
+    
+    # The next command gets a fresh host
+    assert session.run("echo again", timeout=10).stdout == "again"
+
+def test_crashed_host_fails_the_command_and_is_respawned(session):
+    session.run("true", timeout=10)
+    first_pid = session.process.pid
+    
+    result = session.run("kill -9 $PPID", timeout=10)
+    assert result.returncode == 1
+    assert "exited unexpectedly" in result.stderr
+    
+    result = session.run("echo back", timeout=10)
+    assert result.returncode == 0
+    assert result.stdout == "back"
+    assert session.process.pid != first_pid
+
+def test_pool_timeout_hands_partial_output_to_run_powershell_partial(pool):
+    success, output, partial = run_powershell_partial("echo '@@R@@{\"app\": 1}'; sleep 10", timeout=1, retries=0)
+    
+    assert not success
+    assert "timed out" in output
+    assert partial == '@@R@@{"app": 1}'
+
+def test_pool_runs_commands_through_the_session(pool):
+    success, output, _ = run_powershell_partial("echo pooled", timeout=10, retries=0)
+    
+    assert success
+    assert output == "pooled"
+
+def test_async_commands_run_through_the_pool(pool):
+    # Without the pool this would start a PowerShell process
+    success, output = asyncio.run(run_powershell_async("echo pooled", timeout=10, retries=0))
+    
+    assert success
+    assert output == "pooled"
@@ -0,0 +1,45 @@
+import ast
+import json
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that start PowerShell or read the package state; the window must
+# show before any of them is imported
+DEFERRED_MODULES = ["powershell_utils", "app_actions", "restore", "status_poller", "operation_journal", "app_inventory"]
+
+PROBE = f"""
+import json, sys
+import main
+import gui_components
+print(json.dumps({{
+    "imports": main.IMPORT_SECONDS,
+    "budget": main.STARTUP_BUDGET,
+    "loaded": [name for name in {DEFERRED_MODULES!r} if name in sys.modules]
+}}))
+"""
+
+def test_window_imports_stay_within_the_startup_budget(tmp_path):
+    # A fresh interpreter, so nothing the other tests imported counts; main
+    # sets up its log in the working directory
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, GAMING_DEBLOATER_DATA=str(tmp_path))
+    completed = subprocess.run([sys.executable, "-c", PROBE], cwd=tmp_path, env=env,
+                               capture_output=True, text=True, timeout=60)
+    assert completed.returncode == 0, completed.stderr
+    probe = json.loads(completed.stdout.strip().splitlines()[-1])
+    
+    assert probe["loaded"] == []
+    assert probe["imports"] < probe["budget"]
+
+def test_entry_point_defers_powershell_work_past_the_first_paint():
+    # The entry point runs outside IMPORT_SECONDS, so it must not import the
+    # deferred modules before creating the window either
+    with open(os.path.join(REPO_DIR, "main.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    entry = next(node for node in tree.body if isinstance(node, ast.If) and "__main__" in ast.dump(node.test))
+    imported = {alias.name for node in ast.walk(entry) if isinstance(node, ast.Import) for alias in node.names}
+    imported |= {node.module for node in ast.walk(entry) if isinstance(node, ast.ImportFrom)}
+    
+    assert imported.isdisjoint(DEFERRED_MODULES)
@@ -0,0 +1,41 @@
+import pytest
+
+from unused_apps import iter_app_usage, get_app_usage, invalidate_app_usage
+
+@pytest.fixture(autouse=True)
+def fresh_usage():
+    invalidate_app_usage()
+    yield
+    invalidate_app_usage()
+
+def test_installed_apps_are_yielded_before_the_slow_source_finishes(fake_powershell):
+    # The timeline query takes 30 simulated seconds, the others a fraction of one
+    fake_powershell.time_scale = 0.01
+    fake_powershell.set_latency("Program-Inventory", 30)
+    
+    updates = list(iter_app_usage(max_age=0, timeout=60))
+    
+    *partial, (final, last_pending) = updates
+    assert partial
+    assert last_pending == []
+    assert partial[-1][1] == ["timeline"]
+    # Every update lists the same apps; only their usage fills in
+    names = sorted(record["name"] for record in final)
+    for usage, pending in partial:
+        assert sorted(record["name"] for record in usage) == names
+    known_before = sum(record["usage_known"] for record in partial[-1][0])
+    assert sum(record["usage_known"] for record in final) >= known_before
+
+def test_failed_installed_source_yields_only_the_error(fake_powershell):
+    fake_powershell.fail("Select-Object Name, PackageFamilyName, DisplayName", "Access denied")
+    
+    updates = list(iter_app_usage(max_age=0))
+    
+    assert updates == [({"error": "Failed to get installed apps"}, [])]
+
+def test_cached_scan_is_yielded_once_without_running_the_sources(fake_powershell):
+    first = get_app_usage(max_age=0)
+    calls = len(fake_powershell.calls)
+    
+    assert list(iter_app_usage()) == [(first, [])]
+    assert len(fake_powershell.calls) == calls
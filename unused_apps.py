@@ -1,14 +1,73 @@
-from powershell_utils import run_powershell, ensure_admin
+from powershell_utils import run_powershell_async, iter_powershell_jobs, ensure_admin
 import logging
 import json
+import asyncio
+import heapq
+import threading
+import time
 from datetime import datetime, timedelta
 
-def get_unused_apps(days_threshold=90):
+# Installed modern apps with their package info
+INSTALLED_APPS_COMMAND = """
+# Get installed apps
+$installedApps = Get-AppxPackage -AllUsers | Select-Object Name, PackageFamilyName, DisplayName
+
+# Convert to JSON
+$installedApps | ConvertTo-Json
+"""
+
+# App usage data from the registry
+USAGE_COMMAND = """
+# Get app usage data from registry
+$usageData = Get-ItemProperty -Path "HKCU:\\Software\\Microsoft\\Windows\\CurrentVersion\\Search\\RecentApps\\*" | 
+    Select-Object PSChildName, LastAccessedTime, AppId, LaunchCount
+
+# Convert to JSON
+$usageData | ConvertTo-Json
+"""
+
+# Additional app usage data from Timeline (Activity History)
+TIMELINE_COMMAND = """
+# Get app usage data from Activity History
+try {
+    $activities = Get-WinEvent -LogName "Microsoft-Windows-Application-Experience/Program-Inventory" -MaxEvents 1000 -ErrorAction SilentlyContinue |
+        Where-Object { $_.Id -eq 500 -or $_.Id -eq 501 } |
+        Select-Object TimeCreated, Message
+    
+    $activities | ConvertTo-Json
+} catch {
+    Write-Output "[]"
+}
+"""
+
+# Sources of one scan, in the order they are reported
+SCAN_SOURCES = (
+    ("installed", INSTALLED_APPS_COMMAND),
+    ("usage", USAGE_COMMAND),
+    ("timeline", TIMELINE_COMMAND),
+)
+
+# Seconds each source may take before the scan goes on without it
+SOURCE_TIMEOUT = 60
+
+# Seconds a usage scan is reused; re-filtering within this window does not rescan
+USAGE_CACHE_TTL = 300
+
+# Last usage scan as (taken_at, usage records, report), shared by the CLI and GUI
+_usage_cache = None
+_usage_lock = threading.Lock()
+
+def get_unused_apps(days_threshold=90, report=None, limit=None, max_age=USAGE_CACHE_TTL):
     """
     Get list of installed apps that haven't been used for a specified number of days.
     
     Args:
         days_threshold (int): Number of days to consider an app as "unused"
+        report (dict): Optional dict that receives the per-source "timings"
+            (seconds), the "failed" sources with their errors and whether the
+            result came from the "cached" scan
+        limit (int): Keep only the limit most unused apps (None keeps all)
+        max_age (float): Maximum age in seconds of a reusable scan (0 rescans)
         
     Returns:
         list: List of dictionaries containing app info for unused apps
@@ -21,179 +80,383 @@ def get_unused_apps(days_threshold=90):
             logging.warning("Admin privileges required to scan app usage data")
             return {"error": "Admin privileges required"}
         
-        # PowerShell command to get installed apps with their package info
-        # We'll get installed modern apps and then check usage data for them
-        ps_cmd = """
-        # Get installed apps
-        $installedApps = Get-AppxPackage -AllUsers | Select-Object Name, PackageFamilyName, DisplayName
-        
-        # Convert to JSON
-        $installedApps | ConvertTo-Json
-        """
-        
-        success, output = run_powershell(ps_cmd)
-        if not success or not output:
-            logging.error("Failed to get installed apps")
-            return {"error": "Failed to get installed apps"}
-        
-        # Parse the installed apps
-        installed_apps = json.loads(output)
-        
-        # If we just got one app, make sure we have a list
-        if isinstance(installed_apps, dict):
-            installed_apps = [installed_apps]
-        
-        # Now get app usage data from the registry
-        ps_cmd_usage = """
-        # Get app usage data from registry
-        $usageData = Get-ItemProperty -Path "HKCU:\\Software\\Microsoft\\Windows\\CurrentVersion\\Search\\RecentApps\\*" | 
-            Select-Object PSChildName, LastAccessedTime, AppId, LaunchCount
-                
-        # Convert to JSON
-        $usageData | ConvertTo-Json
-        """
-        
-        success, usage_output = run_powershell(ps_cmd_usage)
-        
-        # Create a dictionary to hold usage data, keyed by app ID
-        usage_data = {}
-        current_date = datetime.now()
+        usage = get_app_usage(max_age, report)
+        if isinstance(usage, dict):
+            return usage
+        return _rank_and_log(usage, days_threshold, limit)
+    except Exception as e:
+        logging.error(f"Error in get_unused_apps: {str(e)}")
+        return {"error": f"Error scanning for unused apps: {str(e)}"}
+
+async def get_unused_apps_async(days_threshold=90, report=None, limit=None, max_age=USAGE_CACHE_TTL):
+    """Async counterpart of get_unused_apps."""
+    try:
+        logging.info(f"Scanning for apps unused for {days_threshold} days")
         
-        if success and usage_output:
-            try:
-                usage_items = json.loads(usage_output)
-                
-                # Handle case of single item
-                if isinstance(usage_items, dict):
-                    usage_items = [usage_items]
-                
-                # Process usage data
-                for item in usage_items:
-                    if item and "AppId" in item and "LastAccessedTime" in item:
-                        app_id = item["AppId"]
-                        last_accessed = item["LastAccessedTime"]
-                        
-                        # Parse the filetime format if it exists
-                        if last_accessed:
-                            # Convert filetime to datetime
-                            try:
-                                # Parse 18-digit filetime if that's the format
-                                if isinstance(last_accessed, int) or (isinstance(last_accessed, str) and last_accessed.isdigit() and len(last_accessed) >= 18):
-                                    filetime = int(last_accessed)
-                                    # Convert Windows filetime to Python datetime (minus 11644473600 seconds for Unix epoch difference)
-                                    seconds_since_epoch = filetime / 10000000 - 11644473600
-                                    last_date = datetime.fromtimestamp(seconds_since_epoch)
-                                else:
-                                    # Try to parse as a date string
-                                    last_date = datetime.fromisoformat(last_accessed.replace('Z', '+00:00'))
-                                
-                                days_since_used = (current_date - last_date).days
-                                usage_data[app_id] = {
-                                    "last_used": last_date.strftime("%Y-%m-%d %H:%M:%S"),
-                                    "days_since_used": days_since_used,
-                                    "launch_count": item.get("LaunchCount", 0)
-                                }
-                            except Exception as e:
-                                logging.warning(f"Couldn't parse date for {app_id}: {e}")
-            except Exception as e:
-                logging.error(f"Error processing usage data: {str(e)}")
-                # Continue with what we have
+        # Check for admin privileges (needed to access usage data)
+        if not ensure_admin():
+            logging.warning("Admin privileges required to scan app usage data")
+            return {"error": "Admin privileges required"}
         
-        # Get additional app usage data from Timeline (Activity History)
-        ps_cmd_timeline = """
-        # Get app usage data from Activity History
-        try {
-            $activities = Get-WinEvent -LogName "Microsoft-Windows-Application-Experience/Program-Inventory" -MaxEvents 1000 -ErrorAction SilentlyContinue |
-                Where-Object { $_.Id -eq 500 -or $_.Id -eq 501 } |
-                Select-Object TimeCreated, Message
-                
-            $activities | ConvertTo-Json
-        } catch {
-            Write-Output "[]"
+        usage = _cached_usage(max_age, report)
+        if usage is None:
+            usage = _store_usage(await scan_usage_sources_async(), report)
+        if isinstance(usage, dict):
+            return usage
+        return _rank_and_log(usage, days_threshold, limit)
+    except Exception as e:
+        logging.error(f"Error in get_unused_apps_async: {str(e)}")
+        return {"error": f"Error scanning for unused apps: {str(e)}"}
+
+def get_app_usage(max_age=USAGE_CACHE_TTL, report=None):
+    """Get the last use of every installed app, scanning only if the cached scan is too old.
+    
+    The records do not depend on a threshold, so one scan answers any number
+    of iter_unused_apps calls.
+    
+    Args:
+        max_age (float): Maximum age in seconds of a reusable scan (0 rescans)
+        report (dict): Optional dict filled like get_unused_apps' report
+    
+    Returns:
+        list: One dict per app with "name", "display_name", "days_since_used"
+              (None if never seen), "last_used", "launch_count" and
+              "usage_known" (False if no source recorded a use), or a dict
+              with "error" if the installed apps could not be listed
+    """
+    for usage, _ in iter_app_usage(max_age, report):
+        pass
+    return usage
+
+def iter_app_usage(max_age=USAGE_CACHE_TTL, report=None, timeout=SOURCE_TIMEOUT):
+    """Yield the usage records as the scan fills them in.
+    
+    A cached scan recent enough is yielded once. Otherwise the sources run
+    concurrently: as soon as the installed apps are known their records are
+    yielded with whatever usage has arrived so far, and again each time
+    another source finishes. Apps a pending source may still report on show
+    as never used until then.
+    
+    Args:
+        max_age (float): Maximum age in seconds of a reusable scan (0 rescans)
+        report (dict): Optional dict filled like get_unused_apps' report once
+                       the scan is complete
+        timeout (int): Timeout in seconds for each source
+    
+    Yields:
+        tuple: (usage, pending) where usage is a list of records like
+               get_app_usage's and pending the names of the sources still
+               running. The last item has no pending sources, is cached, and
+               may be a dict with "error" instead of records.
+    """
+    usage = _cached_usage(max_age, report)
+    if usage is not None:
+        yield usage, []
+        return
+    
+    pending = [name for name, _ in SCAN_SOURCES]
+    for name, scan in _iter_scan(timeout):
+        pending.remove(name)
+        if pending and scan["installed_apps"] is not None:
+            yield list(_iter_usage_records(scan)), list(pending)
+    yield _store_usage(scan, report), []
+
+def invalidate_app_usage():
+    """Drop the cached usage scan so the next lookup scans again.
+    
+    Call after removing apps.
+    """
+    global _usage_cache
+    with _usage_lock:
+        _usage_cache = None
+
+def iter_unused_apps(usage, days_threshold=90):
+    """Yield the apps from get_app_usage not used for days_threshold days.
+    
+    Apps with no recorded use are reported as unused for exactly
+    days_threshold days, with "usage_known" False.
+    
+    Args:
+        usage (list): Records from get_app_usage
+        days_threshold (int): Number of days to consider an app as "unused"
+    
+    Yields:
+        dict: App info with "name", "display_name", "days_since_used",
+              "last_used", "launch_count" and "usage_known"
+    """
+    for record in usage:
+        days_since_used = record["days_since_used"]
+        if days_since_used is None:
+            # No usage data found, likely never used or usage not tracked
+            # We'll consider it unused for our purposes
+            yield dict(record, days_since_used=days_threshold)
+        elif days_since_used >= days_threshold:
+            yield dict(record)
+
+def rank_unused_apps(unused_apps, limit=None):
+    """Order unused apps from most to least unused.
+    
+    With a limit, only that many apps are kept as the records are filtered,
+    instead of sorting them all.
+    
+    Args:
+        unused_apps (iterable): Records from iter_unused_apps
+        limit (int): Number of apps to keep (None keeps all)
+    
+    Returns:
+        list: The ranked apps
+    """
+    key = lambda app: app["days_since_used"]
+    if limit is None:
+        return sorted(unused_apps, key=key, reverse=True)
+    return heapq.nlargest(limit, unused_apps, key=key)
+
+def _rank_and_log(usage, days_threshold, limit):
+    """Filter and rank cached usage records for one threshold."""
+    unused_apps = rank_unused_apps(iter_unused_apps(usage, days_threshold), limit)
+    logging.info(f"Found {len(unused_apps)} apps unused for {days_threshold}+ days")
+    return unused_apps
+
+def _cached_usage(max_age, report):
+    """Get the cached usage records if they are recent enough, otherwise None."""
+    with _usage_lock:
+        cache = _usage_cache
+    if cache is None or time.monotonic() - cache[0] > max_age:
+        return None
+    if report is not None:
+        report.update(cache[2], cached=True)
+    return cache[1]
+
+def _store_usage(scan, report):
+    """Turn a finished scan into usage records and cache them."""
+    global _usage_cache
+    scan_report = {"timings": scan["timings"], "failed": scan["failed"]}
+    if report is not None:
+        report.update(scan_report, cached=False)
+    if scan["installed_apps"] is None:
+        logging.error("Failed to get installed apps")
+        return {"error": "Failed to get installed apps"}
+    
+    usage = list(_iter_usage_records(scan))
+    with _usage_lock:
+        _usage_cache = (time.monotonic(), usage, scan_report)
+    return usage
+
+def scan_usage_sources(timeout=SOURCE_TIMEOUT):
+    """Query the three sources concurrently, merging each one as it arrives.
+    
+    A source that fails or times out is left out; the others are still used.
+    Sources are not retried, so one slow source holds up the scan for at
+    most its timeout.
+    
+    Args:
+        timeout (int): Timeout in seconds for each source
+    
+    Returns:
+        dict: "installed_apps" (list, or None if that source failed),
+              "usage_data" (last use keyed by app ID), "timings" (seconds per
+              source) and "failed" (error per failed source)
+    """
+    for _, scan in _iter_scan(timeout):
+        pass
+    return scan
+
+def _iter_scan(timeout):
+    """Run the sources concurrently, yielding (name, scan) as each one is merged."""
+    scan = _new_scan()
+    jobs = [(cmd, timeout) for _, cmd in SCAN_SOURCES]
+    for index, result in iter_powershell_jobs(jobs, retries=0):
+        name = SCAN_SOURCES[index][0]
+        _merge_source(scan, name, result)
+        if len(scan["timings"]) == len(SCAN_SOURCES):
+            _log_scan(scan)
+        yield name, scan
+
+async def scan_usage_sources_async(timeout=SOURCE_TIMEOUT):
+    """Async counterpart of scan_usage_sources."""
+    async def run_source(name, cmd):
+        started = time.monotonic()
+        success, output = await run_powershell_async(cmd, timeout=timeout, retries=0)
+        elapsed = time.monotonic() - started
+        return name, {
+            "success": success,
+            "output": output,
+            "elapsed": elapsed,
+            "timed_out": not success and elapsed >= timeout
         }
-        """
-        
-        success, timeline_output = run_powershell(ps_cmd_timeline)
-        
-        if success and timeline_output and timeline_output != "[]":
-            try:
-                timeline_items = json.loads(timeline_output)
-                
-                # Handle case of single item
-                if isinstance(timeline_items, dict):
-                    timeline_items = [timeline_items]
-                
-                # Process timeline data
-                for item in timeline_items:
-                    if item and "Message" in item and "TimeCreated" in item:
-                        # Extract app info from message
-                        message = item["Message"]
-                        if "Application Id=" in message:
-                            app_id = message.split("Application Id=")[1].split(",")[0].strip()
-                            time_created = item["TimeCreated"]
-                            
-                            # Parse the date if it exists
-                            if time_created:
-                                try:
-                                    last_date = datetime.fromisoformat(time_created.replace('Z', '+00:00'))
-                                    days_since_used = (current_date - last_date).days
-                                    
-                                    # Only update if this is more recent than existing data
-                                    if app_id not in usage_data or days_since_used < usage_data[app_id]["days_since_used"]:
-                                        usage_data[app_id] = {
-                                            "last_used": last_date.strftime("%Y-%m-%d %H:%M:%S"),
-                                            "days_since_used": days_since_used,
-                                            "launch_count": 1  # We don't have this info from timeline
-                                        }
-                                except Exception as e:
-                                    logging.warning(f"Couldn't parse timeline date for {app_id}: {e}")
-            except Exception as e:
-                logging.error(f"Error processing timeline data: {str(e)}")
-                # Continue with what we have
-        
-        # Match usage data with installed apps
-        unused_apps = []
-        
-        for app in installed_apps:
-            # Skip system apps and framework packages
-            if not app.get("Name") or "framework" in app.get("Name", "").lower():
-                continue
-                
-            app_name = app.get("Name", "")
-            display_name = app.get("DisplayName", app_name)
-            
-            # Check if we have usage data for this app
-            app_id_to_check = f"App\\{app.get('PackageFamilyName', '')}"
+    
+    scan = _new_scan()
+    for next_done in asyncio.as_completed([run_source(name, cmd) for name, cmd in SCAN_SOURCES]):
+        name, result = await next_done
+        _merge_source(scan, name, result)
+    _log_scan(scan)
+    return scan
+
+def _new_scan():
+    """Empty scan result for _merge_source to fill."""
+    return {"installed_apps": None, "usage_data": {}, "timings": {}, "failed": {}}
+
+def _merge_source(scan, name, result):
+    """Parse one finished source and merge it into the scan.
+    
+    Usage entries are merged so the most recent use wins whatever order the
+    sources arrive in; on a tie the registry entry is kept, since it has the
+    real launch count.
+    """
+    scan["timings"][name] = result["elapsed"]
+    if not result["success"]:
+        reason = "timed out" if result.get("timed_out") else "failed"
+        logging.warning(f"Usage source '{name}' {reason} after {result['elapsed']:.1f}s: {result['output']}")
+        scan["failed"][name] = result["output"]
+        return
+    
+    try:
+        current_date = datetime.now()
+        if name == "installed":
+            scan["installed_apps"] = _parse_installed_apps(result["output"])
+        elif name == "usage":
+            _merge_usage(scan["usage_data"], _parse_registry_usage(result["output"], current_date), replace_ties=True)
+        elif name == "timeline":
+            _merge_usage(scan["usage_data"], _parse_timeline_usage(result["output"], current_date), replace_ties=False)
+    except Exception as e:
+        logging.error(f"Error processing {name} data: {str(e)}")
+        scan["failed"][name] = str(e)
+
+def _merge_usage(usage_data, entries, replace_ties):
+    """Merge usage entries, keeping the most recent use of each app."""
+    for app_id, entry in entries.items():
+        current = usage_data.get(app_id)
+        if (current is None
+                or entry["days_since_used"] < current["days_since_used"]
+                or (replace_ties and entry["days_since_used"] == current["days_since_used"])):
+            usage_data[app_id] = entry
+
+def _log_scan(scan):
+    """Log how long each source took."""
+    timings = ", ".join(f"{name}={scan['timings'][name]:.2f}s" for name, _ in SCAN_SOURCES if name in scan["timings"])
+    logging.info(f"Usage sources scanned ({timings})")
+    if scan["failed"]:
+        logging.warning(f"Scan continued without: {', '.join(scan['failed'])}")
+
+def _parse_installed_apps(output):
+    """Parse the output of INSTALLED_APPS_COMMAND into a list of apps."""
+    if not output:
+        return []
+    installed_apps = json.loads(output)
+    
+    # If we just got one app, make sure we have a list
+    if isinstance(installed_apps, dict):
+        installed_apps = [installed_apps]
+    return installed_apps
+
+def _parse_registry_usage(usage_output, current_date):
+    """Parse the output of USAGE_COMMAND into usage entries keyed by app ID."""
+    usage_data = {}
+    if not usage_output:
+        return usage_data
+    
+    usage_items = json.loads(usage_output)
+    
+    # Handle case of single item
+    if isinstance(usage_items, dict):
+        usage_items = [usage_items]
+    
+    # Process usage data
+    for item in usage_items:
+        if item and "AppId" in item and "LastAccessedTime" in item:
+            app_id = item["AppId"]
+            last_accessed = item["LastAccessedTime"]
             
-            if app_id_to_check in usage_data:
-                days_since_used = usage_data[app_id_to_check]["days_since_used"]
-                
-                # If app hasn't been used in threshold days, add to unused_apps
-                if days_since_used >= days_threshold:
-                    unused_apps.append({
-                        "name": app_name,
-                        "display_name": display_name,
+            # Parse the filetime format if it exists
+            if last_accessed:
+                # Convert filetime to datetime
+                try:
+                    # Parse 18-digit filetime if that's the format
+                    if isinstance(last_accessed, int) or (isinstance(last_accessed, str) and last_accessed.isdigit() and len(last_accessed) >= 18):
+                        filetime = int(last_accessed)
+                        # Convert Windows filetime to Python datetime (minus 11644473600 seconds for Unix epoch difference)
+                        seconds_since_epoch = filetime / 10000000 - 11644473600
+                        last_date = datetime.fromtimestamp(seconds_since_epoch)
+                    else:
+                        # Try to parse as a date string
+                        last_date = datetime.fromisoformat(last_accessed.replace('Z', '+00:00'))
+                    
+                    days_since_used = (current_date - last_date).days
+                    usage_data[app_id] = {
+                        "last_used": last_date.strftime("%Y-%m-%d %H:%M:%S"),
                         "days_since_used": days_since_used,
-                        "last_used": usage_data[app_id_to_check]["last_used"],
-                        "launch_count": usage_data[app_id_to_check].get("launch_count", 0)
-                    })
-            else:
-                # No usage data found, likely never used or usage not tracked
-                # We'll consider it unused for our purposes
-                unused_apps.append({
-                    "name": app_name,
-                    "display_name": display_name,
-                    "days_since_used": days_threshold,  # Set to threshold as minimum
-                    "last_used": "Never or unknown",
-                    "launch_count": 0
-                })
-        
-        # Sort by days since used (most unused first)
-        unused_apps.sort(key=lambda x: x["days_since_used"], reverse=True)
+                        "launch_count": item.get("LaunchCount", 0)
+                    }
+                except Exception as e:
+                    logging.warning(f"Couldn't parse date for {app_id}: {e}")
+    return usage_data
+
+def _parse_timeline_usage(timeline_output, current_date):
+    """Parse the output of TIMELINE_COMMAND into usage entries keyed by app ID."""
+    usage_data = {}
+    if not timeline_output or timeline_output == "[]":
+        return usage_data
+    
+    timeline_items = json.loads(timeline_output)
+    
+    # Handle case of single item
+    if isinstance(timeline_items, dict):
+        timeline_items = [timeline_items]
+    
+    # Process timeline data
+    for item in timeline_items:
+        if item and "Message" in item and "TimeCreated" in item:
+            # Extract app info from message
+            message = item["Message"]
+            if "Application Id=" in message:
+                app_id = message.split("Application Id=")[1].split(",")[0].strip()
+                time_created = item["TimeCreated"]
+                
+                # Parse the date if it exists
+                if time_created:
+                    try:
+                        last_date = datetime.fromisoformat(time_created.replace('Z', '+00:00'))
+                        days_since_used = (current_date - last_date).days
+                        
+                        # Keep the most recent event for each app
+                        if app_id not in usage_data or days_since_used < usage_data[app_id]["days_since_used"]:
+                            usage_data[app_id] = {
+                                "last_used": last_date.strftime("%Y-%m-%d %H:%M:%S"),
+                                "days_since_used": days_since_used,
+                                "launch_count": 1  # We don't have this info from timeline
+                            }
+                    except Exception as e:
+                        logging.warning(f"Couldn't parse timeline date for {app_id}: {e}")
+    return usage_data
+
+def _iter_usage_records(scan):
+    """Match the merged usage data with the installed apps, one record per app."""
+    usage_data = scan["usage_data"]
+    for app in scan["installed_apps"]:
+        # Skip system apps and framework packages
+        if not app.get("Name") or "framework" in app.get("Name", "").lower():
+            continue
         
-        logging.info(f"Found {len(unused_apps)} apps unused for {days_threshold}+ days")
-        return unused_apps
+        app_name = app.get("Name", "")
+        display_name = app.get("DisplayName", app_name)
         
-    except Exception as e:
-        logging.error(f"Error in get_unused_apps: {str(e)}")
-        return {"error": f"Error scanning for unused apps: {str(e)}"}
\ No newline at end of file
+        # Check if we have usage data for this app
+        usage = usage_data.get(f"App\\{app.get('PackageFamilyName', '')}")
+        if usage:
+            yield {
+                "name": app_name,
+                "display_name": display_name,
+                "days_since_used": usage["days_since_used"],
+                "last_used": usage["last_used"],
+                "launch_count": usage.get("launch_count", 0),
+                "usage_known": True
+            }
+        else:
+            yield {
+                "name": app_name,
+                "display_name": display_name,
+                "days_since_used": None,
+                "last_used": "Never or unknown",
+                "launch_count": 0,
+                "usage_known": False
+            }
@@ -1,11 +1,29 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import logging
-import threading
 from app_actions import remove_selected_apps
 from powershell_utils import ensure_admin
 from restore import create_restore_point
-from unused_apps import get_unused_apps
+from unused_apps import iter_app_usage, iter_unused_apps, rank_unused_apps, invalidate_app_usage, USAGE_CACHE_TTL
+from app_checklist import AppChecklist
+from job_manager import get_job_manager, on_main_thread, PACKAGES_RESOURCE
+
+# Thresholds offered in the days selector
+DAYS_CHOICES = (30, 60, 90, 180, 365)
+
+def _unused_app_row(app, scanning=False):
+    """List row for one unused app, with the days since it was used"""
+    if app.get("usage_known", True):
+        days_text = f"{app['days_since_used']} days"
+    else:
+        # A source still running may yet report a use
+        days_text = "Checking..." if scanning else "Never used"
+    return {
+        "name": app["name"],
+        "text": app.get("display_name", app["name"]),
+        "detail": days_text,
+        "detail_color": "#800000"  # Red color
+    }
 
 class UnusedAppsFrame(tk.Frame):
     """Frame for displaying and managing apps that haven't been used in a while"""
@@ -24,28 +42,49 @@ class UnusedAppsFrame(tk.Frame):
         )
         self.title_label.pack(pady=10)
         
-        # Create a frame for the app list with scrollbar
-        self.list_frame = tk.Frame(self, bg="#d4d4d4")
-        self.list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        # Threshold selector; changing it re-filters the last scan
+        self.days_frame = tk.Frame(self, bg="#d4d4d4")
+        self.days_frame.pack(pady=(0, 5))
+        tk.Label(self.days_frame, text="Unused for at least", font=("Arial", 10), bg="#d4d4d4").pack(side=tk.LEFT)
+        self.days_var = tk.StringVar(value=str(days_threshold))
+        self.days_combo = ttk.Combobox(
+            self.days_frame,
+            textvariable=self.days_var,
+            values=[str(days) for days in DAYS_CHOICES],
+            width=5,
+            state="readonly"
+        )
+        self.days_combo.pack(side=tk.LEFT, padx=5)
+        self.days_combo.bind("<<ComboboxSelected>>", self._on_days_changed)
+        tk.Label(self.days_frame, text="days", font=("Arial", 10), bg="#d4d4d4").pack(side=tk.LEFT)
+        
+        # App list; only the rows in view have widgets
+        self.app_list = AppChecklist(self)
+        self.app_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
-        # Scrollbar
-        self.scrollbar = tk.Scrollbar(self.list_frame)
-        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Add 'Select All' and 'Clear All' buttons
+        buttons_frame = tk.Frame(self, bg="#d4d4d4", pady=5)
+        buttons_frame.pack(fill=tk.X, padx=15)
         
-        # Listbox-like container with checkboxes (using a Frame and Canvas for scrolling)
-        self.canvas = tk.Canvas(
-            self.list_frame, 
+        select_all_btn = tk.Button(
+            buttons_frame,
+            text="Select All",
+            command=self.select_all_apps,
+            relief=tk.GROOVE,
             bg="#d4d4d4",
-            highlightthickness=0,
-            yscrollcommand=self.scrollbar.set
+            font=("Arial", 9)
         )
-        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        self.scrollbar.config(command=self.canvas.yview)
+        select_all_btn.pack(side=tk.LEFT, padx=5)
         
-        # Frame inside canvas for checkboxes
-        self.checkbox_frame = tk.Frame(self.canvas, bg="#d4d4d4")
-        self.canvas_window = self.canvas.create_window((0, 0), window=self.checkbox_frame, anchor="nw")
+        clear_btn = tk.Button(
+            buttons_frame,
+            text="Clear All",
+            command=self.clear_selection,
+            relief=tk.GROOVE,
+            bg="#d4d4d4",
+            font=("Arial", 9)
+        )
+        clear_btn.pack(side=tk.LEFT, padx=5)
         
         # Status label
         self.status_label = tk.Label(
@@ -64,7 +103,7 @@ class UnusedAppsFrame(tk.Frame):
             font=("Arial", 10),
             bg="#d4d4d4",
             relief=tk.GROOVE,
-            command=self._start_scan_thread
+            command=lambda: self._start_scan_thread(rescan=True)
         )
         self.refresh_button.pack(pady=(0, 5))
         
@@ -79,55 +118,101 @@ class UnusedAppsFrame(tk.Frame):
         )
         self.remove_button.pack(pady=10)
         
-        # App checkboxes and variables
-        self.app_vars = {}
+        # Unused apps currently listed
         self.unused_apps = []
         
-        # Bind canvas resize event
-        self.canvas.bind("<Configure>", self.on_canvas_configure)
-        
         # Schedule loading after the window is initialized
         self.after(100, self._start_scan_thread)
     
-    def on_canvas_configure(self, event):
-        """Update scrollregion when canvas is resized"""
+    def _on_days_changed(self, event=None):
+        """Re-filter the list for the newly selected threshold"""
         try:
-            self.canvas.itemconfig(self.canvas_window, width=event.width)
-            self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+            self.days_threshold = int(self.days_var.get())
+            self.title_label.config(text=f"Unused Apps (Last {self.days_threshold} Days)")
+            self._start_scan_thread()
         except Exception as e:
-            logging.error(f"Error in on_canvas_configure: {str(e)}")
+            logging.error(f"Error changing days threshold: {str(e)}")
     
-    def _start_scan_thread(self):
-        """Start a thread to scan for unused apps"""
+    def _start_scan_thread(self, rescan=False):
+        """Start a thread to scan for unused apps
+        
+        Args:
+            rescan (bool): Scan again even if a recent scan can be re-filtered
+        """
         try:
-            # Disable refresh button
-            self.refresh_button.config(state=tk.DISABLED)
+            # Disable refresh and removal until the scan is over: rows still
+            # waiting for a usage source may yet turn out to be in use
+            self._set_buttons_state(tk.DISABLED)
             self.status_label.config(text=f"Scanning for apps unused for {self.days_threshold} days...")
             
-            # Start thread for scanning
-            threading.Thread(target=self._scan_unused_apps, daemon=True).start()
+            # Scan in the background. The scan doesn't depend on the threshold,
+            # so a refresh or threshold change while it runs joins it and the
+            # result is filtered for the threshold selected when it arrives
+            get_job_manager().submit(
+                "unused_scan",
+                self._scan_app_usage,
+                rescan,
+                on_done=on_main_thread(self, self._scan_complete)
+            )
         except Exception as e:
             logging.error(f"Error starting unused apps scan thread: {str(e)}")
             self.status_label.config(text=f"Error: {str(e)[:50]}...")
-            self.refresh_button.config(state=tk.NORMAL)
+            self._set_buttons_state(tk.NORMAL)
     
-    def _scan_unused_apps(self):
-        """Scan for unused apps in a background thread"""
-        try:
-            # Get unused apps
-            unused_apps = get_unused_apps(self.days_threshold)
-            
-            # Schedule UI update on main thread
-            self.after(0, lambda: self._update_ui_with_apps(unused_apps))
-        except Exception as e:
-            logging.error(f"Error scanning for unused apps: {str(e)}")
-            self.after(0, lambda e=e: self.status_label.config(
-                text=f"Error scanning for unused apps: {str(e)[:50]}..."
-            ))
-            self.after(0, lambda: self.refresh_button.config(state=tk.NORMAL))
+    def _set_buttons_state(self, state):
+        """Enable or disable the refresh and remove buttons together"""
+        self.refresh_button.config(state=state)
+        self.remove_button.config(state=state)
+    
+    def _scan_app_usage(self, rescan=False):
+        """Get the usage of every installed app (runs as a background job)
+        
+        The apps are listed as soon as the installed apps are known, and the
+        list is updated as each usage source finishes.
+        
+        Returns:
+            tuple: (usage, failed_sources) where usage is the get_app_usage
+                   records, or a dict with "error"
+        """
+        # Check for admin privileges (needed to access usage data)
+        if not ensure_admin():
+            return {"error": "Admin privileges required"}, None
+        
+        # Reuse the last scan unless asked to rescan
+        report = {}
+        for usage, pending in iter_app_usage(0 if rescan else USAGE_CACHE_TTL, report):
+            if pending:
+                self.after(0, lambda usage=usage, pending=pending: self._show_usage(usage, pending_sources=pending))
+        return usage, report.get("failed")
+    
+    def _scan_complete(self, job):
+        """Show the scan result for the current threshold, or its error (called on main thread)"""
+        if job.error is not None or job.cancelled:
+            error = job.error if job.error is not None else "cancelled"
+            logging.error(f"Error scanning for unused apps: {str(error)}")
+            self.status_label.config(text=f"Error scanning for unused apps: {str(error)[:50]}...")
+            self._set_buttons_state(tk.NORMAL)
+            return
+        usage, failed_sources = job.result
+        self._show_usage(usage, failed_sources)
+    
+    def _show_usage(self, usage, failed_sources=None, pending_sources=None):
+        """Show the apps of the usage records unused for the current threshold (called on main thread)"""
+        if isinstance(usage, dict):
+            self._update_ui_with_apps(usage)
+            return
+        self._update_ui_with_apps(rank_unused_apps(iter_unused_apps(usage, self.days_threshold)),
+                                  failed_sources, pending_sources)
     
-    def _update_ui_with_apps(self, unused_apps):
-        """Update UI with scanned unused apps (called on main thread)"""
+    def _update_ui_with_apps(self, unused_apps, failed_sources=None, pending_sources=None):
+        """Update UI with scanned unused apps (called on main thread)
+        
+        Args:
+            unused_apps (list): Ranked unused apps, or a dict with "error"
+            failed_sources (list): Usage sources the scan went without
+            pending_sources (list): Usage sources still running; the scan
+                                    goes on and the list will be updated
+        """
         try:
             # Check for error
             if isinstance(unused_apps, dict) and "error" in unused_apps:
@@ -135,108 +220,40 @@ class UnusedAppsFrame(tk.Frame):
                 return
             
             self.unused_apps = unused_apps
+            self.app_list.set_empty_text(f"No apps found that haven't been used in the last {self.days_threshold} days.")
+            # Update the rows by name, keeping the user's selection
+            self.app_list.reconcile_rows([_unused_app_row(app, bool(pending_sources)) for app in self.unused_apps])
             
-            # Clear existing checkboxes
-            for widget in self.checkbox_frame.winfo_children():
-                widget.destroy()
-            
-            # Re-create all app variables
-            self.app_vars = {}
-            
-            # If no unused apps were found
-            if not self.unused_apps:
-                no_apps_label = tk.Label(
-                    self.checkbox_frame,
-                    text=f"No apps found that haven't been used in the last {self.days_threshold} days.",
-                    font=("Arial", 10),
-                    bg="#d4d4d4",
-                    fg="#555555"
-                )
-                no_apps_label.pack(pady=20)
-                
+            if pending_sources:
+                self.status_label.config(text=f"Found {len(self.unused_apps)} apps so far, "
+                                              f"still reading {', '.join(pending_sources)} data...")
+            elif not self.unused_apps:
                 self.status_label.config(text="No unused apps found")
             else:
-                # Create checkboxes for all unused apps
-                for app in self.unused_apps:
-                    app_name = app["name"]
-                    var = tk.BooleanVar(value=False)
-                    self.app_vars[app_name] = var
-                    
-                    # Create a frame for each app
-                    app_frame = tk.Frame(self.checkbox_frame, bg="#d4d4d4", pady=2)
-                    app_frame.pack(fill=tk.X, padx=5)
-                    
-                    # Create checkbox
-                    display_name = app.get("display_name", app_name)
-                    checkbox = ttk.Checkbutton(
-                        app_frame,
-                        text=display_name,
-                        variable=var,
-                        style="TCheckbutton"
-                    )
-                    checkbox.pack(side=tk.LEFT)
-                    
-                    # Days since used label
-                    days_text = f"{app['days_since_used']} days" if app['days_since_used'] != "Never or unknown" else "Never used"
-                    days_label = tk.Label(
-                        app_frame,
-                        text=days_text,
-                        font=("Arial", 8),
-                        bg="#d4d4d4",
-                        fg="#800000"  # Red color
-                    )
-                    days_label.pack(side=tk.RIGHT, padx=5)
-                
-                # Add 'Select All' and 'Clear All' buttons
-                buttons_frame = tk.Frame(self.checkbox_frame, bg="#d4d4d4", pady=5)
-                buttons_frame.pack(fill=tk.X, padx=5)
-                
-                select_all_btn = tk.Button(
-                    buttons_frame,
-                    text="Select All",
-                    command=self.select_all_apps,
-                    relief=tk.GROOVE,
-                    bg="#d4d4d4",
-                    font=("Arial", 9)
-                )
-                select_all_btn.pack(side=tk.LEFT, padx=5)
-                
-                clear_btn = tk.Button(
-                    buttons_frame,
-                    text="Clear All",
-                    command=self.clear_selection,
-                    relief=tk.GROOVE,
-                    bg="#d4d4d4",
-                    font=("Arial", 9)
-                )
-                clear_btn.pack(side=tk.LEFT, padx=5)
-                
-                # Update status
-                self.status_label.config(text=f"Found {len(self.unused_apps)} apps unused for {self.days_threshold}+ days")
-            
-            # Update scrollregion after all checkboxes are added
-            self.checkbox_frame.update_idletasks()
-            self.canvas.config(scrollregion=self.canvas.bbox("all"))
+                # Update status, noting any usage source the scan went without
+                status = f"Found {len(self.unused_apps)} apps unused for {self.days_threshold}+ days"
+                if failed_sources:
+                    status += f" (partial: no {', '.join(failed_sources)} data)"
+                self.status_label.config(text=status)
         except Exception as e:
             logging.error(f"Error updating UI with unused apps: {str(e)}")
             self.status_label.config(text=f"Error: {str(e)[:50]}...")
         finally:
-            # Re-enable refresh button
-            self.refresh_button.config(state=tk.NORMAL)
+            # Re-enable the buttons once the scan is over
+            if not pending_sources:
+                self._set_buttons_state(tk.NORMAL)
     
     def select_all_apps(self):
         """Select all unused apps"""
         try:
-            for var in self.app_vars.values():
-                var.set(True)
+            self.app_list.select_all()
         except Exception as e:
             logging.error(f"Error in select_all_apps: {str(e)}")
     
     def clear_selection(self):
         """Clear all selections"""
         try:
-            for var in self.app_vars.values():
-                var.set(False)
+            self.app_list.clear_selection()
         except Exception as e:
             logging.error(f"Error in clear_selection: {str(e)}")
     
@@ -253,19 +270,14 @@ class UnusedAppsFrame(tk.Frame):
                 return
             
             # Get list of selected apps
-            selected_apps = [app_name for app_name, var in self.app_vars.items() if var.get()]
+            selected_apps = self.app_list.selected_names()
             
             if not selected_apps:
                 messagebox.showinfo("No Selection", "No apps were selected for removal.")
                 return
             
             # Get display names for selected apps for better user experience
-            display_names = []
-            for app_name in selected_apps:
-                for app in self.unused_apps:
-                    if app["name"] == app_name:
-                        display_names.append(app.get("display_name", app_name))
-                        break
+            display_names = [self.app_list.get_row(app_name)["text"] for app_name in selected_apps]
             
             # Confirm removal
             app_list = "\n".join(display_names)
@@ -280,46 +292,52 @@ class UnusedAppsFrame(tk.Frame):
                 self.remove_button.config(state=tk.DISABLED)
                 self.refresh_button.config(state=tk.DISABLED)
                 
-                # Start removal in a separate thread
-                threading.Thread(target=lambda: self._perform_removal(selected_apps), daemon=True).start()
+                # Remove in the background; the same selection submitted again joins this run
+                # and other package changes wait for it
+                get_job_manager().submit(
+                    f"remove:{','.join(sorted(selected_apps))}",
+                    self._perform_removal,
+                    selected_apps,
+                    on_done=on_main_thread(self, lambda job: self._removal_complete(job, selected_apps)),
+                    resource=PACKAGES_RESOURCE
+                )
         except Exception as e:
             logging.error(f"Error in remove_selected: {str(e)}")
             messagebox.showerror("Error", f"Error preparing to remove apps: {str(e)}")
     
     def _perform_removal(self, selected_apps):
-        """Perform the actual removal in a separate thread"""
-        try:
-            # Create restore point first
-            create_restore_point()
-            
-            # Call the removal function from app_actions.py
-            success = remove_selected_apps(selected_apps)
-            
-            # Show success message (needs to be run on the main thread)
-            self.after(0, lambda: messagebox.showinfo(
-                "Removal Complete",
-                f"Successfully removed {len(selected_apps)} unused app(s)."
-            ))
-            
-            # Refresh unused apps list
-            self.after(0, self._start_scan_thread)
-                    
-        except Exception as e:
+        """Perform the actual removal (runs as a background job)"""
+        # Create restore point first
+        create_restore_point()
+        
+        # Call the removal function from app_actions.py
+        return remove_selected_apps(selected_apps)
+    
+    def _removal_complete(self, job, selected_apps):
+        """Handle completion of the removal (called on main thread)"""
+        if job.error is not None or job.cancelled:
+            error = job.error if job.error is not None else "cancelled"
             # Log the error
-            logging.error(f"Error removing unused apps: {str(e)}")
+            logging.error(f"Error removing unused apps: {str(error)}")
             
             # Show error message
-            self.after(0, lambda: messagebox.showerror(
+            messagebox.showerror(
                 "Error",
-                f"An error occurred while removing apps:\n{str(e)}"
-            ))
+                f"An error occurred while removing apps:\n{str(error)}"
+            )
             
             # Re-enable buttons
-            self.after(0, lambda: self.status_label.config(text="Removal failed. Try again."))
-            self.after(0, lambda: self.remove_button.config(state=tk.NORMAL))
-            self.after(0, lambda: self.refresh_button.config(state=tk.NORMAL))
-        else:
-            # Re-enable buttons
-            self.after(0, lambda: self.status_label.config(text="Removal complete. Refresh list to see updates."))
-            self.after(0, lambda: self.remove_button.config(state=tk.NORMAL))
-            self.after(0, lambda: self.refresh_button.config(state=tk.NORMAL))
\ No newline at end of file
+            self.status_label.config(text="Removal failed. Try again.")
+            self.remove_button.config(state=tk.NORMAL)
+            self.refresh_button.config(state=tk.NORMAL)
+            return
+        
+        # The removed apps no longer count as unused
+        invalidate_app_usage()
+        messagebox.showinfo(
+            "Removal Complete",
+            f"Successfully removed {len(selected_apps)} unused app(s)."
+        )
+        
+        # Refresh unused apps list; the buttons come back once the scan is over
+        self._start_scan_thread()